@@ -1,8 +1,15 @@
+import asyncio
 import shutil
 import os
+import time
 from controllers.vector_db_manager import VectorDBManager
 from controllers.document_processor import DocumentProcessor
 from controllers.qa_graph_handler import CustomerSupportBot
+from services.tracing import span
+from services.metrics import (
+    REQUESTS, REQUEST_LATENCY, FIRST_FRAGMENT_LATENCY, QUEUE_WAIT, QUEUED_REQUESTS, GRAPH_IN_FLIGHT, QUERY_SLOTS
+)
+from services.vector_backends import count_chunks
 from config import Config
 from cust_logger import logger
 from fastapi import WebSocket
@@ -30,6 +37,8 @@ class UIController:
         Handles query processing logic using a QA graph for customer support.
     db_created : bool
         Tracks whether the vector database has been created in current session.
+    query_slots : asyncio.Semaphore
+        Bounds the number of graph executions in flight (Config.MAX_CONCURRENT_QUERIES).
 
     Methods:
     --------
@@ -41,6 +50,10 @@ class UIController:
         Deletes the persistent vector database and updates internal state.
     invoke_our_graph(websocket, data, user_uuid)
         Asynchronously handles incoming queries, processes them using QA handler and sends back streaming responses.
+    cache_stats()
+        Returns the hit/miss statistics of the answer and query embedding caches.
+    index_sizes()
+        Returns the number of chunks in the vectorstore and the keyword index.
     """
 
     def __init__(self):
@@ -51,6 +64,8 @@ class UIController:
         self.db_manager = VectorDBManager()
         self.doc_processor = DocumentProcessor()
         self.qa_handler = CustomerSupportBot()
+        self.query_slots = asyncio.Semaphore(Config.MAX_CONCURRENT_QUERIES)
+        QUERY_SLOTS.set(Config.MAX_CONCURRENT_QUERIES)
         self._init_state()
 
     def _init_state(self):
@@ -83,18 +98,22 @@ class UIController:
         --------
         - Deletes existing persistent storage directory if present.
         - Uses DocumentProcessor to process and chunk documents.
-        - Creates new vectorstore with the processed chunks via VectorDBManager.
+        - Creates new vectorstore with the processed chunks via VectorDBManager
+          (unchanged chunk text reuses cached embeddings instead of calling the API).
         - Updates internal state flag.
         - Logs success message with number of chunks ingested.
         """
-        if os.path.exists(Config.PERSIST_DIR):
-            shutil.rmtree(Config.PERSIST_DIR)
-            self.db_created = False
-        chunks = self.doc_processor.process_directory(directory_path)
-        if chunks:
-            self.db_manager.create_db(chunks)
-            self.db_created = True
-            logger.info(f"Database created with {len(chunks)} document chunks!")
+        # Held throughout so an upload cannot ingest into the directory being deleted
+        with VectorDBManager.ingestion_lock:
+            if os.path.exists(Config.PERSIST_DIR):
+                shutil.rmtree(Config.PERSIST_DIR)
+                self.db_manager.reset()
+                self.db_created = False
+            chunks = self.doc_processor.process_directory(directory_path)
+            if chunks:
+                self.db_manager.create_db(chunks)
+                self.db_created = True
+                logger.info(f"Database created with {len(chunks)} document chunks!")
 
     def _clear_database(self):
         """
@@ -103,10 +122,12 @@ class UIController:
 
         Logs the successful clearance of the database.
         """
-        if os.path.exists(Config.PERSIST_DIR):
-            shutil.rmtree(Config.PERSIST_DIR)
-            self.db_created = False
-            logger.info("Database cleared successfully!")
+        with VectorDBManager.ingestion_lock:
+            if os.path.exists(Config.PERSIST_DIR):
+                shutil.rmtree(Config.PERSIST_DIR)
+                self.db_manager.reset()
+                self.db_created = False
+                logger.info("Database cleared successfully!")
 
     async def invoke_our_graph(self, websocket: WebSocket, data: str, user_uuid: str):
         """
@@ -124,10 +145,18 @@ class UIController:
 
         Process:
         --------
-        - Obtains retriever interface from vector database manager.
-        - Passes user query and retriever to QA handler to get answer.
-        - Extracts final result text safely from the handler's response.
-        - Sends back the answer message as JSON to client over WebSocket.
+        - Obtains retriever interface from vector database manager, on a worker thread.
+        - Waits for a free query slot, then runs the QA graph asynchronously, so the event
+          loop keeps serving other websockets while this answer is generated.
+        - Sends every answer fragment as an 'on_chat_model_stream' frame as soon as the LLM
+          produces it, so the user sees the first tokens instead of waiting for the
+          whole answer.
+        - Sends a final 'on_chat_model_end' frame once the answer is complete (also after
+          an error, so the client never waits for an answer that will not come).
+        - Times the whole request as a 'request' trace span (with the query slot wait and
+          the time to the first fragment as attributes), the parent of every stage span.
+        - Records the request outcome, latencies, queue depth and in-flight executions as
+          Prometheus metrics.
 
         Exception Handling:
         -------------------
@@ -137,12 +166,72 @@ class UIController:
         # initial_input = {"messages": data}
         # thread_config = {"configurable": {"thread_id": user_uuid}}
         # final_text = ""
+        started = time.perf_counter()
+        outcome = "ok"
         try:
-            retriever = self.db_manager.get_retriever()
-            response = self.qa_handler.handle_query(data, retriever)
-            final_response = response['result'] if isinstance(response, dict) and 'result' in response else response
-
-            message = json.dumps({"on_chat_model_stream": final_response})
-            await websocket.send_text(message)
+            with span("request", conversation=user_uuid) as current:
+                # Rebuilding a stale retriever (or reopening the store after reset) blocks for a
+                # while, so it must not run on the event loop serving every other websocket
+                retriever = await asyncio.to_thread(self.db_manager.get_retriever)
+                fragments = 0
+                waiting = time.perf_counter()
+                with QUEUED_REQUESTS.track_inprogress():
+                    await self.query_slots.acquire()
+                try:
+                    QUEUE_WAIT.observe(time.perf_counter() - waiting)
+                    current.set_attribute("queued_ms", 1000 * (time.perf_counter() - waiting))
+                    with GRAPH_IN_FLIGHT.track_inprogress():
+                        async for fragment in self.qa_handler.astream_response(data, retriever):
+                            if not fragments:
+                                FIRST_FRAGMENT_LATENCY.observe(time.perf_counter() - started)
+                                current.set_attribute("first_fragment_ms", 1000 * (time.perf_counter() - started))
+                            fragments += 1
+                            await websocket.send_text(json.dumps({"on_chat_model_stream": fragment}))
+                finally:
+                    self.query_slots.release()
+                current.set_attribute("fragments", fragments)
         except Exception as e:
+            outcome = "error"
             print(f'Exception: {e}')
+        try:
+            await websocket.send_text(json.dumps({"on_chat_model_end": True}))
+        except Exception as e:
+            outcome = "error"
+            print(f'Exception: {e}')
+        REQUESTS.labels(outcome).inc()
+        REQUEST_LATENCY.observe(time.perf_counter() - started)
+
+    def cache_stats(self):
+        """
+        Returns the statistics of every cache on the answer path, keyed by cache name
+        ('response', 'semantic', 'query_embedding'); disabled caches are left out.
+
+        Returns:
+        --------
+        dict
+            Cache name -> stats dict with at least 'hits' and 'misses'.
+        """
+        stats = {}
+        if self.qa_handler.qa_handler.response_cache is not None:
+            stats["response"] = self.qa_handler.qa_handler.response_cache.stats()
+        if self.qa_handler.semantic_cache is not None:
+            stats["semantic"] = self.qa_handler.semantic_cache.stats()
+        if VectorDBManager.query_embeddings is not None:
+            stats["query_embedding"] = VectorDBManager.query_embeddings.cache.stats()
+        return stats
+
+    def index_sizes(self):
+        """
+        Returns the number of chunks in the vectorstore and the BM25 keyword index.
+
+        Returns:
+        --------
+        dict
+            Index name ('vectorstore', 'bm25') -> chunk count; indexes that are not open are left out.
+        """
+        sizes = {}
+        if self.db_created:
+            sizes["vectorstore"] = count_chunks(self.db_manager.get_vectorstore())
+        if VectorDBManager.lexical_index is not None:
+            sizes["bm25"] = len(VectorDBManager.lexical_index)
+        return sizes
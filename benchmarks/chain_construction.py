@@ -0,0 +1,161 @@
+"""
+Benchmark: per-request chain construction vs. prebuilt chains.
+
+Runs the QA and sentiment steps of a request many times with a fixed number of requests in
+flight, once rebuilding the chains for every request (RetrievalQA.from_chain_type and
+ChatPromptTemplate.from_template, as QAHandler and CustomerSupportBot used to do) and once
+with the chains QAHandler and CustomerSupportBot now build at start-up.
+
+A fake chat model and an in-memory retriever with zero latency are used, so the numbers
+isolate the framework overhead: no API key or network access is needed.
+
+Usage (from the repository root):
+    python benchmarks/chain_construction.py --requests 2000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.chains import RetrievalQA
+from langchain.prompts import ChatPromptTemplate
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.retrievers import BaseRetriever
+
+from controllers.qa_graph_handler import SENTIMENT_PROMPT
+from controllers.qa_handler import QAHandler
+
+
+class StaticRetriever(BaseRetriever):
+    """
+    Retriever returning the same documents for every query.
+    """
+    documents: list
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        return self.documents
+
+
+def per_request_qa(handler, retriever):
+    """
+    The QA chain as it was built before: a new RetrievalQA for every request.
+    """
+    return RetrievalQA.from_chain_type(
+        llm=handler.llm,
+        chain_type="stuff",
+        retriever=retriever,
+        return_source_documents=True,
+        chain_type_kwargs={"prompt": handler.qa_prompt}
+    )
+
+
+def per_request_sentiment(llm):
+    """
+    The sentiment chain as it was built before: a new prompt template for every request.
+    """
+    return ChatPromptTemplate.from_template(SENTIMENT_PROMPT.messages[0].prompt.template) | llm
+
+
+async def run_variant(name, request, requests, concurrency):
+    """
+    Runs `requests` calls of the async `request` function, at most `concurrency` at once.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(index):
+        async with slots:
+            started = time.perf_counter()
+            await request(index)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "variant": name,
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "requests_per_sec": requests / elapsed,
+        "latency_ms_p50": 1000 * latencies[len(latencies) // 2],
+        "latency_ms_p95": 1000 * latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def construction_cost(build, repeat):
+    """
+    Average wall time of building a chain, in microseconds.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build()
+        samples.append(time.perf_counter() - started)
+    return 1e6 * statistics.mean(samples)
+
+
+async def main(args):
+    llm = FakeListChatModel(responses=["positive", "The answer is in section 3 of the manual."])
+    handler = QAHandler(llm=llm)
+    handler.response_cache = None  # measure generation, not cache hits
+    sentiment_chain = SENTIMENT_PROMPT | llm
+    retriever = StaticRetriever(documents=[
+        Document(page_content=f"Manual section {index}: reset the device by holding the power button.")
+        for index in range(4)
+    ])
+    question = "How do I reset the device?"
+
+    async def rebuilt(index):
+        await per_request_sentiment(llm).ainvoke({"query": question})
+        await per_request_qa(handler, retriever).ainvoke(question)
+
+    async def prebuilt(index):
+        await sentiment_chain.ainvoke({"query": question})
+        await handler.aget_answer(question, retriever)
+
+    # Warm up imports and lazily initialized state before measuring
+    await rebuilt(0)
+    await prebuilt(0)
+
+    results = {
+        "construction_us": {
+            "qa_chain": construction_cost(lambda: per_request_qa(handler, retriever), args.repeat),
+            "sentiment_chain": construction_cost(lambda: per_request_sentiment(llm), args.repeat),
+        },
+        "runs": [
+            await run_variant("rebuilt_per_request", rebuilt, args.requests, args.concurrency),
+            await run_variant("prebuilt", prebuilt, args.requests, args.concurrency),
+        ],
+    }
+    rebuilt_run, prebuilt_run = results["runs"]
+    results["overhead_removed_ms_per_request"] = 1000 * (
+        rebuilt_run["seconds"] - prebuilt_run["seconds"]
+    ) / args.requests
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Chain construction: QA {results['construction_us']['qa_chain']:.0f} us, "
+          f"sentiment {results['construction_us']['sentiment_chain']:.0f} us")
+    for run in results["runs"]:
+        print(f"{run['variant']:>20}: {run['requests_per_sec']:8.1f} req/s, "
+              f"p50 {run['latency_ms_p50']:.2f} ms, p95 {run['latency_ms_p95']:.2f} ms")
+    print(f"Overhead removed: {results['overhead_removed_ms_per_request']:.3f} ms per request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Number of requests per variant.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once.")
+    parser.add_argument("--repeat", type=int, default=500, help="Samples for the construction-only timing.")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+    asyncio.run(main(parser.parse_args()))
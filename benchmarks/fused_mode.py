@@ -0,0 +1,129 @@
+"""
+Benchmark: separate sentiment + answer calls vs. the fused single-call mode.
+
+Runs the same queries through CustomerSupportBot with FUSED_MODE off and on, and reports
+per-query latency, the number of model calls and the token usage reported by the model
+(input, output and total tokens, summed from each response's usage_metadata).
+
+It uses the configured model and the persisted vectorstore, so GOOGLE_API_KEY must be
+set and the knowledge base ingested. The local sentiment classifier is disabled by
+default (--sentiment-backend llm), so the baseline really makes two model calls.
+
+Usage (from the repository root):
+    python benchmarks/fused_mode.py --queries queries.txt --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from controllers.qa_graph_handler import CustomerSupportBot
+from controllers.vector_db_manager import VectorDBManager
+
+DEFAULT_QUERIES = [
+    "How do I reset the device to factory settings?",
+    "What does the warranty cover?",
+    "How do I connect to the wifi network?",
+    "What are the safety instructions?",
+    "How do I update the firmware?",
+    "I have asked three times already and nothing works, this is useless.",
+    "Can you explain the maintenance schedule?",
+    "I want to speak to a human.",
+]
+
+
+class ModelCallCounter(BaseCallbackHandler):
+    """
+    Counts completed model calls and sums the token usage they report.
+
+    Usage is read from each generation's message usage_metadata (like LLMMetricsCallback),
+    which every chat model sets, also when it reports no model name.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.tokens = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+
+    def on_llm_end(self, response, **kwargs):
+        self.calls += 1
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    for key in self.tokens:
+                        self.tokens[key] += usage.get(key, 0)
+
+
+async def run_mode(bot, retriever, queries, fused, repeat):
+    """
+    Runs every query `repeat` times sequentially and aggregates latency and usage.
+    """
+    bot.fused_mode = fused
+    latencies = []
+    counter = ModelCallCounter()
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            await bot.app.ainvoke(
+                {"user_input": query},
+                config={**bot._run_config(retriever), "callbacks": [counter]}
+            )
+            latencies.append(time.perf_counter() - started)
+    tokens = counter.tokens
+    latencies.sort()
+    runs = len(latencies)
+    return {
+        "mode": "fused" if fused else "separate",
+        "queries": runs,
+        "model_calls": counter.calls,
+        "model_calls_per_query": counter.calls / runs,
+        "latency_ms_mean": 1000 * statistics.mean(latencies),
+        "latency_ms_p50": 1000 * latencies[runs // 2],
+        "latency_ms_p95": 1000 * latencies[max(0, int(runs * 0.95) - 1)],
+        **tokens,
+        "tokens_per_query": tokens["total_tokens"] / runs,
+    }
+
+
+async def main(args):
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r") as file:
+            queries = [line.strip() for line in file if line.strip()]
+
+    bot = CustomerSupportBot()
+    bot.sentiment_backend = args.sentiment_backend
+    bot.speculation = "off"
+    bot.qa_handler.response_cache = None  # every query must reach the model
+    bot.semantic_cache = None
+    retriever = VectorDBManager().get_retriever()
+
+    results = [
+        await run_mode(bot, retriever, queries, fused=False, repeat=args.repeat),
+        await run_mode(bot, retriever, queries, fused=True, repeat=args.repeat),
+    ]
+    for result in results:
+        print(f"{result['mode']:>8}: {result['model_calls_per_query']:.2f} calls/query, "
+              f"mean {result['latency_ms_mean']:.0f} ms, p50 {result['latency_ms_p50']:.0f} ms, "
+              f"p95 {result['latency_ms_p95']:.0f} ms, {result['tokens_per_query']:.0f} tokens/query "
+              f"(in {result['input_tokens']}, out {result['output_tokens']})")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", help="Text file with one query per line (default: built-in set).")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the query set per mode.")
+    parser.add_argument("--sentiment-backend", default="llm", choices=["llm", "local", "hybrid"],
+                        help="Routing classifier used by the non-fused mode.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    asyncio.run(main(parser.parse_args()))
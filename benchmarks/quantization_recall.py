@@ -0,0 +1,136 @@
+"""
+Benchmark: recall@k and latency of the int8-quantized flat index against exact float32 search.
+
+Opens a flat index (VECTOR_BACKEND=flat) once unquantized and once per re-rank factor with
+FLAT_QUANTIZATION=int8, and compares their top-k results. Queries are stored chunks: each is
+searched with its own embedding and the chunk itself is left out of both rankings, so no
+API key is needed. With --synthetic a random clustered index is built in a temporary
+directory instead of reading the persisted one.
+
+The int8 codes are created next to the float32 matrix if they do not exist yet.
+
+Usage (from the repository root):
+    python benchmarks/quantization_recall.py --k 1 5 10 --rerank-factors 1 2 4 8
+    python benchmarks/quantization_recall.py --synthetic 100000 --dim 768 --json recall.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.flat_vector_store import FlatVectorStore
+
+
+def build_synthetic(path, chunks, dim, clusters, seed):
+    """
+    Fills a flat index with vectors drawn around random cluster centers, which resembles
+    embeddings of a real corpus more closely than independent noise.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    store = FlatVectorStore(path)
+    for start in range(0, chunks, 10000):
+        size = min(10000, chunks - start)
+        vectors = centers[rng.integers(0, clusters, size)] + 0.5 * rng.standard_normal((size, dim), dtype=np.float32)
+        store.upsert_embeddings([f"chunk-{index}" for index in range(start, start + size)], vectors, [""] * size)
+    return store
+
+
+def all_ids(store):
+    """
+    Returns the ID of every stored chunk.
+    """
+    ids = []
+    for offset in range(0, store.count(), 10000):
+        ids.extend(store.get_chunks(offset, 10000)[0])
+    return ids
+
+
+def search(store, query_ids, vectors, k):
+    """
+    Top-k chunk IDs of every query, leaving the query chunk out, and the mean latency.
+    """
+    results, latencies = [], []
+    for query_id, vector in zip(query_ids, vectors):
+        started = time.perf_counter()
+        hits = store.similarity_search_with_score_by_vector(vector, k + 1)
+        latencies.append(time.perf_counter() - started)
+        results.append([document.id for document, _ in hits if document.id != query_id][:k])
+    return results, 1000 * statistics.mean(latencies)
+
+
+def recall(approximate, exact, k):
+    """
+    Mean fraction of the exact top-k found in the approximate top-k.
+    """
+    return statistics.mean(len(set(a[:k]) & set(e[:k])) / max(1, len(e[:k])) for a, e in zip(approximate, exact))
+
+
+def main(args):
+    if args.synthetic:
+        path = tempfile.mkdtemp(prefix="flat_index_")
+        print(f"Building a synthetic index of {args.synthetic} x {args.dim} in {path}...")
+        build_synthetic(path, args.synthetic, args.dim, args.clusters, args.seed)
+    else:
+        path = args.path
+        if not os.path.exists(os.path.join(path, "vectors.npy")):
+            sys.exit(f"No flat index in {path}; ingest with VECTOR_BACKEND=flat or use --synthetic.")
+
+    exact_store = FlatVectorStore(path)
+    ids = all_ids(exact_store)
+    rng = np.random.default_rng(args.seed)
+    query_ids = [ids[index] for index in rng.choice(len(ids), min(args.queries, len(ids)), replace=False)]
+    vectors = exact_store.get_vectors(query_ids)
+    max_k = max(args.k)
+
+    exact, exact_ms = search(exact_store, query_ids, vectors, max_k)
+    report = {
+        "path": path,
+        "queries": len(query_ids),
+        "exact": {"latency_ms": exact_ms, **exact_store.memory_stats()},
+        "int8": [],
+    }
+    for factor in args.rerank_factors:
+        store = FlatVectorStore(path, quantization="int8", rerank_factor=factor)
+        approximate, approximate_ms = search(store, query_ids, vectors, max_k)
+        report["int8"].append({
+            "rerank_factor": factor,
+            "latency_ms": approximate_ms,
+            **{f"recall@{k}": recall(approximate, exact, k) for k in args.k},
+            **store.memory_stats(),
+        })
+
+    stats = report["exact"]
+    print(f"{stats['chunks']} chunks x {stats['dim']} dims, {len(query_ids)} queries")
+    print(f"  float32: {stats['scan_bytes_per_chunk']} B/chunk scanned, {exact_ms:.2f} ms/query")
+    for run in report["int8"]:
+        recalls = ", ".join(f"recall@{k} {run[f'recall@{k}']:.3f}" for k in args.k)
+        print(f"  int8 x{run['rerank_factor']} re-rank: {run['scan_bytes_per_chunk']} B/chunk scanned, "
+              f"{run['latency_ms']:.2f} ms/query, {recalls}")
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.path.join(Config.PERSIST_DIR, "flat_index"),
+                        help="Flat index directory (default: the configured one).")
+    parser.add_argument("--synthetic", type=int, default=0, help="Build a random index of this many chunks instead.")
+    parser.add_argument("--dim", type=int, default=768, help="Dimension of the synthetic index.")
+    parser.add_argument("--clusters", type=int, default=256, help="Cluster centers of the synthetic index.")
+    parser.add_argument("--queries", type=int, default=200, help="Number of stored chunks used as queries.")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 5, 10], help="Cut-offs to report recall at.")
+    parser.add_argument("--rerank-factors", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Candidates re-ranked exactly per result.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for queries and synthetic data.")
+    parser.add_argument("--json", help="Also write the report to this JSON file.")
+    main(parser.parse_args())
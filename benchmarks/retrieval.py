@@ -0,0 +1,289 @@
+"""
+Benchmark: latency, throughput, recall and build cost of the retrieval layer.
+
+Builds a synthetic corpus with labeled queries, ingests it through VectorDBManager.create_db
+into every requested backend, and queries VectorDBManager.get_retriever() in every requested
+retrieval mode. Everything runs offline: embeddings come from HashEmbeddings, a deterministic
+hashed bag-of-words, and all state lives in a temporary directory.
+
+The corpus is made of topics with their own vocabulary. Every chunk mixes words of its topic,
+common words, words specific to the chunk and a product code ("SKU-0001234"). Each query
+targets one chunk:
+    - 'semantic' queries are a handful of the chunk's topic and specific words;
+    - 'keyword' queries are the chunk's product code.
+recall@k is the fraction of queries whose target chunk is among the first k results.
+
+For every (corpus size, chunk length, backend) the report gives the index build time and
+throughput, the peak resident memory of the process and the size on disk. For every
+retrieval mode it gives p50/p95/p99 query latency, sequential and concurrent QPS, embedding
+calls per query and recall@k (overall and per query type). Each build runs in a fresh
+process so memory figures are not mixed up between configurations.
+
+Usage (from the repository root):
+    python benchmarks/retrieval.py --sizes 10000 100000 1000000 --json retrieval.json
+    python benchmarks/retrieval.py --sizes 10000 --backends chroma flat flat-int8 --modes vector hybrid lexical
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document
+
+from config import Config
+
+SYLLABLES = ["ba", "ce", "di", "fo", "gu", "ha", "ke", "li", "mo", "nu", "pa", "re", "si", "to", "vu",
+             "wa", "xe", "yo", "za", "bri", "cla", "dro", "fle", "gri", "klo", "pra", "sto", "tri"]
+
+
+def word(index: int) -> str:
+    """
+    Deterministic pseudo-word for an integer (its digits in base len(SYLLABLES)).
+    """
+    letters = []
+    while True:
+        index, digit = divmod(index, len(SYLLABLES))
+        letters.append(SYLLABLES[digit])
+        if not index:
+            break
+    return "".join(letters) + "n"
+
+
+def make_corpus(chunks: int, chunk_words: int, queries: int, keyword_fraction: float, seed: int):
+    """
+    Generates the synthetic chunks and the labeled queries.
+
+    Returns:
+    --------
+    tuple (list of Document, list of dict)
+        Chunks carrying their index as 'synthetic_id' metadata, and queries as
+        {"text", "target", "type"}.
+    """
+    rng = np.random.default_rng(seed)
+    topics = max(20, chunks // 500)
+    topic_words, common_words = 100, 500
+    # Word ID ranges: common words, then each topic's vocabulary, then chunk-specific words
+    topic_base = common_words
+    specific_base = topic_base + topics * topic_words
+    n_topic = chunk_words // 2
+    n_common = chunk_words * 3 // 10
+    n_specific = max(1, chunk_words - n_topic - n_common)
+
+    chunk_topics = rng.integers(0, topics, chunks)
+    documents, chunk_terms = [], []
+    for index in range(chunks):
+        topic = chunk_topics[index]
+        topical = topic_base + topic * topic_words + rng.integers(0, topic_words, n_topic)
+        specific = specific_base + rng.integers(0, chunks * 2, n_specific)
+        ids = np.concatenate([topical, rng.integers(0, common_words, n_common), specific])
+        rng.shuffle(ids)
+        code = f"SKU-{index:07d}"
+        text = f"{code} " + " ".join(word(int(i)) for i in ids)
+        documents.append(Document(
+            page_content=text,
+            metadata={"source": f"synthetic/topic-{topic}.txt", "synthetic_id": index}
+        ))
+        chunk_terms.append((code, np.concatenate([topical, specific])))
+
+    labeled = []
+    for target in rng.choice(chunks, min(queries, chunks), replace=False):
+        code, terms = chunk_terms[target]
+        if rng.random() < keyword_fraction:
+            labeled.append({"text": code, "target": int(target), "type": "keyword"})
+        else:
+            picked = rng.choice(terms, min(6, len(terms)), replace=False)
+            labeled.append({"text": " ".join(word(int(i)) for i in picked), "target": int(target), "type": "semantic"})
+    return documents, labeled
+
+
+def configure(workdir: str, backend: str):
+    """
+    Points Config at a scratch directory and selects the vectorstore backend.
+    """
+    Config.DATA_DIR = os.path.join(workdir, "data")
+    Config.PERSIST_DIR = os.path.join(workdir, "store")
+    Config.MANIFEST_FILE = os.path.join(Config.PERSIST_DIR, "ingestion_manifest.json")
+    Config.BM25_INDEX_FILE = os.path.join(Config.PERSIST_DIR, "bm25_index.sqlite3")
+    Config.EMBEDDING_CACHE_FILE = os.path.join(workdir, "embeddings.sqlite3")
+    Config.VECTOR_BACKEND = "flat" if backend.startswith("flat") else backend
+    Config.FLAT_QUANTIZATION = "int8" if backend == "flat-int8" else "none"
+    os.makedirs(Config.DATA_DIR, exist_ok=True)
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process in MiB.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return float("nan")
+
+
+def disk_mb(path: str) -> float:
+    """
+    Total size of the files under a directory in MiB.
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 2 ** 20
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def measure_mode(manager, embeddings, queries, ks, concurrency):
+    """
+    Queries the retriever sequentially (latency, recall) and concurrently (throughput).
+    """
+    manager.get_query_embeddings().cache.clear()
+    retriever = manager.get_retriever()
+    calls_before = embeddings.calls
+    latencies, ranks = [], []
+    for query in queries:
+        started = time.perf_counter()
+        documents = retriever.invoke(query["text"])
+        latencies.append(time.perf_counter() - started)
+        found = [document.metadata.get("synthetic_id") for document in documents]
+        ranks.append(found.index(query["target"]) if query["target"] in found else None)
+    embed_calls = embeddings.calls - calls_before
+
+    # Same queries again: drop their cached embeddings so the throughput run pays for them too
+    manager.get_query_embeddings().cache.clear()
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        list(pool.map(lambda query: retriever.invoke(query["text"]), queries))
+        concurrent_seconds = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "latency_ms_p50": 1000 * percentile(latencies, 0.50),
+        "latency_ms_p95": 1000 * percentile(latencies, 0.95),
+        "latency_ms_p99": 1000 * percentile(latencies, 0.99),
+        "latency_ms_mean": 1000 * statistics.mean(latencies),
+        "qps": len(latencies) / sum(latencies),
+        "qps_concurrent": len(queries) / concurrent_seconds,
+        "embedding_calls_per_query": embed_calls / len(queries),
+    }
+    for k in ks:
+        result[f"recall@{k}"] = statistics.mean(rank is not None and rank < k for rank in ranks)
+        for query_type in ("semantic", "keyword"):
+            typed = [rank for rank, query in zip(ranks, queries) if query["type"] == query_type]
+            if typed:
+                result[f"recall@{k}_{query_type}"] = statistics.mean(rank is not None and rank < k for rank in typed)
+    return result
+
+
+def run_build(args, size, chunk_words, backend):
+    """
+    Builds one index in a scratch directory and measures every retrieval mode over it.
+    Runs in its own process.
+    """
+    from controllers.vector_db_manager import VectorDBManager
+    from services.embedding_cache import CachedQueryEmbeddings
+    from services.hash_embeddings import HashEmbeddings
+
+    workdir = tempfile.mkdtemp(prefix="retrieval_bench_")
+    # Progress messages of VectorDBManager go to stderr, keeping stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            configure(workdir, backend)
+            Config.RETRIEVAL_K = max(args.k)
+            embeddings = HashEmbeddings(args.dim)
+            VectorDBManager.query_embeddings = CachedQueryEmbeddings(
+                embeddings, maxsize=Config.QUERY_CACHE_SIZE, ttl=Config.QUERY_CACHE_TTL
+            )
+            documents, queries = make_corpus(size, chunk_words, args.queries, args.keyword_fraction, args.seed)
+            manager = VectorDBManager()
+
+            rss_before = rss_mb()
+            started = time.perf_counter()
+            manager.create_db(documents)
+            manager.get_lexical_index()
+            build_seconds = time.perf_counter() - started
+            del documents
+
+            result = {
+                "chunks": size,
+                "chunk_words": chunk_words,
+                "backend": backend,
+                "dim": args.dim,
+                "build_seconds": build_seconds,
+                "build_chunks_per_sec": size / build_seconds,
+                "rss_mb_after_build": rss_mb(),
+                "rss_mb_build_delta": rss_mb() - rss_before,
+                "disk_mb": disk_mb(Config.PERSIST_DIR),
+                "modes": {},
+            }
+            for mode in args.modes:
+                Config.RETRIEVAL_MODE = mode
+                VectorDBManager.invalidate()
+                result["modes"][mode] = measure_mode(manager, embeddings, queries, args.k, args.concurrency)
+            # ru_maxrss is in KiB on Linux
+            result["rss_mb_peak"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            return result
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main(args):
+    runs = []
+    for size in args.sizes:
+        for chunk_words in args.chunk_words:
+            for backend in args.backends:
+                print(f"Building {backend} index of {size} chunks x {chunk_words} words...", file=sys.stderr)
+                with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+                    run = pool.submit(run_build, args, size, chunk_words, backend).result()
+                runs.append(run)
+                print(f"  built in {run['build_seconds']:.1f}s ({run['build_chunks_per_sec']:.0f} chunks/s), "
+                      f"peak RSS {run['rss_mb_peak']:.0f} MiB, disk {run['disk_mb']:.0f} MiB", file=sys.stderr)
+                for mode, stats in run["modes"].items():
+                    recalls = " ".join(f"R@{k} {stats[f'recall@{k}']:.3f}" for k in args.k)
+                    print(f"  {mode:>7}: p50 {stats['latency_ms_p50']:.2f} ms, p95 {stats['latency_ms_p95']:.2f} ms, "
+                          f"p99 {stats['latency_ms_p99']:.2f} ms, {stats['qps']:.0f} QPS "
+                          f"({stats['qps_concurrent']:.0f} at {args.concurrency} threads), {recalls}",
+                          file=sys.stderr)
+
+    report = {
+        "settings": {key: value for key, value in vars(args).items() if key != "json"},
+        "runs": runs,
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Corpus sizes in chunks.")
+    parser.add_argument("--chunk-words", type=int, nargs="+", default=[80], help="Words per chunk.")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "flat", "flat-int8"],
+                        choices=["chroma", "flat", "flat-int8"], help="Vectorstore backends.")
+    parser.add_argument("--modes", nargs="+", default=["vector", "hybrid", "lexical"],
+                        choices=["vector", "hybrid", "lexical"], help="Retrieval modes (Config.RETRIEVAL_MODE).")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 4, 10], help="Cut-offs to report recall at.")
+    parser.add_argument("--queries", type=int, default=500, help="Labeled queries per build.")
+    parser.add_argument("--keyword-fraction", type=float, default=0.3, help="Share of product code queries.")
+    parser.add_argument("--dim", type=int, default=256, help="Hash embedding dimension.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads for the throughput run.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the corpus and queries.")
+    parser.add_argument("--json", help="Write the JSON report to this file instead of stdout.")
+    main(parser.parse_args())
@@ -0,0 +1,338 @@
+"""
+Load test: concurrent websocket conversations against a running server.py.
+
+Opens --clients websocket connections to /ws, speaking the frontend's protocol: an
+{"uuid", "init": true} message when the conversation starts, then one {"uuid", "message"}
+per question. The server answers with "on_chat_model_stream" frames followed by one
+"on_chat_model_end" frame. Questions are drawn from a weighted mix and sent either at a
+target aggregate rate (--rate, Poisson arrivals spread over the clients; a client still
+waiting for an answer sends its next question as soon as the answer ends) or back to back
+(--rate 0, with optional --think-time).
+
+For every question it records:
+    - time to first frame (TTFF): send -> first stream frame;
+    - time to last frame (TTLF): send -> end frame;
+    - how late the question was sent compared to its scheduled arrival (client backlog);
+    - errors: connection failures, timeouts, closed sockets, and answers that ended
+      without any stream frame (the server reports errors that way).
+With --server-pid, the server's CPU, resident memory, threads and open file descriptors
+are sampled from /proc during the run.
+
+The JSON report contains the settings, overall and per-category latency percentiles,
+throughput, error counts, a per-second timeline and the resource samples, so runs can be
+compared for capacity planning and regression checks. For measurements of our own code
+only, start the server with AI_BACKEND=fake (see FakeChatModel).
+
+Usage (from the repository root, with the server running):
+    AI_BACKEND=fake python server.py &
+    python benchmarks/websocket_load.py --clients 50 --rate 20 --duration 60 --server-pid $! --json load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+import websockets
+
+# (category, question, weight): a support traffic mix of manual lookups, product codes,
+# repeated and paraphrased questions (cache hits) and escalations
+DEFAULT_MIX = [
+    ("faq", "How do I reset the device to factory settings?", 4),
+    ("faq", "What does the warranty cover?", 3),
+    ("faq", "How do I connect to the wifi network?", 3),
+    ("faq", "What are the safety instructions?", 2),
+    ("faq", "How do I update the firmware?", 2),
+    ("paraphrase", "how can I reset my device to the factory settings", 2),
+    ("paraphrase", "What is covered by the warranty?", 2),
+    ("keyword", "error E-42", 2),
+    ("keyword", "firmware update", 1),
+    ("escalation", "I want to speak to a human.", 1),
+    ("escalation", "This is useless, nothing you say works.", 1),
+]
+
+
+def load_mix(path):
+    """
+    Reads a question mix: one question per line, optionally 'category<TAB>question<TAB>weight'.
+    """
+    mix = []
+    with open(path, "r") as file:
+        for line in file:
+            fields = line.rstrip("\n").split("\t")
+            if not fields[0].strip():
+                continue
+            if len(fields) == 1:
+                mix.append(("default", fields[0].strip(), 1))
+            else:
+                mix.append((fields[0], fields[1], float(fields[2]) if len(fields) > 2 else 1))
+    return mix
+
+
+def percentiles(values) -> dict:
+    """
+    p50/p90/p95/p99/max/mean of a list of seconds, in milliseconds.
+    """
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(fraction):
+        return 1000 * values[min(len(values) - 1, int(len(values) * fraction))]
+
+    return {
+        "count": len(values),
+        "p50_ms": at(0.50),
+        "p90_ms": at(0.90),
+        "p95_ms": at(0.95),
+        "p99_ms": at(0.99),
+        "max_ms": 1000 * values[-1],
+        "mean_ms": 1000 * statistics.mean(values),
+    }
+
+
+class ResourceSampler:
+    """
+    Samples CPU, resident memory, threads and open file descriptors of a process from /proc.
+    """
+
+    def __init__(self, pid, interval):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat") as file:
+            # Fields after the parenthesized command name; utime and stime are fields 14 and 15
+            fields = file.read().rsplit(")", 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / self._ticks
+        threads = int(fields[17])
+        with open(f"/proc/{self.pid}/statm") as file:
+            rss_mb = int(file.read().split()[1]) * self._page_size / 2 ** 20
+        fds = len(os.listdir(f"/proc/{self.pid}/fd"))
+        return cpu_seconds, rss_mb, threads, fds
+
+    async def run(self, started, stop):
+        previous = None
+        while not stop.is_set():
+            now = time.perf_counter()
+            try:
+                cpu_seconds, rss_mb, threads, fds = self._read()
+            except (OSError, IndexError, ValueError):
+                break
+            if previous is not None:
+                self.samples.append({
+                    "t": round(now - started, 3),
+                    "cpu_percent": 100 * (cpu_seconds - previous[1]) / (now - previous[0]),
+                    "rss_mb": rss_mb,
+                    "threads": threads,
+                    "open_fds": fds,
+                })
+            previous = (now, cpu_seconds)
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {}
+        return {
+            key: {"mean": statistics.mean(s[key] for s in self.samples), "max": max(s[key] for s in self.samples)}
+            for key in ("cpu_percent", "rss_mb", "threads", "open_fds")
+        }
+
+
+class LoadTest:
+    """
+    Runs the websocket clients and collects one record per question.
+    """
+
+    def __init__(self, args, mix):
+        self.args = args
+        self.mix = mix
+        self.records = []
+        self.connect_errors = 0
+        self.rng = random.Random(args.seed)
+
+    def _pick(self):
+        return self.rng.choices(self.mix, weights=[weight for _, _, weight in self.mix])[0][:2]
+
+    async def _ask(self, socket, conversation, question):
+        """
+        Sends one question and reads frames until the end frame.
+        """
+        sent = time.perf_counter()
+        first = None
+        frames, characters = 0, 0
+        await socket.send(json.dumps({"uuid": conversation, "message": question}))
+        while True:
+            frame = json.loads(await socket.recv())
+            if "on_chat_model_stream" in frame:
+                first = first or time.perf_counter()
+                frames += 1
+                characters += len(frame["on_chat_model_stream"])
+            elif frame.get("on_chat_model_end"):
+                return sent, first, time.perf_counter(), frames, characters
+
+    async def client(self, index, started, deadline):
+        """
+        One conversation: connects, then asks questions until the deadline or request budget.
+        """
+        args = self.args
+        await asyncio.sleep(args.ramp * index / max(1, args.clients))
+        conversation = str(uuid.uuid4())
+        try:
+            socket = await websockets.connect(args.url, max_size=None, open_timeout=args.timeout)
+        except Exception:
+            self.connect_errors += 1
+            return
+        async with socket:
+            await socket.send(json.dumps({"uuid": conversation, "init": True}))
+            per_client_rate = args.rate / args.clients if args.rate > 0 else 0
+            scheduled = time.perf_counter()
+            while time.perf_counter() < deadline and (not args.requests or len(self.records) < args.requests):
+                if per_client_rate:
+                    scheduled += self.rng.expovariate(per_client_rate)
+                    await asyncio.sleep(max(0.0, min(scheduled, deadline) - time.perf_counter()))
+                    if scheduled >= deadline:
+                        break
+                else:
+                    scheduled = time.perf_counter()
+                if args.requests and len(self.records) >= args.requests:
+                    break
+                category, question = self._pick()
+                record = {"category": category, "t": time.perf_counter() - started,
+                          "send_lag": max(0.0, time.perf_counter() - scheduled)}
+                self.records.append(record)
+                try:
+                    sent, first, last, frames, characters = await asyncio.wait_for(
+                        self._ask(socket, conversation, question), args.timeout
+                    )
+                except asyncio.TimeoutError:
+                    record["error"] = "timeout"
+                    return  # the socket may still deliver the late answer; drop this client
+                except websockets.ConnectionClosed:
+                    record["error"] = "closed"
+                    return
+                record.update(ttff=None if first is None else first - sent, ttlf=last - sent,
+                              frames=frames, characters=characters)
+                if not frames:
+                    record["error"] = "empty_answer"
+                if args.think_time:
+                    await asyncio.sleep(self.rng.expovariate(1 / args.think_time))
+
+    async def run(self):
+        args = self.args
+        started = time.perf_counter()
+        deadline = started + args.duration
+        stop = asyncio.Event()
+        sampler = ResourceSampler(args.server_pid, args.sample_interval) if args.server_pid else None
+        sampling = asyncio.create_task(sampler.run(started, stop)) if sampler else None
+        await asyncio.gather(*(self.client(index, started, deadline) for index in range(args.clients)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        if sampling:
+            await sampling
+        return self.report(elapsed, sampler)
+
+    def report(self, elapsed, sampler) -> dict:
+        records = self.records
+        completed = [record for record in records if "ttlf" in record and "error" not in record]
+        errors = {}
+        for record in records:
+            if "error" in record:
+                errors[record["error"]] = errors.get(record["error"], 0) + 1
+        if self.connect_errors:
+            errors["connect"] = self.connect_errors
+
+        categories = {}
+        for category in sorted({record["category"] for record in records}):
+            done = [record for record in completed if record["category"] == category]
+            categories[category] = {
+                "sent": sum(record["category"] == category for record in records),
+                "completed": len(done),
+                "ttff": percentiles([record["ttff"] for record in done]),
+                "ttlf": percentiles([record["ttlf"] for record in done]),
+            }
+
+        timeline = []
+        for second in range(int(elapsed) + 1):
+            bucket = [record for record in records if second <= record["t"] < second + 1]
+            done = [record["ttlf"] for record in bucket if "ttlf" in record and "error" not in record]
+            timeline.append({
+                "t": second,
+                "sent": len(bucket),
+                "completed": len(done),
+                "errors": sum("error" in record for record in bucket),
+                "ttlf_p95_ms": percentiles(done).get("p95_ms"),
+            })
+
+        attempted = len(records) + self.connect_errors
+        settings = {key: value for key, value in vars(self.args).items() if key != "json"}
+        return {
+            "settings": settings,
+            "elapsed_seconds": elapsed,
+            "sent": len(records),
+            "completed": len(completed),
+            "throughput_per_sec": len(completed) / elapsed,
+            "errors": errors,
+            "error_rate": sum(errors.values()) / attempted if attempted else 0.0,
+            "ttff": percentiles([record["ttff"] for record in completed]),
+            "ttlf": percentiles([record["ttlf"] for record in completed]),
+            "send_lag": percentiles([record["send_lag"] for record in records]),
+            "frames_per_answer": statistics.mean(record["frames"] for record in completed) if completed else 0,
+            "categories": categories,
+            "timeline": timeline,
+            "server": {"summary": sampler.summary(), "samples": sampler.samples} if sampler else None,
+        }
+
+
+def main(args):
+    mix = load_mix(args.questions) if args.questions else DEFAULT_MIX
+    report = asyncio.run(LoadTest(args, mix).run())
+
+    ttff, ttlf = report["ttff"], report["ttlf"]
+    print(f"{report['completed']}/{report['sent']} answered in {report['elapsed_seconds']:.1f}s "
+          f"({report['throughput_per_sec']:.1f}/s), error rate {100 * report['error_rate']:.1f}% {report['errors']}",
+          file=sys.stderr)
+    if ttlf:
+        print(f"  TTFF p50 {ttff.get('p50_ms', 0):.0f} ms, p95 {ttff.get('p95_ms', 0):.0f} ms, "
+              f"p99 {ttff.get('p99_ms', 0):.0f} ms", file=sys.stderr)
+        print(f"  TTLF p50 {ttlf['p50_ms']:.0f} ms, p95 {ttlf['p95_ms']:.0f} ms, p99 {ttlf['p99_ms']:.0f} ms",
+              file=sys.stderr)
+    if report["server"] and report["server"]["summary"]:
+        summary = report["server"]["summary"]
+        print(f"  server CPU mean {summary['cpu_percent']['mean']:.0f}% (max {summary['cpu_percent']['max']:.0f}%), "
+              f"RSS max {summary['rss_mb']['max']:.0f} MiB, fds max {summary['open_fds']['max']}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="ws://localhost:8000/ws", help="Websocket endpoint of the server.")
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent conversations.")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="Target questions per second over all clients (0: back to back).")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send questions for.")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many questions (0: no limit).")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause after each answer, in seconds.")
+    parser.add_argument("--ramp", type=float, default=0.0, help="Seconds over which the clients connect.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before an answer counts as timed out.")
+    parser.add_argument("--questions", help="Question mix file (default: built-in mix).")
+    parser.add_argument("--server-pid", type=int, help="Process to sample CPU and memory of (from /proc).")
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="Seconds between resource samples.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the question mix and arrivals.")
+    parser.add_argument("--json", help="Write the JSON report to this file instead of stdout.")
+    main(parser.parse_args())
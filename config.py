@@ -26,6 +26,110 @@ class Config:
         Google API key loaded from environment, used to authenticate Google-based models or services.
     PROMPT_FILE : str
         Absolute path to the prompt template text file for QA or chat operations.
+    FUSED_PROMPT_FILE : str
+        Absolute path to the prompt template of the fused routing + answering call.
+    MANIFEST_FILE : str
+        Absolute path to the ingestion manifest tracking content hashes and chunk IDs of ingested files.
+    VECTOR_BACKEND : str
+        Vectorstore backend: 'chroma' (HNSW) or 'flat' (exact search over a memory-mapped
+        NumPy matrix in PERSIST_DIR/flat_index, see FlatVectorStore). Env: VECTOR_BACKEND.
+    FLAT_QUANTIZATION : str
+        Flat backend storage scanned by searches: 'none' (float32) or 'int8' (4x smaller, with an
+        exact float32 re-rank of the candidates). Env: FLAT_QUANTIZATION.
+    FLAT_RERANK_FACTOR : int
+        Candidates re-ranked exactly per requested result with int8 quantization. Env: FLAT_RERANK_FACTOR.
+    BM25_INDEX_FILE : str
+        Absolute path to the SQLite database holding the BM25 keyword index over the vectorstore chunks.
+    INGEST_WORKERS : int
+        Number of worker processes used to parse PDFs in parallel (1 parses inline). Env: INGEST_WORKERS.
+    PDF_PAGES_PER_TASK : int
+        Page range size above which a single PDF is split across parse workers. Env: PDF_PAGES_PER_TASK.
+    INGEST_QUEUE_SIZE : int
+        Maximum number of batches buffered between two ingestion pipeline stages. Env: INGEST_QUEUE_SIZE.
+    EMBED_BATCH_SIZE : int
+        Number of chunks sent per embeddings request during ingestion. Env: EMBED_BATCH_SIZE.
+    EMBED_CONCURRENCY : int
+        Maximum number of embeddings requests in flight during ingestion. Env: EMBED_CONCURRENCY.
+    EMBED_MAX_RETRIES : int
+        Retries with exponential backoff for rate-limited (429) embeddings requests. Env: EMBED_MAX_RETRIES.
+    EMBEDDING_CACHE_FILE : str
+        Absolute path to the SQLite embedding cache; kept outside PERSIST_DIR so it survives rebuilds.
+    EMBEDDING_CACHE_DTYPE : str
+        Storage precision of cached embeddings, 'float32' or 'float16'. Env: EMBEDDING_CACHE_DTYPE.
+    QUERY_CACHE_SIZE : int
+        Maximum number of query embeddings kept in the in-process LRU cache. Env: QUERY_CACHE_SIZE.
+    QUERY_CACHE_TTL : float
+        Seconds a cached query embedding stays valid. Env: QUERY_CACHE_TTL.
+    MAX_CONCURRENT_QUERIES : int
+        Maximum number of graph executions in flight per server process. Env: MAX_CONCURRENT_QUERIES.
+    SPECULATION : str
+        Work started in parallel with the sentiment check and discarded on escalation:
+        'off', 'retrieve' (context retrieval) or 'answer' (retrieval and answer generation). Off by
+        default: speculative retrieval spends an embedding call on queries that end up escalated.
+        Env: SPECULATION.
+    SENTIMENT_BACKEND : str
+        Routing classifier: 'llm', 'local' (SentimentAnalyzer only) or 'hybrid' (local, with an
+        LLM fallback below SENTIMENT_CONFIDENCE_THRESHOLD). Defaults to 'hybrid': only explicit
+        transfer requests and confident classifications skip the LLM call. Env: SENTIMENT_BACKEND.
+    SENTIMENT_CONFIDENCE_THRESHOLD : float
+        Minimum local classifier confidence accepted without asking the LLM. Env: SENTIMENT_CONFIDENCE_THRESHOLD.
+    RESPONSE_CACHE : bool
+        Serve answers to identical questions over the same retrieved context from a persistent
+        cache, cleared on every ingestion. Off by default so deployments opt into serving stored
+        answers. Env: RESPONSE_CACHE.
+    RESPONSE_CACHE_FILE : str
+        Absolute path to the SQLite response cache; kept outside PERSIST_DIR like the embedding cache.
+    SEMANTIC_CACHE : bool
+        Answer paraphrases of recently answered questions from an in-memory semantic cache,
+        skipping retrieval and generation; cleared on every ingestion. Off by default: a hit
+        also skips sentiment routing, so a hostile paraphrase would get the cached answer
+        instead of an escalation. Env: SEMANTIC_CACHE.
+    SEMANTIC_CACHE_THRESHOLD : float
+        Minimum cosine similarity between two questions to reuse an answer. Env: SEMANTIC_CACHE_THRESHOLD.
+    SEMANTIC_CACHE_SIZE : int
+        Maximum number of answers in the semantic cache (LRU eviction). Env: SEMANTIC_CACHE_SIZE.
+    SEMANTIC_CACHE_TTL : float
+        Seconds a semantically cached answer stays valid. Env: SEMANTIC_CACHE_TTL.
+    FUSED_MODE : bool
+        Decide escalation and generate the answer in one structured LLM call instead of a
+        sentiment call followed by an answer call. Env: FUSED_MODE.
+    RETRIEVAL_MODE : str
+        'vector' (dense retrieval only), 'hybrid' (dense and BM25 rankings fused, keyword queries
+        answered by BM25 alone) or 'lexical' (BM25 only, no embedding call). Defaults to 'vector',
+        the retrieval deployments had before the BM25 index existed. Env: RETRIEVAL_MODE.
+    RETRIEVAL_K : int
+        Number of chunks retrieved as context for each question. Env: RETRIEVAL_K.
+    HYBRID_FETCH_K : int
+        Candidates taken from each ranking before fusion in hybrid mode. Env: HYBRID_FETCH_K.
+    RRF_K : int
+        Reciprocal rank fusion constant. Env: RRF_K.
+    LEXICAL_MAX_TERMS : int
+        Longest query (in words) answered by BM25 alone in hybrid mode, when it contains a code or no
+        stopwords; longer questions are always fused. Env: LEXICAL_MAX_TERMS.
+    AI_BACKEND : str
+        'google' (Gemini chat and embedding clients) or 'fake' (local FakeChatModel and
+        HashEmbeddings, for offline load tests). Env: AI_BACKEND.
+    FAKE_LLM_LATENCY : float
+        Seconds before the fake model's first token. Env: FAKE_LLM_LATENCY.
+    FAKE_LLM_TOKENS_PER_SEC : float
+        Output tokens per second of the fake model. Env: FAKE_LLM_TOKENS_PER_SEC.
+    FAKE_LLM_FAILURE_RATE : float
+        Share of fake model calls that raise an error. Env: FAKE_LLM_FAILURE_RATE.
+    FAKE_LLM_ANSWER_TOKENS : int
+        Maximum words in a fake answer. Env: FAKE_LLM_ANSWER_TOKENS.
+    FAKE_EMBEDDING_DIM : int
+        Dimension of the hash embeddings. Env: FAKE_EMBEDDING_DIM.
+    TRACING : str
+        Comma-separated span exporters for per-stage request tracing: 'ring' (in-process ring
+        buffer, served at /api/traces), 'log' (one JSON log line per span) and/or 'otlp'
+        (OpenTelemetry collector); 'off' disables tracing. Env: TRACING.
+    TRACE_BUFFER_SIZE : int
+        Number of spans kept by the ring buffer exporter. Env: TRACE_BUFFER_SIZE.
+    OTLP_ENDPOINT : str
+        OTLP/gRPC collector address of the 'otlp' exporter. Env: OTEL_EXPORTER_OTLP_ENDPOINT.
+    METRICS : bool
+        Serve Prometheus metrics at /metrics, including per-stage latency histograms fed by
+        the request trace spans. Env: METRICS.
 
     Usage:
     ------
@@ -46,3 +150,45 @@ class Config:
     EMBEDDING_MODEL = "models/embedding-001"
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     PROMPT_FILE = os.getcwd() + "/templates/qa_prompt.txt"
+    FUSED_PROMPT_FILE = os.getcwd() + "/templates/fused_qa_prompt.txt"
+    MANIFEST_FILE = PERSIST_DIR + "/ingestion_manifest.json"
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    FLAT_QUANTIZATION = os.getenv("FLAT_QUANTIZATION", "none")
+    FLAT_RERANK_FACTOR = int(os.getenv("FLAT_RERANK_FACTOR", 4))
+    BM25_INDEX_FILE = PERSIST_DIR + "/bm25_index.sqlite3"
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 50))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 8))
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 100))
+    EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", 4))
+    EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 5))
+    EMBEDDING_CACHE_FILE = os.getcwd() + "/.cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 1024))
+    QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 3600))
+    MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", 32))
+    SPECULATION = os.getenv("SPECULATION", "off")
+    SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "hybrid")
+    SENTIMENT_CONFIDENCE_THRESHOLD = float(os.getenv("SENTIMENT_CONFIDENCE_THRESHOLD", 0.8))
+    RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "false").lower() in ("1", "true", "yes")
+    RESPONSE_CACHE_FILE = os.getcwd() + "/.cache/responses.sqlite3"
+    SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 1000))
+    SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 3600))
+    FUSED_MODE = os.getenv("FUSED_MODE", "false").lower() in ("1", "true", "yes")
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector")
+    RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", 4))
+    HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", 20))
+    RRF_K = int(os.getenv("RRF_K", 60))
+    LEXICAL_MAX_TERMS = int(os.getenv("LEXICAL_MAX_TERMS", 3))
+    AI_BACKEND = os.getenv("AI_BACKEND", "google")
+    FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", 0.5))
+    FAKE_LLM_TOKENS_PER_SEC = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", 50))
+    FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", 0.0))
+    FAKE_LLM_ANSWER_TOKENS = int(os.getenv("FAKE_LLM_ANSWER_TOKENS", 60))
+    FAKE_EMBEDDING_DIM = int(os.getenv("FAKE_EMBEDDING_DIM", 768))
+    TRACING = os.getenv("TRACING", "off")
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", 10000))
+    OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4317")
+    METRICS = os.getenv("METRICS", "true").lower() in ("1", "true", "yes")
@@ -1,8 +1,31 @@
 import os
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from services.pdf_loader import PDFLoader
+from services.parallel_loader import ParallelPDFLoader
 from config import Config
 
+
+def build_splitter():
+    """
+    Builds the text splitter shared by every ingestion path, with the chunker config
+    string that goes into chunk IDs (see services.chunk_ids).
+
+    DocumentProcessor (create_db) and the ingestion pipeline (ingest_directory) both use
+    it, so a file chunked by either path gets the same chunks and chunk IDs. Start offsets
+    are recorded so every chunk has a stable position for its ID.
+
+    Returns:
+    --------
+    tuple (RecursiveCharacterTextSplitter, str)
+        The splitter, sized by Config.CHUNK_SIZE and Config.CHUNK_OVERLAP, and its config string.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=Config.CHUNK_SIZE,
+        chunk_overlap=Config.CHUNK_OVERLAP,
+        add_start_index=True
+    )
+    return splitter, f"{type(splitter).__name__}:{Config.CHUNK_SIZE}:{Config.CHUNK_OVERLAP}"
+
+
 class DocumentProcessor:
     """
     DocumentProcessor is responsible for processing PDF documents in a directory,
@@ -11,13 +34,17 @@ class DocumentProcessor:
     Responsibilities:
     -----------------
     - Configure a text splitter for document chunking.
-    - Load and split all PDF documents in a given directory.
+    - Load and split all PDF documents in a given directory, parsing them in parallel.
     - Aggregate all resulting document chunks for use in vectorization or search.
 
     Attributes:
     -----------
     splitter : RecursiveCharacterTextSplitter
         Configured text splitter for segmenting documents into manageable pieces.
+    chunker_config : str
+        Description of the splitter settings, part of every chunk ID.
+    pdf_loader : ParallelPDFLoader
+        Process-pool PDF parser sized by Config.INGEST_WORKERS.
 
     Methods:
     --------
@@ -27,20 +54,20 @@ class DocumentProcessor:
 
     def __init__(self):
         """
-        Initialize DocumentProcessor by setting up the text splitter
-        using chunk size and overlap values from the configuration.
+        Initialize DocumentProcessor by setting up the shared text splitter
+        (see build_splitter), and the parallel PDF loader using the configured
+        worker count.
         """
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP
-        )
+        self.splitter, self.chunker_config = build_splitter()
+        self.pdf_loader = ParallelPDFLoader(Config.INGEST_WORKERS, Config.PDF_PAGES_PER_TASK)
 
     def process_directory(self, directory_path):
         """
         Process all PDF files found in the provided directory path.
 
-        For each PDF, loads the document, splits it into text chunks,
-        and adds these chunks to the output list.
+        PDFs are parsed across a process pool; each file's pages are split into
+        text chunks as soon as they come back, in directory listing order.
+        A file that fails to parse is logged and skipped.
 
         Parameters:
         -----------
@@ -52,11 +79,15 @@ class DocumentProcessor:
         list
             A list of document chunks obtained from all PDFs in the directory.
         """
+        file_paths = [
+            os.path.join(directory_path, filename)
+            for filename in os.listdir(directory_path)
+            if filename.endswith(".pdf")
+        ]
         all_docs = []
-        for filename in os.listdir(directory_path):
-            if filename.endswith(".pdf"):
-                file_path = os.path.join(directory_path, filename)
-                loader = PDFLoader(file_path)
-                docs = loader.load_and_split(self.splitter)
-                all_docs.extend(docs)
+        for file_path, docs, error in self.pdf_loader.lazy_load(file_paths):
+            if error is not None:
+                print(f"Failed to load {file_path}: {error}")
+                continue
+            all_docs.extend(self.splitter.split_documents(docs))
         return all_docs
@@ -0,0 +1,302 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from services.chunk_ids import assign_chunk_ids
+from services.metrics import INGESTED_CHUNKS, INGESTED_FILES, INGESTION_SECONDS
+from services.vector_backends import upsert_embeddings
+
+# One unit of parsed input: the pages of one file, or one page range of a large PDF.
+# 'last' marks the final batch of a file; 'error' reports a file that failed to parse.
+DocumentBatch = namedtuple("DocumentBatch", ["filename", "docs", "last", "error"], defaults=(True, None))
+
+# A DocumentBatch after splitting (and, once embedded, with its vectors attached).
+# 'fingerprint' is the source file fingerprint the chunk IDs were derived from.
+ChunkBatch = namedtuple("ChunkBatch", ["filename", "chunks", "ids", "vectors", "last", "error", "fingerprint"],
+                        defaults=(None,))
+
+# Sentinel passed down the queues once a stage has no more input
+_DONE = object()
+
+
+class IngestionPipeline:
+    """
+    IngestionPipeline streams parsed documents into the vectorstore through four
+    concurrent stages connected by bounded queues:
+
+        parse -> split -> embed -> write
+
+    Each stage runs in its own thread and hands batches to the next stage as soon as they
+    are ready, so the first files become queryable while later ones are still parsing.
+    Because every queue is bounded, at most a few batches are held in memory at a time,
+    regardless of the size of the corpus.
+
+    The embed stage coalesces small batches and sends them to the embeddings API in
+    fixed-size, concurrent requests (see BatchEmbedder).
+
+    The write stage is the only stage touching the vectorstore, the keyword index and the
+    ingestion manifest: a file is recorded in the manifest only after its last batch has been
+    written, and chunks of a previous version of the file are deleted at that point.
+
+    Attributes:
+    -----------
+    vectorstore : VectorStore
+        Destination vectorstore (Chroma or FlatVectorStore).
+    embedder : BatchEmbedder
+        Batched, concurrent embedder used by the embed stage.
+    manifest : IngestionManifest
+        Manifest updated as files complete.
+    lexical_index : BM25Index or None
+        Keyword index kept in sync with the vectorstore (saved by the caller).
+    splitter : TextSplitter
+        Splitter used by the split stage (must set 'start_index' metadata).
+    chunker_config : str
+        Description of the splitter settings, part of every chunk ID.
+    data_dir : str
+        Directory the batch file names are relative to.
+    queue_size : int
+        Maximum number of batches waiting between two stages.
+    stats : dict
+        Counters for the last run: files, failed, chunks, seconds (also exported as the
+        ragchat_ingest* Prometheus metrics, live while the run progresses).
+
+    Methods:
+    --------
+    run(batches)
+        Runs the pipeline over an iterable of DocumentBatch and returns the run stats.
+    """
+
+    def __init__(self, vectorstore, embedder, manifest, splitter, chunker_config, data_dir, queue_size=8,
+                 lexical_index=None):
+        self.vectorstore = vectorstore
+        self.embedder = embedder
+        self.manifest = manifest
+        self.lexical_index = lexical_index
+        self.splitter = splitter
+        self.chunker_config = chunker_config
+        self.data_dir = data_dir
+        self.queue_size = max(1, queue_size)
+        self.stats = {}
+        self._written = {}
+        self._fingerprints = {}
+        self._error = None
+        self._failed = threading.Event()
+
+    def run(self, batches):
+        """
+        Runs every stage concurrently until the input is exhausted.
+
+        Parameters:
+        -----------
+        batches : iterable of DocumentBatch
+            Parsed input, typically a generator so parsing itself is streamed.
+
+        Returns:
+        --------
+        dict
+            Run statistics (files, failed, chunks, seconds).
+
+        Raises:
+        -------
+        Exception
+            The first exception raised by any stage, after all stages have stopped.
+        """
+        self.stats = {"files": 0, "failed": 0, "chunks": 0, "seconds": 0.0}
+        self._written = {}
+        self._fingerprints = {}
+        self._error = None
+        self._failed.clear()
+        started = time.perf_counter()
+
+        parsed = queue.Queue(self.queue_size)
+        split = queue.Queue(self.queue_size)
+        embedded = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(target=self._produce, args=(batches, parsed), name="ingest-parse"),
+            threading.Thread(target=self._consume, args=(self._split, parsed, split), name="ingest-split"),
+            threading.Thread(target=self._embed_loop, args=(split, embedded), name="ingest-embed"),
+            threading.Thread(target=self._consume, args=(self._write, embedded, None), name="ingest-write"),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.stats["seconds"] = time.perf_counter() - started
+        INGESTION_SECONDS.observe(self.stats["seconds"])
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def _fail(self, error):
+        """
+        Records the first stage failure and tells every stage to stop doing work.
+        """
+        if self._error is None:
+            self._error = error
+        self._failed.set()
+
+    def _produce(self, batches, outbox):
+        """
+        Parse stage: pulls batches from the (lazy) input and feeds the split stage.
+        """
+        try:
+            for batch in batches:
+                if self._failed.is_set():
+                    break
+                outbox.put(batch)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            outbox.put(_DONE)
+
+    def _consume(self, handler, inbox, outbox):
+        """
+        Generic stage loop: applies handler to every batch until the sentinel arrives.
+
+        After a failure the stage keeps draining its inbox without doing work, so upstream
+        stages blocked on a full queue can always finish.
+        """
+        while True:
+            batch = inbox.get()
+            if batch is _DONE:
+                break
+            if self._failed.is_set():
+                continue
+            try:
+                result = handler(batch)
+                if outbox is not None and result is not None:
+                    outbox.put(result)
+            except Exception as e:
+                self._fail(e)
+        if outbox is not None:
+            outbox.put(_DONE)
+
+    def _split(self, batch):
+        """
+        Split stage: chunks one batch and assigns deterministic chunk IDs.
+
+        A file is fingerprinted once, at its first batch; every batch of the file carries
+        that fingerprint, and the write stage records it in the manifest as is, so the
+        recorded hash is the one the chunk IDs were derived from.
+        """
+        if batch.error is not None:
+            self._fingerprints.pop(batch.filename, None)
+            return ChunkBatch(batch.filename, [], [], None, True, batch.error)
+        fingerprint = self._fingerprints.get(batch.filename)
+        if fingerprint is None:
+            fingerprint = self.manifest.fingerprint(os.path.join(self.data_dir, batch.filename))
+            self._fingerprints[batch.filename] = fingerprint
+        if batch.last:
+            del self._fingerprints[batch.filename]
+        chunks = self.splitter.split_documents(batch.docs)
+        chunks, ids = assign_chunk_ids(chunks, fingerprint["sha256"], self.chunker_config)
+        return ChunkBatch(batch.filename, chunks, ids, None, batch.last, None, fingerprint)
+
+    def _embed_loop(self, inbox, outbox):
+        """
+        Embed stage: coalesces chunk batches across files and embeds them together.
+
+        Batches are accumulated until they fill every concurrent embedding request
+        (embedder.window_size texts), the input runs dry for the moment, or the input
+        ends. Small files therefore share requests instead of paying one round trip each,
+        and large files are spread over concurrent requests.
+        """
+        pending, pending_chunks = [], 0
+        while True:
+            batch = inbox.get()
+            done = batch is _DONE
+            if self._failed.is_set():
+                pending, pending_chunks = [], 0
+            elif not done:
+                pending.append(batch)
+                pending_chunks += len(batch.chunks)
+            if pending and (done or inbox.empty() or pending_chunks >= self.embedder.window_size):
+                try:
+                    for embedded in self._embed(pending):
+                        outbox.put(embedded)
+                except Exception as e:
+                    self._fail(e)
+                pending, pending_chunks = [], 0
+            if done:
+                break
+        outbox.put(_DONE)
+
+    def _embed(self, batches):
+        """
+        Embeds the chunks of several batches in one BatchEmbedder call and returns the
+        batches, in order, with their vectors attached.
+        """
+        texts = [chunk.page_content for batch in batches if batch.error is None for chunk in batch.chunks]
+        vectors = iter(self.embedder.embed(texts))
+        embedded = []
+        for batch in batches:
+            if batch.error is not None:
+                embedded.append(batch)
+                continue
+            embedded.append(batch._replace(vectors=[next(vectors) for _ in batch.chunks]))
+        return embedded
+
+    def _delete(self, ids):
+        """
+        Deletes chunks from the vectorstore and the keyword index.
+        """
+        self.vectorstore.delete(ids=ids)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+
+    def _write(self, batch):
+        """
+        Write stage: upserts embedded chunks and finalizes files in the manifest.
+
+        A file that failed part-way has the chunks written for its new version removed,
+        leaving the previous version (if any) untouched so the next run retries it.
+        """
+        written = self._written.setdefault(batch.filename, [])
+        previous_ids = set(self.manifest.get_chunk_ids(batch.filename))
+
+        if batch.error is not None:
+            orphan_ids = [chunk_id for chunk_id in written if chunk_id not in previous_ids]
+            if orphan_ids:
+                self._delete(orphan_ids)
+            del self._written[batch.filename]
+            self.stats["failed"] += 1
+            INGESTED_FILES.labels("failed").inc()
+            print(f"Failed to load {batch.filename}: {batch.error}")
+            return
+
+        if batch.chunks:
+            # Upsert by ID so re-ingesting identical content overwrites in place
+            upsert_embeddings(
+                self.vectorstore,
+                batch.ids,
+                batch.vectors,
+                [chunk.page_content for chunk in batch.chunks],
+                [chunk.metadata for chunk in batch.chunks]
+            )
+            if self.lexical_index is not None:
+                self.lexical_index.add(
+                    batch.ids,
+                    [chunk.page_content for chunk in batch.chunks],
+                    [chunk.metadata for chunk in batch.chunks]
+                )
+            written.extend(batch.ids)
+            self.stats["chunks"] += len(batch.ids)
+            INGESTED_CHUNKS.inc(len(batch.ids))
+
+        if batch.last:
+            # A modified file replaces its previous chunks instead of adding duplicates
+            stale_ids = sorted(previous_ids - set(written))
+            if stale_ids:
+                self._delete(stale_ids)
+            # Saved per file so an interrupted ingestion resumes where it stopped
+            self.manifest.record(batch.filename, os.path.join(self.data_dir, batch.filename), written,
+                                 batch.fingerprint)
+            self.manifest.save()
+            del self._written[batch.filename]
+            self.stats["files"] += 1
+            INGESTED_FILES.labels("ok").inc()
+            print(f"Added {len(written)} chunks from {batch.filename} to the vectorstore"
+                  + (f" (removed {len(stale_ids)} stale)." if stale_ids else "."))
@@ -1,16 +1,51 @@
+import asyncio
+import threading
+from functools import partial
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Annotated, Sequence
-# from services.sentiment import SentimentAnalyzer  # Assume you have this
+from typing import TypedDict, Annotated, Sequence, AsyncIterator
+from services.sentiment import SentimentAnalyzer
+from services.semantic_cache import SemanticCache
+from controllers.vector_db_manager import VectorDBManager
 from controllers.qa_handler import QAHandler  # Your existing QA handler
 from services.google_ai import GoogleAI
+from services.tracing import span, traced
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from config import Config
+
+# Custom event dispatched once a speculative run is known to route to an answer
+ROUTE_EVENT = "route_decided"
+
+# Sentiment classification prompt, built once at import
+SENTIMENT_PROMPT = ChatPromptTemplate.from_template(
+    """
+        You are a customer support chatbot. Analyze the sentiment of the following customer query. 
+        Ignore any previous chat history. Focus solely on the current query.
+        Consider the context of customer support interactions when determining the sentiment.
+
+        Respond with one of the following exactly: 'positive', or 'negative'.
+
+        Here are some guidelines:
+
+        - 'positive': The customer expresses satisfaction, appreciation, or positive feelings. The customer's query is informational, factual, or lacks strong emotional expression, and the chatbot can potentially provide a resolution.
+          If the customer uses inappropriate language, but the query can still be answered by the bot, respond with neutral.
+        - 'negative': The customer explicitly requests to speak to a human, or the customer's query indicates that the chatbot is unable to provide a satisfactory answer and requires human intervention.
+
+        Query: {query}
+        """
+)
 
 class BotState(TypedDict):
     user_input: str
     sentiment: Annotated[str, "negative|positive"]
     qa_answer: str
+    context_docs: list
     needs_human: bool
     response: str
+    # VectorDBManager.generation when the request started; answers are not cached if it changed
+    generation: int
 
 class CustomerSupportBot:
     """
@@ -23,6 +58,8 @@ class CustomerSupportBot:
     - Route customer queries to either automated answering or human escalation based on sentiment.
     - Retrieve answers using the QA handler and knowledge base.
     - Generate final responses for delivery to the end user.
+    - Time every workflow node, the sentiment check and semantic cache lookups as trace
+      spans ('graph.<node>', 'sentiment', 'semantic_cache.lookup'; see services.tracing).
 
     Attributes:
     -----------
@@ -30,38 +67,83 @@ class CustomerSupportBot:
         Language model for both sentiment analysis and response generation.
     qa_handler : QAHandler
         Component to handle QA retrieval operations.
+    sentiment_chain : Runnable
+        Prebuilt sentiment classification chain (SENTIMENT_PROMPT piped into the LLM).
     workflow : StateGraph
         LangGraph state-driven workflow definition.
-    retriever : Optional[BaseRetriever]
-        Current retriever instance for sourcing answers.
+    speculation : str
+        Work started in parallel with the sentiment check ('off', 'retrieve' or 'answer').
+    sentiment_backend : str
+        Routing classifier: 'llm', 'local' or 'hybrid' (local with LLM fallback).
+    fused_mode : bool
+        Whether routing and answering share one structured LLM call.
+    semantic_cache : SemanticCache or None
+        Answers of recent questions, reused for paraphrases before the graph runs
+        (Config.SEMANTIC_CACHE); cleared whenever VectorDBManager invalidates the index.
+    local_sentiment : SentimentAnalyzer
+        Local, network-free routing classifier.
 
     Methods:
     --------
     sentiment_analyzer(text: str) -> str
-        Analyzes customer input for sentiment ('positive' or 'negative') using the LLM.
+        Analyzes customer input for sentiment ('positive' or 'negative') using the local
+        classifier and/or the LLM, depending on the sentiment backend.
+    asentiment_analyzer(text: str) -> str
+        Async counterpart of sentiment_analyzer.
     analyze_sentiment(state: BotState) -> dict
-        Workflow node to perform sentiment analysis and return result.
+        Workflow node to perform sentiment analysis and return result; with speculation
+        enabled, retrieval (and optionally generation) runs concurrently with it, and in
+        fused mode the routing decision and the answer come from a single LLM call.
+    aanalyze_sentiment(state: BotState) -> dict
+        Async counterpart of analyze_sentiment, used when the graph runs via ainvoke.
     decide_routing(state: BotState) -> str
         Directs workflow path based on sentiment output ('escalate' or 'answer').
     retrieve_answer(state: BotState) -> dict
         Uses QAHandler to get answer from knowledge base and return it in state.
+    aretrieve_answer(state: BotState) -> dict
+        Async counterpart of retrieve_answer.
     escalate_to_human(state: BotState) -> dict
         Marks that human escalation is needed.
     generate_response(state: BotState) -> dict
         Finalizes the bot response, returning either human escalation message or retrieved answer.
     handle_query(user_input: str, retriever) -> str
         Orchestrates the end-to-end workflow execution given user input and retriever.
+    ahandle_query(user_input: str, retriever) -> str
+        Async counterpart of handle_query; LLM and retrieval calls never block the event loop.
+    astream_response(user_input: str, retriever) -> AsyncIterator[str]
+        Runs the workflow and yields the answer incrementally as the LLM generates it.
     """
 
-    def __init__(self):
-        self.llm = GoogleAI().get_llm()
-        self.qa_handler = QAHandler()
+    def __init__(self, llm=None):
+        self.llm = llm or GoogleAI().get_llm()
+        self.qa_handler = QAHandler(llm=self.llm)
+        # Built once and shared by every request; the per-request inputs are passed at invoke time
+        self.sentiment_chain = SENTIMENT_PROMPT | self.llm
         self.workflow = StateGraph(BotState)
-        self.retriever = None
+        self.speculation = Config.SPECULATION
+        self.sentiment_backend = Config.SENTIMENT_BACKEND
+        self.fused_mode = Config.FUSED_MODE
+        self.semantic_cache = None
+        if Config.SEMANTIC_CACHE:
+            self.semantic_cache = SemanticCache(
+                VectorDBManager.get_query_embeddings(),
+                threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+                maxsize=Config.SEMANTIC_CACHE_SIZE,
+                ttl=Config.SEMANTIC_CACHE_TTL
+            )
+            VectorDBManager.add_invalidation_listener(self.semantic_cache.clear)
+        self.local_sentiment = SentimentAnalyzer()
+        self._speculation_pool = ContextThreadPoolExecutor()
         
-        # Define workflow nodes
-        self.workflow.add_node("analyze_sentiment", self.analyze_sentiment)
-        self.workflow.add_node("retrieve_answer", self.retrieve_answer)
+        # Define workflow nodes; I/O-bound nodes carry an async variant used by ainvoke
+        self.workflow.add_node(
+            "analyze_sentiment",
+            RunnableLambda(self.analyze_sentiment, afunc=self.aanalyze_sentiment)
+        )
+        self.workflow.add_node(
+            "retrieve_answer",
+            RunnableLambda(self.retrieve_answer, afunc=self.aretrieve_answer)
+        )
         self.workflow.add_node("escalate_to_human", self.escalate_to_human)
         self.workflow.add_node("generate_response", self.generate_response)
 
@@ -84,10 +166,76 @@ class CustomerSupportBot:
         # Compile workflow graph for runtime execution
         self.app = self.workflow.compile()
     
+    @staticmethod
+    def _run_config(retriever) -> RunnableConfig:
+        """
+        Builds the per-request graph config.
+
+        The retriever travels with the run instead of being stored on the bot, so one
+        instance can serve any number of requests concurrently from threads or tasks.
+        """
+        return {"configurable": {"retriever": retriever}}
+
+    @staticmethod
+    def _initial_state(user_input: str) -> dict:
+        """
+        Builds the graph input of a request, recording the index generation it starts at
+        so answers are not cached if ingestion changes the index meanwhile.
+        """
+        return {"user_input": user_input, "generation": VectorDBManager.generation}
+
+    @staticmethod
+    def _still_current(state: dict):
+        """
+        Returns the check passed to cache stores: whether the index is still at the
+        generation the request started at, so an answer computed across an invalidation
+        is not cached after the invalidation cleared the caches.
+        """
+        return partial(VectorDBManager.unchanged_since, state["generation"])
+
+    @staticmethod
+    def _retriever(config: RunnableConfig):
+        """
+        Returns the retriever of the request a node runs for.
+        """
+        return config["configurable"]["retriever"]
+
+    @staticmethod
+    def _response_text(response):
+        """
+        Returns the answer text of a graph response (a QA result dict or a plain string).
+        """
+        if isinstance(response, dict) and "result" in response:
+            return response["result"]
+        return response
+
+    def _uses_semantic_cache(self, user_input: str) -> bool:
+        """
+        Whether the semantic cache applies to a query; explicit requests for a human
+        always go through the graph so they are escalated.
+        """
+        return self.semantic_cache is not None and not self.local_sentiment.requests_human(user_input)
+
+    def _local_sentiment(self, text: str):
+        """
+        Returns the local classifier's label when the backend accepts it, else None
+        (meaning the LLM has to decide).
+        """
+        if self.sentiment_backend == "llm":
+            return None
+        label, confidence = self.local_sentiment.classify(text)
+        if self.sentiment_backend == "local" or confidence >= Config.SENTIMENT_CONFIDENCE_THRESHOLD:
+            return label
+        return None
+
     def sentiment_analyzer(self, text: str) -> str:
         """
-        Analyze sentiment of the customer input using the large language model
-        and a prompt template for classification.
+        Analyze sentiment of the customer input.
+
+        With the 'local' or 'hybrid' backend the local SentimentAnalyzer decides in
+        microseconds; the large language model and a prompt template for classification
+        are used with the 'llm' backend, or in 'hybrid' mode when the local classifier
+        is not confident enough.
 
         Parameters:
         -----------
@@ -97,31 +245,41 @@ class CustomerSupportBot:
         Returns:
         --------
         str
-            Either 'positive' or 'negative' as determined by the LLM.
+            Either 'positive' or 'negative'.
         """
-        prompt = ChatPromptTemplate.from_template(
-            """
-        You are a customer support chatbot. Analyze the sentiment of the following customer query. 
-        Ignore any previous chat history. Focus solely on the current query.
-        Consider the context of customer support interactions when determining the sentiment.
-
-        Respond with one of the following exactly: 'positive', or 'negative'.
+        with span("sentiment") as current:
+            sentiment = self._local_sentiment(text)
+            current.set_attribute("classifier", "local" if sentiment is not None else "llm")
+            if sentiment is None:
+                sentiment = self.sentiment_chain.invoke({"query": text}).content
+            current.set_attribute("sentiment", sentiment)
+        # print(f"Sentiment analyzed: {sentiment}")
+        return sentiment
 
-        Here are some guidelines:
+    async def asentiment_analyzer(self, text: str) -> str:
+        """
+        Asynchronously analyze sentiment of the customer input (see sentiment_analyzer).
 
-        - 'positive': The customer expresses satisfaction, appreciation, or positive feelings. The customer's query is informational, factual, or lacks strong emotional expression, and the chatbot can potentially provide a resolution.
-          If the customer uses inappropriate language, but the query can still be answered by the bot, respond with neutral.
-        - 'negative': The customer explicitly requests to speak to a human, or the customer's query indicates that the chatbot is unable to provide a satisfactory answer and requires human intervention.
+        Parameters:
+        -----------
+        text : str
+            Customer query input.
 
-        Query: {query}
+        Returns:
+        --------
+        str
+            Either 'positive' or 'negative'.
         """
-        )
-        chain = prompt | self.llm
-        sentiment = chain.invoke({"query": text}).content
-        # print(f"Sentiment analyzed: {sentiment}")
+        with span("sentiment") as current:
+            sentiment = self._local_sentiment(text)
+            current.set_attribute("classifier", "local" if sentiment is not None else "llm")
+            if sentiment is None:
+                sentiment = (await self.sentiment_chain.ainvoke({"query": text})).content
+            current.set_attribute("sentiment", sentiment)
         return sentiment
 
-    def analyze_sentiment(self, state: BotState) -> dict:
+    @traced("graph.analyze_sentiment")
+    def analyze_sentiment(self, state: BotState, config: RunnableConfig) -> dict:
         """
         Workflow node for analyzing sentiment of the user's input.
 
@@ -129,15 +287,150 @@ class CustomerSupportBot:
         -----------
         state : BotState
             Current workflow state with 'user_input' field.
+        config : RunnableConfig
+            Per-request run config carrying the retriever (see _run_config).
 
         Returns:
         --------
         dict
             Dictionary with the sentiment result.
         """
+        if self.fused_mode:
+            return self._analyze_fused(state["user_input"], self._retriever(config), state.get("generation"))
+        if self.speculation != "off":
+            return self._analyze_speculatively(state["user_input"], self._retriever(config), state.get("generation"))
         sentiment = self.sentiment_analyzer(state["user_input"])
         return {"sentiment": sentiment}
 
+    @traced("graph.analyze_sentiment")
+    async def aanalyze_sentiment(self, state: BotState, config: RunnableConfig) -> dict:
+        """
+        Async workflow node for analyzing sentiment of the user's input.
+
+        Parameters:
+        -----------
+        state : BotState
+            Current workflow state with 'user_input' field.
+        config : RunnableConfig
+            Per-request run config carrying the retriever (see _run_config).
+
+        Returns:
+        --------
+        dict
+            Dictionary with the sentiment result.
+        """
+        if self.fused_mode:
+            return await self._aanalyze_fused(state["user_input"], self._retriever(config), state.get("generation"))
+        if self.speculation != "off":
+            return await self._aanalyze_speculatively(
+                state["user_input"], self._retriever(config), state.get("generation")
+            )
+        sentiment = await self.asentiment_analyzer(state["user_input"])
+        return {"sentiment": sentiment}
+
+    def _analyze_fused(self, user_input: str, retriever, generation: int = None) -> dict:
+        """
+        Fused mode: one structured LLM call returns both the escalation flag and the answer.
+
+        The flag is mapped onto the 'sentiment' field, so decide_routing behaves as usual,
+        and the answer is left in 'qa_answer' for retrieve_answer to pass through. When the
+        local classifier is already confident, its label is used and the query follows the
+        regular (single-call, streamed) answer path. If the structured reply cannot be
+        parsed, the query falls back to a separate sentiment call and is then answered from
+        the documents already retrieved.
+        """
+        sentiment = self._local_sentiment(user_input)
+        if sentiment is not None:
+            return {"sentiment": sentiment}
+        docs = self.qa_handler.retrieve(user_input, retriever)
+        routed = self.qa_handler.route_and_answer(user_input, docs, generation=generation)
+        if routed is None:
+            return {"sentiment": self.sentiment_analyzer(user_input), "context_docs": docs}
+        needs_human, answer = routed
+        return {"sentiment": "negative" if needs_human else "positive", "context_docs": docs, "qa_answer": answer}
+
+    async def _aanalyze_fused(self, user_input: str, retriever, generation: int = None) -> dict:
+        """
+        Async counterpart of _analyze_fused.
+        """
+        sentiment = self._local_sentiment(user_input)
+        if sentiment is not None:
+            return {"sentiment": sentiment}
+        docs = await self.qa_handler.aretrieve(user_input, retriever)
+        routed = await self.qa_handler.aroute_and_answer(user_input, docs, generation=generation)
+        if routed is None:
+            return {"sentiment": await self.asentiment_analyzer(user_input), "context_docs": docs}
+        needs_human, answer = routed
+        return {"sentiment": "negative" if needs_human else "positive", "context_docs": docs, "qa_answer": answer}
+
+    @traced("graph.speculation")
+    def _speculate(self, user_input: str, retriever, discarded: threading.Event = None, generation: int = None) -> dict:
+        """
+        Speculative work for a query: retrieval and, in 'answer' mode, answer generation.
+
+        Once discarded is set (the query was escalated), no generation is started and an
+        answer generated meanwhile is not added to the response cache.
+        """
+        docs = self.qa_handler.retrieve(user_input, retriever)
+        if self.speculation != "answer" or (discarded is not None and discarded.is_set()):
+            return {"context_docs": docs}
+        answer = self.qa_handler.answer_from_documents(user_input, docs, discarded=discarded, generation=generation)
+        return {"context_docs": docs, "qa_answer": answer}
+
+    @traced("graph.speculation")
+    async def _aspeculate(self, user_input: str, retriever, generation: int = None) -> dict:
+        """
+        Async counterpart of _speculate.
+        """
+        docs = await self.qa_handler.aretrieve(user_input, retriever)
+        if self.speculation != "answer":
+            return {"context_docs": docs}
+        answer = await self.qa_handler.aanswer_from_documents(user_input, docs, generation=generation)
+        return {"context_docs": docs, "qa_answer": answer}
+
+    def _analyze_speculatively(self, user_input: str, retriever, generation: int = None) -> dict:
+        """
+        Runs the sentiment check while the speculative work runs on a worker thread.
+
+        On escalation the speculative result is discarded: a running thread cannot be
+        interrupted, so it is told to stop before generating an answer and not to cache
+        one already in progress, and nothing waits for it.
+        """
+        discarded = threading.Event()
+        future = self._speculation_pool.submit(self._speculate, user_input, retriever, discarded, generation)
+        try:
+            sentiment = self.sentiment_analyzer(user_input)
+        except BaseException:
+            discarded.set()
+            future.cancel()
+            raise
+        if sentiment == "negative":
+            discarded.set()
+            future.cancel()
+            return {"sentiment": sentiment}
+        return {"sentiment": sentiment, **future.result()}
+
+    async def _aanalyze_speculatively(self, user_input: str, retriever, generation: int = None) -> dict:
+        """
+        Runs the sentiment check concurrently with the speculative work.
+
+        On escalation the speculative task is cancelled, so no retrieval or generation
+        continues for a conversation handed over to a human. Otherwise ROUTE_EVENT is
+        dispatched as soon as the route is known, so streaming consumers can forward the
+        answer tokens that are still being generated.
+        """
+        task = asyncio.ensure_future(self._aspeculate(user_input, retriever, generation))
+        try:
+            sentiment = await self.asentiment_analyzer(user_input)
+        except BaseException:
+            task.cancel()
+            raise
+        if sentiment == "negative":
+            task.cancel()
+            return {"sentiment": sentiment}
+        await adispatch_custom_event(ROUTE_EVENT, {"sentiment": sentiment})
+        return {"sentiment": sentiment, **(await task)}
+
     def decide_routing(self, state: BotState) -> str:
         """
         Decide workflow routing based on sentiment.
@@ -158,22 +451,64 @@ class CustomerSupportBot:
             return "escalate"
         return "answer"
 
-    def retrieve_answer(self, state: BotState) -> dict:
+    @traced("graph.retrieve_answer")
+    def retrieve_answer(self, state: BotState, config: RunnableConfig) -> dict:
         """
         Workflow node to retrieve an answer from the knowledge base.
 
+        Work already done speculatively (see analyze_sentiment) is reused: a generated
+        answer is passed through, and retrieved context documents skip the retrieval step.
+
+        Parameters:
+        -----------
+        state : BotState
+        config : RunnableConfig
+            Per-request run config carrying the retriever (see _run_config).
+
+        Returns:
+        --------
+        dict
+            Dictionary with the answer as 'qa_answer'.
+        """
+        if state.get("qa_answer") is not None:
+            return {"qa_answer": state["qa_answer"]}
+        if state.get("context_docs") is not None:
+            answer = self.qa_handler.answer_from_documents(
+                state["user_input"], state["context_docs"], generation=state.get("generation")
+            )
+        else:
+            answer = self.qa_handler.get_answer(state["user_input"], self._retriever(config), state.get("generation"))
+        return {"qa_answer": answer}
+
+    @traced("graph.retrieve_answer")
+    async def aretrieve_answer(self, state: BotState, config: RunnableConfig) -> dict:
+        """
+        Async workflow node to retrieve an answer from the knowledge base.
+
         Parameters:
         -----------
         state : BotState
+        config : RunnableConfig
+            Per-request run config carrying the retriever (see _run_config).
 
         Returns:
         --------
         dict
             Dictionary with the answer as 'qa_answer'.
         """
-        answer = self.qa_handler.get_answer(state["user_input"], self.retriever)
+        if state.get("qa_answer") is not None:
+            return {"qa_answer": state["qa_answer"]}
+        if state.get("context_docs") is not None:
+            answer = await self.qa_handler.aanswer_from_documents(
+                state["user_input"], state["context_docs"], generation=state.get("generation")
+            )
+        else:
+            answer = await self.qa_handler.aget_answer(
+                state["user_input"], self._retriever(config), state.get("generation")
+            )
         return {"qa_answer": answer}
 
+    @traced("graph.escalate_to_human")
     def escalate_to_human(self, state: BotState) -> dict:
         """
         Workflow node for escalation; marks the need for human intervention.
@@ -189,6 +524,7 @@ class CustomerSupportBot:
         """
         return {"needs_human": True}
 
+    @traced("graph.generate_response")
     def generate_response(self, state: BotState) -> dict:
         """
         Generate the final response based on whether escalation occurred.
@@ -212,6 +548,44 @@ class CustomerSupportBot:
         """
         Run the entire customer support workflow given the user's input and a retriever instance.
 
+        Paraphrases of recently answered questions are served from the semantic cache
+        without running the workflow; new answers (not escalations) are added to it, unless
+        ingestion changed the index while the request ran.
+
+        Parameters:
+        -----------
+        user_input : str
+            The user's question or issue.
+        retriever : BaseRetriever
+            Retriever instance for document/question answering.
+
+        Returns:
+        --------
+        str
+            The chatbot's final response text, whether served from the cache or generated.
+        """
+        state = self._initial_state(user_input)
+        use_cache = self._uses_semantic_cache(user_input)
+        if use_cache:
+            with span("semantic_cache.lookup") as current:
+                cached = self.semantic_cache.get(user_input)
+                current.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                return cached
+        results = self.app.invoke(state, config=self._run_config(retriever))
+        response = self._response_text(results["response"])
+        if use_cache and not results.get("needs_human"):
+            self.semantic_cache.put(user_input, response, valid=self._still_current(state))
+        return response
+
+    async def ahandle_query(self, user_input: str, retriever) -> str:
+        """
+        Asynchronously run the customer support workflow given the user's input and a retriever.
+
+        The graph runs via ainvoke, so sentiment analysis, retrieval and answer generation
+        await their LLM/retriever calls instead of blocking the event loop, and concurrent
+        conversations overlap.
+
         Parameters:
         -----------
         user_input : str
@@ -222,8 +596,84 @@ class CustomerSupportBot:
         Returns:
         --------
         str
-            The chatbot's final response to the user.
+            The chatbot's final response text, whether served from the cache or generated.
+        """
+        state = self._initial_state(user_input)
+        use_cache = self._uses_semantic_cache(user_input)
+        if use_cache:
+            with span("semantic_cache.lookup") as current:
+                cached = await self.semantic_cache.aget(user_input)
+                current.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                return cached
+        results = await self.app.ainvoke(state, config=self._run_config(retriever))
+        response = self._response_text(results["response"])
+        if use_cache and not results.get("needs_human"):
+            await self.semantic_cache.aput(user_input, response, valid=self._still_current(state))
+        return response
+
+    async def astream_response(self, user_input: str, retriever) -> AsyncIterator[str]:
+        """
+        Run the customer support workflow and yield the response as it is generated.
+
+        A paraphrase of a recently answered question is answered from the semantic cache
+        as a single fragment. Otherwise the graph runs via astream_events, and the token chunks of the answer-generation
+        LLM (runs tagged QAHandler.ANSWER_TAG) are yielded as soon as they arrive, so the
+        caller can forward them before generation finishes. Sentiment analysis tokens are
+        never yielded. When the final response was not produced by a streaming LLM call
+        (e.g. a human escalation), it is yielded as a single fragment once the
+        generate_response node completes.
+
+        Parameters:
+        -----------
+        user_input : str
+            The user's question or issue.
+        retriever : BaseRetriever
+            Retriever instance for document/question answering.
+
+        Yields:
+        -------
+        str
+            Consecutive fragments of the chatbot's final response.
         """
-        self.retriever = retriever
-        results = self.app.invoke({"user_input": user_input})
-        return results["response"]
+        state = self._initial_state(user_input)
+        use_cache = self._uses_semantic_cache(user_input)
+        if use_cache:
+            with span("semantic_cache.lookup") as current:
+                cached = await self.semantic_cache.aget(user_input)
+                current.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                yield cached
+                return
+        streamed = False
+        response, escalated = None, False
+        # Speculative answer tokens may arrive before routing is known; they are held
+        # back until the query is routed to an answer, and dropped on escalation
+        route_decided = self.speculation != "answer"
+        held_back = []
+        async for event in self.app.astream_events(
+            state, config=self._run_config(retriever), version="v2"
+        ):
+            kind = event["event"]
+            if kind == "on_chat_model_stream" and QAHandler.ANSWER_TAG in event.get("tags", []):
+                fragment = event["data"]["chunk"].content
+                if not fragment:
+                    continue
+                if not route_decided:
+                    held_back.append(fragment)
+                    continue
+                streamed = True
+                yield fragment
+            elif kind == "on_custom_event" and event["name"] == ROUTE_EVENT:
+                route_decided = True
+                if held_back:
+                    streamed = True
+                    yield "".join(held_back)
+                    held_back = []
+            elif kind == "on_chain_end" and event["name"] == "generate_response":
+                response = self._response_text(event["data"]["output"]["response"])
+                escalated = bool(event["data"].get("input", {}).get("needs_human"))
+                if response and not streamed:
+                    yield response
+        if use_cache and response and not escalated:
+            await self.semantic_cache.aput(user_input, response, valid=self._still_current(state))
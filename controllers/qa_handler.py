@@ -1,8 +1,31 @@
+import asyncio
+import hashlib
+from functools import partial
 from langchain.prompts import PromptTemplate
-from langchain.chains import RetrievalQA
+from langchain_core.output_parsers import StrOutputParser
+from pydantic import BaseModel, Field
 from services.google_ai import GoogleAI
+from services.response_cache import ResponseCache
+from services.tracing import span, traced
+from controllers.vector_db_manager import VectorDBManager
 from config import Config
 
+
+class FusedAnswer(BaseModel):
+    """
+    Structured output of the fused routing + answering call.
+    """
+    needs_human: bool = Field(description="True if the query must be escalated to a human agent.")
+    answer: str = Field(description="Answer to the query based on the context; may be empty when needs_human is true.")
+
+
+def format_documents(documents) -> str:
+    """
+    Joins context documents into the prompt's {context}, as the 'stuff' chain type does.
+    """
+    return "\n\n".join(document.page_content for document in documents)
+
+
 class QAHandler:
     """
     QAHandler manages the question-answering process using a configured language model and prompt.
@@ -11,7 +34,8 @@ class QAHandler:
     -----------------
     - Load and prepare a custom prompt template.
     - Instantiate the language model interface via GoogleAI.
-    - Build and run a RetrievalQA chain to answer user queries based on provided retriever.
+    - Build the answer chain once and run it for every query, with the retriever supplied per request.
+    - Time retrieval and generation as trace spans ('qa.retrieve', 'qa.generate', 'qa.route_and_answer').
 
     Attributes:
     -----------
@@ -19,18 +43,47 @@ class QAHandler:
         The language model client used to generate answers.
     qa_prompt : PromptTemplate
         The prompt template providing structure for QA chain input.
+    answer_chain : Runnable
+        Prebuilt prompt | llm chain generating the answer from the formatted context.
+    fused_prompt : PromptTemplate
+        Prompt asking for the escalation decision and the answer in one structured response.
+    fused_chain : Runnable
+        fused_prompt piped into the LLM's structured output (FusedAnswer); built on first use.
+    response_cache : ResponseCache or None
+        Persistent cache of generated answers (Config.RESPONSE_CACHE), cleared whenever
+        VectorDBManager invalidates the index.
+    model_name : str
+        Name of the answering model, part of every response cache key.
 
     Methods:
     --------
     get_answer(query, retriever)
         Executes the QA chain to generate an answer and return source documents.
+    aget_answer(query, retriever)
+        Async counterpart of get_answer; does not block the event loop.
+    retrieve(query, retriever) / aretrieve(query, retriever)
+        Fetches the context documents for a query without generating an answer.
+    answer_from_documents(query, documents) / aanswer_from_documents(query, documents)
+        Generates the answer from already retrieved documents.
+    route_and_answer(query, documents) / aroute_and_answer(query, documents)
+        Decides escalation and generates the answer with a single structured LLM call.
     """
 
-    def __init__(self):
+    # Tag attached to the answer-generation run, so streaming consumers can pick the
+    # answer tokens out of every other LLM call made while handling a query
+    ANSWER_TAG = "qa_answer"
+
+    def __init__(self, llm=None):
         """
-        Initializes QAHandler by loading the custom prompt and getting the language model client.
+        Initializes QAHandler by loading the custom prompt, getting the language model client
+        and building the answer chain, which is reused by every request.
+
+        Parameters:
+        -----------
+        llm : BaseChatModel, optional
+            Language model to use instead of the GoogleAI client.
         """
-        self.llm = GoogleAI().get_llm()
+        self.llm = llm or GoogleAI().get_llm()
         with open(Config.PROMPT_FILE, "r") as file:
             custom_prompt = file.read()
         
@@ -38,10 +91,82 @@ class QAHandler:
             template=custom_prompt,
             input_variables=["context", "question"]
         )
+        # Built once and shared by every request; only the generation step is tagged,
+        # so streaming picks up answer tokens alone
+        self.answer_chain = (self.qa_prompt | self.llm | StrOutputParser()).with_config(
+            run_name="qa_answer", tags=[self.ANSWER_TAG]
+        )
+        with open(Config.FUSED_PROMPT_FILE, "r") as file:
+            self.fused_prompt = PromptTemplate(
+                template=file.read(),
+                input_variables=["context", "question"]
+            )
+        self._fused_chain = None
+
+        self.model_name = getattr(self.llm, "model", None) or type(self.llm).__name__
+        self._qa_prompt_hash = hashlib.sha256(self.qa_prompt.template.encode("utf-8")).hexdigest()
+        self._fused_prompt_hash = hashlib.sha256(self.fused_prompt.template.encode("utf-8")).hexdigest()
+        self.response_cache = None
+        if Config.RESPONSE_CACHE:
+            self.response_cache = ResponseCache(Config.RESPONSE_CACHE_FILE)
+            VectorDBManager.add_invalidation_listener(self.response_cache.clear)
+
+    def _response_key(self, query, documents, prompt_hash):
+        """
+        Response cache key of a request, or None when the cache is disabled.
+        """
+        if self.response_cache is None:
+            return None
+        return ResponseCache.make_key(query, documents, prompt_hash, self.model_name)
+
+    def _cached_response(self, key):
+        """
+        Returns the cached response stored under key, if any.
+        """
+        return self.response_cache.get(key) if key is not None else None
+
+    def _store_response(self, key, response, generation):
+        """
+        Stores a generated response under key (no-op when the cache is disabled).
+
+        Nothing is stored if the index was invalidated since `generation` was read at the
+        start of the request: the answer may be based on replaced chunks, and the
+        invalidation has already cleared the cache.
+        """
+        if key is not None:
+            self.response_cache.put(key, response, valid=partial(VectorDBManager.unchanged_since, generation))
+
+    async def _acached_response(self, key):
+        """
+        Async counterpart of _cached_response; the sqlite lookup runs on a worker thread so
+        it does not block the event loop.
+        """
+        return await asyncio.to_thread(self.response_cache.get, key) if key is not None else None
+
+    async def _astore_response(self, key, response, generation):
+        """
+        Async counterpart of _store_response, writing on a worker thread.
+        """
+        if key is not None:
+            await asyncio.to_thread(
+                self.response_cache.put, key, response, valid=partial(VectorDBManager.unchanged_since, generation)
+            )
+
+    @property
+    def fused_chain(self):
+        """
+        The fused routing + answer chain, built on first use since not every model
+        supports structured output and it is only needed in fused mode.
+        """
+        if self._fused_chain is None:
+            self._fused_chain = (self.fused_prompt | self.llm.with_structured_output(FusedAnswer)).with_config(
+                run_name="qa_fused"
+            )
+        return self._fused_chain
 
-    def get_answer(self, query, retriever):
+    def get_answer(self, query, retriever, generation=None):
         """
-        Execute the RetrievalQA chain with the given query and retriever.
+        Retrieve context with the given retriever and generate the answer with the QA chain.
 
         Parameters:
         -----------
@@ -49,17 +174,220 @@ class QAHandler:
             The user question or query text to be answered.
         retriever : BaseRetriever
             Retriever instance used to fetch relevant documents for context.
+        generation : int, optional
+            VectorDBManager.generation read when the request started; the answer is not
+            cached if the index was invalidated since. Read now if omitted.
 
         Returns:
         --------
         dict
             Result containing answer text and source documents, as produced by the QA chain.
         """
-        qa_chain = RetrievalQA.from_chain_type(
-            llm=self.llm,
-            chain_type="stuff",
-            retriever=retriever,
-            return_source_documents=True,
-            chain_type_kwargs={"prompt": self.qa_prompt}
-        )
-        return qa_chain.invoke(query)
+        if generation is None:
+            generation = VectorDBManager.generation
+        documents = self.retrieve(query, retriever)
+        return self.answer_from_documents(query, documents, generation=generation)
+
+    async def aget_answer(self, query, retriever, generation=None):
+        """
+        Asynchronously retrieve context with the given retriever and generate the answer.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text to be answered.
+        retriever : BaseRetriever
+            Retriever instance used to fetch relevant documents for context.
+        generation : int, optional
+            VectorDBManager.generation read when the request started; the answer is not
+            cached if the index was invalidated since. Read now if omitted.
+
+        Returns:
+        --------
+        dict
+            Result containing answer text and source documents, as produced by the QA chain.
+        """
+        if generation is None:
+            generation = VectorDBManager.generation
+        documents = await self.aretrieve(query, retriever)
+        return await self.aanswer_from_documents(query, documents, generation=generation)
+
+    @traced("qa.retrieve")
+    def retrieve(self, query, retriever):
+        """
+        Fetch the context documents for a query with the request's retriever.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text.
+        retriever : BaseRetriever
+            Retriever instance used to fetch relevant documents.
+
+        Returns:
+        --------
+        list of Document
+            The retrieved context documents.
+        """
+        return retriever.invoke(query)
+
+    @traced("qa.retrieve")
+    async def aretrieve(self, query, retriever):
+        """
+        Asynchronously fetch the context documents for a query.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text.
+        retriever : BaseRetriever
+            Retriever instance used to fetch relevant documents.
+
+        Returns:
+        --------
+        list of Document
+            The retrieved context documents.
+        """
+        return await retriever.ainvoke(query)
+
+    def answer_from_documents(self, query, documents, discarded=None, generation=None):
+        """
+        Generate the answer to a query from already retrieved documents.
+
+        An identical request (same question, context, prompt and model) is answered
+        from the response cache without calling the LLM.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text to be answered.
+        documents : list of Document
+            Context documents, e.g. from retrieve().
+        discarded : threading.Event, optional
+            Set when the answer is no longer wanted (e.g. a speculation abandoned on
+            escalation); the generated answer is then not added to the response cache.
+        generation : int, optional
+            VectorDBManager.generation read when the request started (before retrieval);
+            the answer is not cached if the index was invalidated since. Read now if omitted.
+
+        Returns:
+        --------
+        dict
+            Result in the same shape as get_answer: 'query', 'result' and 'source_documents'.
+        """
+        if generation is None:
+            generation = VectorDBManager.generation
+        with span("qa.generate", documents=len(documents)) as current:
+            key = self._response_key(query, documents, self._qa_prompt_hash)
+            answer = self._cached_response(key)
+            current.set_attribute("cache_hit", answer is not None)
+            if answer is None:
+                answer = self.answer_chain.invoke({"context": format_documents(documents), "question": query})
+                if discarded is None or not discarded.is_set():
+                    self._store_response(key, answer, generation)
+        return {"query": query, "result": answer, "source_documents": documents}
+
+    async def aanswer_from_documents(self, query, documents, generation=None):
+        """
+        Asynchronously generate the answer to a query from already retrieved documents,
+        using the response cache like answer_from_documents.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text to be answered.
+        documents : list of Document
+            Context documents, e.g. from aretrieve().
+        generation : int, optional
+            VectorDBManager.generation read when the request started (before retrieval);
+            the answer is not cached if the index was invalidated since. Read now if omitted.
+
+        Returns:
+        --------
+        dict
+            Result in the same shape as get_answer: 'query', 'result' and 'source_documents'.
+        """
+        if generation is None:
+            generation = VectorDBManager.generation
+        with span("qa.generate", documents=len(documents)) as current:
+            key = self._response_key(query, documents, self._qa_prompt_hash)
+            answer = await self._acached_response(key)
+            current.set_attribute("cache_hit", answer is not None)
+            if answer is None:
+                answer = await self.answer_chain.ainvoke({"context": format_documents(documents), "question": query})
+                await self._astore_response(key, answer, generation)
+        return {"query": query, "result": answer, "source_documents": documents}
+
+    def route_and_answer(self, query, documents, generation=None):
+        """
+        Decide whether the query needs a human and answer it, in a single LLM call.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text to be answered.
+        documents : list of Document
+            Context documents, e.g. from retrieve().
+        generation : int, optional
+            VectorDBManager.generation read when the request started (before retrieval);
+            the answer is not cached if the index was invalidated since. Read now if omitted.
+
+        Returns:
+        --------
+        tuple (bool, dict) or None
+            The escalation flag, and the result in the same shape as get_answer; None when
+            the model's reply could not be parsed as a FusedAnswer, in which case nothing
+            is cached and the caller should fall back to separate routing and answer calls.
+        """
+        if generation is None:
+            generation = VectorDBManager.generation
+        with span("qa.route_and_answer", documents=len(documents)) as current:
+            key = self._response_key(query, documents, self._fused_prompt_hash)
+            cached = self._cached_response(key)
+            current.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                output = FusedAnswer.model_validate_json(cached)
+            else:
+                output = self.fused_chain.invoke({"context": format_documents(documents), "question": query})
+                current.set_attribute("parsed", output is not None)
+                if output is None:
+                    return None
+                self._store_response(key, output.model_dump_json(), generation)
+        return output.needs_human, {"query": query, "result": output.answer, "source_documents": documents}
+
+    async def aroute_and_answer(self, query, documents, generation=None):
+        """
+        Asynchronously decide whether the query needs a human and answer it, in a single LLM call.
+
+        Parameters:
+        -----------
+        query : str
+            The user question or query text to be answered.
+        documents : list of Document
+            Context documents, e.g. from aretrieve().
+        generation : int, optional
+            VectorDBManager.generation read when the request started (before retrieval);
+            the answer is not cached if the index was invalidated since. Read now if omitted.
+
+        Returns:
+        --------
+        tuple (bool, dict) or None
+            The escalation flag, and the result in the same shape as get_answer; None when
+            the model's reply could not be parsed as a FusedAnswer, in which case nothing
+            is cached and the caller should fall back to separate routing and answer calls.
+        """
+        if generation is None:
+            generation = VectorDBManager.generation
+        with span("qa.route_and_answer", documents=len(documents)) as current:
+            key = self._response_key(query, documents, self._fused_prompt_hash)
+            cached = await self._acached_response(key)
+            current.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                output = FusedAnswer.model_validate_json(cached)
+            else:
+                output = await self.fused_chain.ainvoke({"context": format_documents(documents), "question": query})
+                current.set_attribute("parsed", output is not None)
+                if output is None:
+                    return None
+                await self._astore_response(key, output.model_dump_json(), generation)
+        return output.needs_human, {"query": query, "result": output.answer, "source_documents": documents}
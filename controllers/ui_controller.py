@@ -69,13 +69,16 @@ class UIController:
         directory_path : str
             Filesystem path to the directory containing source PDF documents.
         """
-        if os.path.exists(Config.PERSIST_DIR):
-            shutil.rmtree(Config.PERSIST_DIR)
-        chunks = self.doc_processor.process_directory(directory_path)
-        if chunks:
-            self.db_manager.create_db(chunks)
-            st.session_state.db_created = True
-            st.success(f"Database created with {len(chunks)} document chunks!")
+        # Held throughout so another session cannot ingest into the directory being deleted
+        with VectorDBManager.ingestion_lock:
+            if os.path.exists(Config.PERSIST_DIR):
+                shutil.rmtree(Config.PERSIST_DIR)
+                self.db_manager.reset()
+            chunks = self.doc_processor.process_directory(directory_path)
+            if chunks:
+                self.db_manager.create_db(chunks)
+                st.session_state.db_created = True
+                st.success(f"Database created with {len(chunks)} document chunks!")
 
     def _clear_database(self):
         """
@@ -83,10 +86,12 @@ class UIController:
 
         Displays success feedback on database clearance.
         """
-        if os.path.exists(Config.PERSIST_DIR):
-            shutil.rmtree(Config.PERSIST_DIR)
-            st.session_state.db_created = False
-            st.success("Database cleared successfully!")
+        with VectorDBManager.ingestion_lock:
+            if os.path.exists(Config.PERSIST_DIR):
+                shutil.rmtree(Config.PERSIST_DIR)
+                self.db_manager.reset()
+                st.session_state.db_created = False
+                st.success("Database cleared successfully!")
     
     def _show_database_controls(self, directory_path):
         """
@@ -1,12 +1,24 @@
 import os
+import threading
 from dotenv import load_dotenv
 
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import TextLoader, PyPDFLoader
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from chromadb.api.client import SharedSystemClient
+from langchain_community.document_loaders import TextLoader
 
 from config import Config
+from services.google_ai import GoogleAI
+from controllers.document_processor import build_splitter
+from controllers.ingestion_pipeline import IngestionPipeline, DocumentBatch
+from services.ingestion_manifest import IngestionManifest
+from services.parallel_loader import ParallelPDFLoader
+from services.embedding_batcher import BatchEmbedder
+from services.embedding_cache import EmbeddingCache, CachedQueryEmbeddings, text_hash
+from services.chunk_ids import assign_chunk_ids, make_chunk_id
+from services.bm25_index import BM25Index
+from services.hybrid_retriever import HybridRetriever
+from services.vector_backends import open_vectorstore, upsert_embeddings, count_chunks, iter_chunks
+from services.tracing import TracedRetriever, get_tracer, traced
+from services.metrics import INGESTED_CHUNKS
 
 # Load environment variables required for configuration and authentication.
 # This should be called before accessing any secrets or environment-based paths to ensure
@@ -16,31 +28,87 @@ load_dotenv()
 class VectorDBManager:
     """
     VectorDBManager manages all aspects of document ingestion and retrieval for a vector database
-    using the Chroma backend.
+    using the Chroma backend, or a memory-mapped flat index (Config.VECTOR_BACKEND = 'flat').
 
     Responsibilities:
     ---------------
-    - Loads PDF and TXT documents from a specified directory
-    - Splits and embeds documents using GoogleGenerativeAIEmbeddings
-    - Builds or updates a persistent Chroma vectorstore
-    - Provides a retriever interface for vector-based semantic search
+    - Loads PDF and TXT documents from a specified directory, parsing PDFs in parallel
+    - Streams documents through a concurrent parse/split/embed/write pipeline
+    - Splits and embeds documents using the GoogleAI embeddings client
+    - Reuses embeddings of unchanged text from a persistent EmbeddingCache
+    - Builds or updates a persistent Chroma (or FlatVectorStore) vectorstore
+    - Tracks ingested files in an IngestionManifest so only new or modified files are embedded
+    - Upserts chunks under deterministic IDs so repeated ingestion never duplicates them
+    - Maintains a BM25 keyword index over the same chunks, persisted next to the vectorstore
+    - Provides a retriever interface for vector, hybrid (vector + BM25) or keyword search
+    - Caches query embeddings process-wide so repeated questions skip the embedding call
+    - Keeps one warm vectorstore handle and retriever per process, invalidated by a generation
+      counter whenever ingestion changes the index
+    - Times vectorstore searches as trace spans when tracing is enabled (see services.tracing)
 
     Parameters:
     -----------
     None (configuration is loaded from the 'Config' module)
 
+    Class Attributes:
+    -----------------
+    query_embeddings : CachedQueryEmbeddings or None
+        Query embedding client with an LRU/TTL cache, shared by every instance in the process.
+    generation : int
+        Index generation, bumped by invalidate() every time ingestion changes the index.
+    lexical_index : BM25Index or None
+        Process-wide keyword index, loaded (or rebuilt from the vectorstore) on first use.
+    ingestion_lock : threading.RLock
+        Serializes every ingestion in the process (ingest_directory, create_db, ...), so
+        concurrent uploads never embed the same file twice or interleave manifest writes.
+        Hold it as well while deleting the persist directory.
+
     Methods:
     --------
     __init__()
         Initializes the instance, loads or creates the vectorstore as needed.
-    load_documents_from_directory()
-        Loads and parses all supported files from the data directory.
+    iter_documents_from_directory(skip_unchanged=True)
+        Lazily parses new or modified supported files, yielding DocumentBatch items.
+    load_documents_from_directory(skip_unchanged=True)
+        Loads and parses new or modified supported files from the data directory.
+    ingest_directory(skip_unchanged=True)
+        Streams new or modified files through the ingestion pipeline into the vectorstore.
     create_vectorstore_incrementally(document_tuples)
-        Chunks and embeds the loaded documents and populates the vectorstore.
+        Chunks and embeds already loaded documents and populates the vectorstore.
+    create_db(chunks)
+        Embeds already split chunks (e.g. from DocumentProcessor) into the vectorstore.
+    reset()
+        Forgets ingestion state after the persistent vectorstore was deleted.
     get_retriever()
         Returns a retriever object for performing semantic retrieval over the vectorstore.
+    get_lexical_index()
+        Returns the shared BM25 keyword index over the vectorstore chunks.
+    get_query_embeddings()
+        Returns the shared, cached query embedding client.
+    get_vectorstore()
+        Returns the shared, long-lived vectorstore handle.
+    invalidate(reopen=False)
+        Bumps the index generation so cached retrievers are rebuilt.
+    unchanged_since(generation)
+        Whether the index was not invalidated since the given generation was read.
+    add_invalidation_listener(callback)
+        Registers a callback run by invalidate(), e.g. to clear caches derived from the index.
     """
 
+    query_embeddings = None
+    generation = 0
+    # Process-wide vectorstore handle and retriever, guarded by _handle_lock
+    _handle_lock = threading.Lock()
+    _vectorstore = None
+    _retriever = None
+    _retriever_generation = -1
+    # Process-wide keyword index; loading or rebuilding it is guarded by _lexical_lock
+    _lexical_lock = threading.Lock()
+    lexical_index = None
+    # Callbacks run after every invalidation (see add_invalidation_listener)
+    _invalidation_listeners = []
+    ingestion_lock = threading.RLock()
+
     def __init__(self):
         """
         Initializes the VectorDBManager.
@@ -48,6 +116,10 @@ class VectorDBManager:
         Reads configuration from the Config object:
             - self.data_dir: directory containing user documents to embed
             - self.vectorstore_path: path where Chroma vectorstore files are stored
+            - self.manifest: ingestion manifest recording which files are already embedded
+            - self.chunker_config: splitter settings shared with DocumentProcessor (see build_splitter)
+            - self.pdf_loader: process-pool PDF parser sized by Config.INGEST_WORKERS
+            - self.embedding_cache: on-disk embedding cache shared by every ingestion
 
         If the vectorstore is missing or empty, triggers initial ingestion by:
             - Loading all supported documents from the data directory
@@ -59,116 +131,525 @@ class VectorDBManager:
         """
         self.data_dir = Config.DATA_DIR
         self.vectorstore_path = Config.PERSIST_DIR
+        self.manifest = IngestionManifest(Config.MANIFEST_FILE)
+        self.chunker_config = build_splitter()[1]
+        self.pdf_loader = ParallelPDFLoader(Config.INGEST_WORKERS, Config.PDF_PAGES_PER_TASK)
+        self.embedding_cache = EmbeddingCache(
+            Config.EMBEDDING_CACHE_FILE,
+            GoogleAI().get_embedding_model_name(),
+            Config.EMBEDDING_CACHE_DTYPE
+        )
 
         # Check if the persistent vectorstore exists and is non-empty
         if not os.path.exists(self.vectorstore_path) or not os.listdir(self.vectorstore_path):
             print("Vectorstore not found or empty. Creating it first.")
-            document_tuples = self.load_documents_from_directory()
-            print(f"Loaded {len(document_tuples)} files from data directory.")
-            self.create_vectorstore_incrementally(document_tuples)
+            self.ingest_directory()
+        elif self.manifest.filenames() and not count_chunks(self.get_vectorstore()):
+            # The manifest was written by another backend (see Config.VECTOR_BACKEND)
+            print(f"The {Config.VECTOR_BACKEND} vectorstore is empty. Re-ingesting every file.")
+            self.ingest_directory(skip_unchanged=False)
 
-    def load_documents_from_directory(self):
+    def iter_documents_from_directory(self, skip_unchanged=True):
         """
-        Loads and parses documents from the configured data directory.
+        Lazily loads and parses documents from the configured data directory.
 
         Supported formats:
-            - PDF (handled by PyPDFLoader)
+            - PDF (parsed by ParallelPDFLoader across Config.INGEST_WORKERS processes)
             - TXT (handled by TextLoader)
 
-        Skips files with unsupported extensions.
+        Skips files with unsupported extensions, and (unless skip_unchanged is False)
+        files the ingestion manifest records as already ingested with identical content.
+        Large PDFs are yielded one page range at a time, so no more than a few page
+        ranges are ever held in memory.
+
+        Parameters:
+        -----------
+        skip_unchanged : bool
+            Whether to skip files whose size/mtime or content hash match the manifest.
+
+        Yields:
+            DocumentBatch: (filename, [document_objects], last, error) in directory listing
+                order; 'last' marks a file's final batch and 'error' a file that failed to load.
+        """
+        selected = []
+        for filename in os.listdir(self.data_dir):
+            filepath = os.path.join(self.data_dir, filename)
+            if not filename.endswith((".pdf", ".txt")):
+                continue  # Skip unsupported file types
+            try:
+                if skip_unchanged and self.manifest.is_current(filename, filepath):
+                    continue  # Already embedded with identical content
+            except OSError as e:
+                yield DocumentBatch(filename, None, True, e)
+                continue
+            selected.append((filename, filepath))
+
+        # PDFs are parsed in a process pool; page ranges come back in submission order
+        pdf_ranges = self.pdf_loader.lazy_load_ranges(
+            filepath for filename, filepath in selected if filename.endswith(".pdf")
+        )
+
+        for filename, filepath in selected:
+            if filename.endswith(".pdf"):
+                for _, docs, error, last in pdf_ranges:
+                    yield DocumentBatch(filename, docs, last, error)
+                    if last:
+                        break
+            else:
+                try:
+                    yield DocumentBatch(filename, TextLoader(filepath).load(), True, None)
+                except Exception as e:
+                    yield DocumentBatch(filename, None, True, e)
+
+    def load_documents_from_directory(self, skip_unchanged=True):
+        """
+        Loads and parses documents from the configured data directory into memory.
+
+        Prefer ingest_directory() for ingestion, which streams the same batches without
+        materializing the whole directory.
+
+        Parameters:
+        -----------
+        skip_unchanged : bool
+            Whether to skip files whose size/mtime or content hash match the manifest.
 
         Returns:
             documents (list of tuples): List of (filename, [document_objects])
-                where each document object is parsed by its respective loader.
+                where each document object is parsed by its respective loader,
+                in directory listing order.
 
         Error Handling:
             - If a file fails to load, logs the error and continues processing the rest.
         """
         documents = []
-        for filename in os.listdir(self.data_dir):
-            filepath = os.path.join(self.data_dir, filename)
-            try:
-                # Select and instantiate the loader based on the file extension
-                if filename.endswith(".pdf"):
-                    loader = PyPDFLoader(filepath)
-                elif filename.endswith(".txt"):
-                    loader = TextLoader(filepath)
-                else:
-                    continue  # Skip unsupported file types
-                docs = loader.load()
-                documents.append((filename, docs))  # Store for downstream vectorization
-            except Exception as e:
+        pages = []
+        for batch in self.iter_documents_from_directory(skip_unchanged):
+            if batch.error is not None:
                 # Log error for traceability and diagnostics; do not break pipeline
-                print(f"Failed to load {filename}: {e}")
+                print(f"Failed to load {batch.filename}: {batch.error}")
+                pages = []
+                continue
+            pages.extend(batch.docs)
+            if batch.last:
+                documents.append((batch.filename, pages))  # Store for downstream vectorization
+                pages = []
         return documents
 
+    def ingest_directory(self, skip_unchanged=True):
+        """
+        Streams new or modified files from the data directory into the vectorstore.
+
+        Parsing, splitting, embedding and writing run concurrently (see IngestionPipeline),
+        so memory stays flat regardless of corpus size and each file becomes queryable as
+        soon as its last batch is written.
+
+        Runs under ingestion_lock: a concurrent call waits, then only picks up the files
+        this run did not already record in the manifest.
+
+        Parameters:
+        -----------
+        skip_unchanged : bool
+            Whether to skip files the ingestion manifest records as unchanged.
+
+        Returns:
+            vectorstore (Chroma): The ready-to-use vectorstore instance.
+        """
+        with self.ingestion_lock:
+            vectorstore, pipeline = self._build_pipeline()
+            removed = self._remove_deleted_files(vectorstore)
+            try:
+                stats = pipeline.run(self.iter_documents_from_directory(skip_unchanged))
+            finally:
+                self.manifest.save()
+                pipeline.lexical_index.save()
+                if removed or pipeline.stats.get("files") or pipeline.stats.get("chunks"):
+                    self.invalidate()
+        embed_stats = pipeline.embedder.stats()
+        print(f"Ingested {stats['chunks']} chunks from {stats['files']} files "
+              f"({stats['failed']} failed) in {stats['seconds']:.1f}s.")
+        print(f"Embedded {embed_stats['chunks']} chunks ({embed_stats['cached']} from cache) in "
+              f"{embed_stats['batches']} batches at {embed_stats['chunks_per_sec']:.1f} chunks/sec "
+              f"({embed_stats['retries']} rate-limit retries).")
+        return vectorstore
+
     def create_vectorstore_incrementally(self, document_tuples):
         """
         Chunks, embeds, and adds given documents to a (possibly existing) Chroma vectorstore.
 
         Parameters:
         -----------
-        document_tuples : list
-            List of (filename, [document_objects]) from the document loader.
+        document_tuples : iterable
+            (filename, [document_objects]) pairs from the document loader.
 
         Steps:
         ------
-        - Instantiate a RecursiveCharacterTextSplitter for chunking each document.
-        - Use GoogleGenerativeAIEmbeddings for vector representation.
-        - Initialize or load an existing Chroma vectorstore at persist_directory.
-        - For each file:
-            * Split into overlapping chunks
-            * Add each chunk to the Chroma store for later retrieval
+        - Drop chunks of files that were removed from the data directory.
+        - Run the documents through the ingestion pipeline, which for each file:
+            * Splits into overlapping chunks
+            * Derives a stable ID per chunk from (file hash, page, offset, chunker config)
+            * Embeds the chunks in batched, concurrent requests and upserts them by ID
+              into the vectorstore and the BM25 keyword index
+            * Deletes chunks from a previous version of the file that were not rewritten
+            * Records the file's hash and chunk IDs in the ingestion manifest
 
         Returns:
             vectorstore (Chroma): The ready-to-use vectorstore instance.
         """
-        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-
-        # Chroma vectorstore is initialized or loaded from path for incremental ingestion
-        if os.path.exists(self.vectorstore_path) and os.listdir(self.vectorstore_path):
-            vectorstore = Chroma(
-                persist_directory=self.vectorstore_path,
-                embedding_function=embeddings
-            )
-        else:
-            vectorstore = Chroma(
-                persist_directory=self.vectorstore_path,
-                embedding_function=embeddings
-            )
-
-        for filename, docs in document_tuples:
-            print(f"Processing {filename} ({len(docs)} document(s))...")
-            # Split into semantic chunks for better vector granularity
-            chunks = splitter.split_documents(docs)
-            print(f"  Split into {len(chunks)} chunks.")
-            # Each chunk is added to the vectorstore; persistence is managed by Chroma
-            vectorstore.add_documents(chunks)
-            print(f"  Added chunks from {filename} to the vectorstore.")
+        with self.ingestion_lock:
+            vectorstore, pipeline = self._build_pipeline()
+            removed = self._remove_deleted_files(vectorstore)
+            try:
+                pipeline.run(DocumentBatch(filename, docs) for filename, docs in document_tuples)
+            finally:
+                self.manifest.save()
+                pipeline.lexical_index.save()
+                if removed or pipeline.stats.get("files") or pipeline.stats.get("chunks"):
+                    self.invalidate()
 
         print("Finished adding all documents incrementally.")
         return vectorstore
 
+    def create_db(self, chunks):
+        """
+        Embeds already split chunks (e.g. from DocumentProcessor) into the vectorstore.
+
+        Chunks of a source file get the same IDs as ingest_directory() gives them (file
+        hash, page, start offset and the shared chunker config, see build_splitter), so
+        rebuilding from the same files upserts in place. Source files in the data directory
+        are recorded in the ingestion manifest, with the chunks of their previous version
+        deleted, so a later ingest_directory() skips them instead of embedding them again.
+        Chunks without a source file (e.g. synthetic benchmark corpora) are identified by
+        their text and position instead. Embeddings come from the persistent cache whenever
+        the chunk text was embedded before. Runs under ingestion_lock.
+
+        Parameters:
+        -----------
+        chunks : list of Document
+            Pre-split chunks carrying 'source' (and optionally 'page') metadata; chunks of
+            source files also need 'start_index' (splitter from build_splitter).
+
+        Returns:
+            vectorstore (Chroma): The ready-to-use vectorstore instance.
+        """
+        with self.ingestion_lock:
+            embedder = self._build_embedder(self.get_query_embeddings())
+            vectorstore = self.get_vectorstore()
+            lexical_index = self.get_lexical_index()
+
+            sources = {}
+            for chunk in chunks:
+                sources.setdefault(chunk.metadata.get("source", ""), []).append(chunk)
+            chunks, ids, tracked = [], [], []
+            data_dir = os.path.abspath(self.data_dir)
+            for source, source_chunks in sources.items():
+                if os.path.isfile(source):
+                    fingerprint = self.manifest.fingerprint(source)
+                    source_chunks, source_ids = assign_chunk_ids(source_chunks, fingerprint["sha256"], self.chunker_config)
+                    if os.path.dirname(os.path.abspath(source)) == data_dir:
+                        tracked.append((os.path.basename(source), source, source_ids, fingerprint))
+                else:
+                    source_ids = [
+                        make_chunk_id(text_hash(chunk.page_content), chunk.metadata.get("page"), ordinal,
+                                      self.chunker_config)
+                        for ordinal, chunk in enumerate(source_chunks)
+                    ]
+                chunks.extend(source_chunks)
+                ids.extend(source_ids)
+
+            written = []
+            try:
+                window = embedder.window_size
+                for start in range(0, len(chunks), window):
+                    window_chunks = chunks[start:start + window]
+                    vectors = embedder.embed([chunk.page_content for chunk in window_chunks])
+                    upsert_embeddings(
+                        vectorstore,
+                        ids[start:start + window],
+                        vectors,
+                        [chunk.page_content for chunk in window_chunks],
+                        [chunk.metadata for chunk in window_chunks]
+                    )
+                    lexical_index.add(
+                        ids[start:start + window],
+                        [chunk.page_content for chunk in window_chunks],
+                        [chunk.metadata for chunk in window_chunks]
+                    )
+                    written.extend(ids[start:start + window])
+            except Exception:
+                # Leave tracked files at their recorded version so the next ingestion retries them
+                previous_ids = {chunk_id for filename, *_ in tracked for chunk_id in self.manifest.get_chunk_ids(filename)}
+                new_ids = {chunk_id for _, _, source_ids, _ in tracked for chunk_id in source_ids}
+                orphan_ids = [chunk_id for chunk_id in written if chunk_id in new_ids and chunk_id not in previous_ids]
+                if orphan_ids:
+                    vectorstore.delete(ids=orphan_ids)
+                    lexical_index.delete(orphan_ids)
+                raise
+
+            for filename, source, source_ids, fingerprint in tracked:
+                current_ids = set(source_ids)
+                stale_ids = [chunk_id for chunk_id in self.manifest.get_chunk_ids(filename)
+                             if chunk_id not in current_ids]
+                if stale_ids:
+                    vectorstore.delete(ids=stale_ids)
+                    lexical_index.delete(stale_ids)
+                self.manifest.record(filename, source, source_ids, fingerprint)
+            if tracked:
+                self.manifest.save()
+            if chunks:
+                lexical_index.save()
+                INGESTED_CHUNKS.inc(len(chunks))
+                self.invalidate()
+
+            embed_stats = embedder.stats()
+            print(f"Embedded {embed_stats['chunks']} chunks ({embed_stats['cached']} from cache) "
+                  f"at {embed_stats['chunks_per_sec']:.1f} chunks/sec.")
+            return vectorstore
+
+    def reset(self):
+        """
+        Forgets ingestion state after the persistent vectorstore directory was deleted,
+        so the next ingestion treats every file as new. The embedding cache is kept.
+        """
+        with self.ingestion_lock:
+            self.manifest = IngestionManifest(Config.MANIFEST_FILE)
+            self.invalidate(reopen=True)
+
+    def _build_embedder(self, embeddings):
+        """
+        Builds a BatchEmbedder backed by the persistent embedding cache.
+        """
+        return BatchEmbedder(
+            embeddings,
+            batch_size=Config.EMBED_BATCH_SIZE,
+            max_concurrency=Config.EMBED_CONCURRENCY,
+            max_retries=Config.EMBED_MAX_RETRIES,
+            cache=self.embedding_cache
+        )
+
+    def _build_pipeline(self):
+        """
+        Builds an IngestionPipeline writing into the shared vectorstore and
+        BM25 keyword index.
+
+        Returns:
+            tuple (VectorStore, IngestionPipeline)
+        """
+        splitter, chunker_config = build_splitter()
+
+        # The long-lived handle is used for writes too; queries see new chunks immediately
+        vectorstore = self.get_vectorstore()
+        embedder = self._build_embedder(self.get_query_embeddings())
+        pipeline = IngestionPipeline(
+            vectorstore,
+            embedder,
+            self.manifest,
+            splitter,
+            chunker_config,
+            self.data_dir,
+            queue_size=Config.INGEST_QUEUE_SIZE,
+            lexical_index=self.get_lexical_index()
+        )
+        return vectorstore, pipeline
+
+    def _remove_deleted_files(self, vectorstore):
+        """
+        Deletes the chunks of files that were removed from the data directory,
+        so they are no longer retrievable.
+
+        Returns:
+            int: Number of files removed from the manifest.
+        """
+        removed = 0
+        for filename in self.manifest.filenames():
+            if not os.path.exists(os.path.join(self.data_dir, filename)):
+                stale_ids = self.manifest.remove(filename)
+                if stale_ids:
+                    vectorstore.delete(ids=stale_ids)
+                    self.get_lexical_index().delete(stale_ids)
+                print(f"Removed {len(stale_ids)} chunks of deleted file {filename}.")
+                removed += 1
+        return removed
+
+    @traced("vectordb.get_retriever")
     def get_retriever(self):
         """
         Returns a retriever object for semantic search over the vectorstore.
 
-        Ensures the vectorstore directory is present and non-empty before proceeding.
+        The retriever is built once per index generation on top of the process-wide
+        Chroma handle, so a query never pays for opening the HNSW segment or the sqlite
+        connection. The persist directory is only inspected when the handle is (re)opened.
+
+        Unless Config.RETRIEVAL_MODE is 'vector', the vector retriever is wrapped in a
+        HybridRetriever that fuses it with the BM25 keyword index and answers keyword
+        queries (or, in 'lexical' mode, every query) without an embedding call.
 
         Returns:
-            retriever (Chroma.as_retriever): A retriever instance for use in downstream chains.
+            retriever (BaseRetriever): A retriever instance for use in downstream chains.
             Returns None if the vectorstore does not exist or is empty.
 
         Usage Consideration:
             - Uses the same embedding function as used during document ingestion for consistency.
+            - Query embeddings go through the process-wide LRU/TTL cache (see get_query_embeddings).
         """
+        cls = type(self)
+        with cls._handle_lock:
+            if cls._retriever is not None and cls._retriever_generation == cls.generation:
+                return cls._retriever
+            generation = cls.generation
         if not os.path.exists(self.vectorstore_path) or not os.listdir(self.vectorstore_path):
             print("Vectorstore not found or empty.")
             return
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        retriever = Chroma(
-            persist_directory=self.vectorstore_path,
-            embedding_function=embeddings
-        ).as_retriever()
+        if Config.RETRIEVAL_MODE == "vector":
+            retriever = self._vector_retriever(Config.RETRIEVAL_K)
+        else:
+            fetch_k = max(Config.HYBRID_FETCH_K, Config.RETRIEVAL_K)
+            retriever = HybridRetriever(
+                vector_retriever=self._vector_retriever(fetch_k),
+                lexical_index=self.get_lexical_index(),
+                k=Config.RETRIEVAL_K,
+                fetch_k=fetch_k,
+                rrf_k=Config.RRF_K,
+                mode=Config.RETRIEVAL_MODE,
+                keyword_max_terms=Config.LEXICAL_MAX_TERMS
+            )
+        with cls._handle_lock:
+            # Only publish if no ingestion invalidated the index in the meantime
+            if cls.generation == generation:
+                cls._retriever = retriever
+                cls._retriever_generation = generation
+        return retriever
+
+    def _vector_retriever(self, k):
+        """
+        Dense retriever returning the top k chunks of the shared vectorstore. With tracing
+        enabled, each search (query embedding included) is timed as a 'vectorstore.search' span.
+        """
+        retriever = self.get_vectorstore().as_retriever(search_kwargs={"k": k})
+        if get_tracer().enabled:
+            retriever = TracedRetriever(
+                retriever=retriever,
+                span_name="vectorstore.search",
+                attributes={"backend": Config.VECTOR_BACKEND, "k": k}
+            )
         return retriever
+
+    def get_vectorstore(self):
+        """
+        Returns the process-wide vectorstore handle, opening it on first use.
+
+        Returns:
+            vectorstore (Chroma or FlatVectorStore): Long-lived vectorstore of the
+            Config.VECTOR_BACKEND backend over Config.PERSIST_DIR, using the cached query
+            embeddings as its embedding function.
+        """
+        cls = type(self)
+        with cls._handle_lock:
+            if cls._vectorstore is None:
+                cls._vectorstore = open_vectorstore(
+                    Config.VECTOR_BACKEND,
+                    self.vectorstore_path,
+                    self.get_query_embeddings(),
+                    quantization=Config.FLAT_QUANTIZATION,
+                    rerank_factor=Config.FLAT_RERANK_FACTOR
+                )
+            return cls._vectorstore
+
+    def get_lexical_index(self):
+        """
+        Returns the process-wide BM25 keyword index, loading it on first use.
+
+        The index is read from Config.BM25_INDEX_FILE. If it is missing or out of step
+        with the vectorstore (e.g. a vectorstore built before the index existed, or an
+        ingestion interrupted before the index was saved), it is rebuilt from the chunks
+        stored in the vectorstore, without any embedding call, and saved.
+
+        Returns:
+            BM25Index: Keyword index over the same chunk IDs as the vectorstore.
+        """
+        cls = type(self)
+        with cls._lexical_lock:
+            if cls.lexical_index is not None:
+                return cls.lexical_index
+            index = BM25Index(Config.BM25_INDEX_FILE)
+            vectorstore = self.get_vectorstore()
+            count = count_chunks(vectorstore)
+            if len(index) != count:
+                print(f"Rebuilding BM25 index from {count} vectorstore chunks.")
+                index.clear()
+                for ids, texts, metadatas in iter_chunks(vectorstore):
+                    index.add(ids, texts, metadatas)
+                index.save()
+            cls.lexical_index = index
+            return index
+
+    @classmethod
+    def invalidate(cls, reopen=False):
+        """
+        Marks the index as changed by bumping the generation counter.
+
+        Cached retrievers are rebuilt on the next get_retriever() call and every invalidation
+        listener is called. With reopen=True (e.g. after the persist directory was deleted)
+        the Chroma handle and the keyword index are dropped as well and Chroma's per-path
+        client cache is cleared, so the next use opens fresh ones.
+
+        Parameters:
+        -----------
+        reopen : bool
+            Whether the underlying Chroma handle must be reopened too.
+        """
+        with cls._handle_lock:
+            cls.generation += 1
+            cls._retriever = None
+            if reopen:
+                cls._vectorstore = None
+                if cls.lexical_index is not None:
+                    cls.lexical_index.close()
+                cls.lexical_index = None
+                # Chroma caches one client system per path; a deleted directory needs a fresh one
+                SharedSystemClient.clear_system_cache()
+            listeners = list(cls._invalidation_listeners)
+        for listener in listeners:
+            listener()
+
+    @classmethod
+    def unchanged_since(cls, generation) -> bool:
+        """
+        Whether the index was not invalidated since `generation` was read.
+
+        Requests read the generation when they start and check it before caching anything
+        derived from the retrieved content.
+        """
+        return cls.generation == generation
+
+    @classmethod
+    def add_invalidation_listener(cls, callback):
+        """
+        Registers a callback to run every time the index is invalidated.
+
+        Components caching anything derived from the indexed content (such as generated
+        answers) register here so their caches are dropped whenever ingestion changes it.
+
+        Parameters:
+        -----------
+        callback : callable
+            Function called without arguments after each invalidate().
+        """
+        with cls._handle_lock:
+            cls._invalidation_listeners.append(callback)
+
+    @classmethod
+    def get_query_embeddings(cls):
+        """
+        Returns the process-wide query embedding client, creating it on first use.
+
+        Returns:
+            CachedQueryEmbeddings: Embeddings client whose embed_query results are cached
+            on normalized query text (size Config.QUERY_CACHE_SIZE, TTL Config.QUERY_CACHE_TTL).
+        """
+        if cls.query_embeddings is None:
+            cls.query_embeddings = CachedQueryEmbeddings(
+                GoogleAI().get_embeddings(),
+                maxsize=Config.QUERY_CACHE_SIZE,
+                ttl=Config.QUERY_CACHE_TTL
+            )
+        return cls.query_embeddings
@@ -17,10 +17,17 @@ const App: React.FC = () => {
   const { response, isOpen, sendMessage } = useWebSocket(`${wsProtocol}${window.location.host}/ws`, setShowEE);
 
   const messagesEndRef = useRef<HTMLDivElement>(null);
+  const botMessageStartedRef = useRef<boolean>(false); // Whether the streamed answer already has a bubble
 
   useEffect(() => {
     if (response) {
-      setMessages((prev) => [...prev, { user: 'Bot', msg: response }]);
+      // 'response' grows as fragments stream in: the first one adds a bubble, later ones update it
+      setMessages((prev) =>
+        botMessageStartedRef.current
+          ? [...prev.slice(0, -1), { user: 'Bot', msg: response }]
+          : [...prev, { user: 'Bot', msg: response }]
+      );
+      botMessageStartedRef.current = true;
     }
   }, [response]);
 
@@ -34,6 +41,7 @@ const App: React.FC = () => {
     if (input.trim()) {
       setMessages([...messages, { user: 'User', msg: input }]);
       setInput('');
+      botMessageStartedRef.current = false;
       if (isOpen) sendMessage(input);
     }
   };
@@ -1,14 +1,17 @@
 import json
 import os
-from fastapi import FastAPI, WebSocket, UploadFile, File
+from fastapi import FastAPI, WebSocket, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+from starlette.concurrency import run_in_threadpool
 from UIApp import UIController
 from datetime import datetime
 from cust_logger import logger, set_files_message_color
 import shutil
 from config import Config
-from controllers.vector_db_manager import VectorDBManager
+from services.tracing import get_tracer, request_context
+from services.metrics import ACTIVE_WEBSOCKETS, StageMetricsExporter, StatsCollector
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, generate_latest
 
 app = FastAPI()
 
@@ -19,9 +22,18 @@ set_files_message_color('purple')
 # Enables serving CSS, JS, images etc. at /static path.
 app.mount("/static", StaticFiles(directory="frontend/build/static"), name="static")
 
+# Prometheus per-stage latencies come from the request trace spans; registered before any
+# component is built, so every traced stage is covered
+if Config.METRICS:
+    get_tracer().add_exporter(StageMetricsExporter())
+
 # Initialize UIController instance to handle application logic and communication
 uicontroller = UIController()
 
+# Cache and index statistics are read from the live components at scrape time
+if Config.METRICS:
+    REGISTRY.register(StatsCollector(uicontroller.cache_stats, uicontroller.index_sizes))
+
 @app.get("/")
 async def serve_root():
     """
@@ -34,6 +46,44 @@ async def serve_root():
     """
     return FileResponse(os.path.join("frontend", "build", "index.html"))
 
+# API routes must be declared before the SPA catch-all route below
+@app.get("/api/traces")
+async def get_traces(request_id: str = None):
+    """
+    Return the spans kept by the in-process ring buffer exporter (Config.TRACING 'ring').
+
+    Parameters:
+    -----------
+    request_id : str, optional
+        Only return the spans of this request.
+
+    Returns:
+    --------
+    dict
+        {"spans": [...]}, oldest first; 404 if the ring buffer exporter is disabled.
+    """
+    ring_buffer = get_tracer().ring_buffer
+    if ring_buffer is None:
+        raise HTTPException(status_code=404, detail="Trace ring buffer disabled; set TRACING=ring.")
+    return {"spans": ring_buffer.spans(request_id)}
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Expose Prometheus metrics (Config.METRICS): request counts and latencies, per-stage
+    latency histograms, active websockets, queued and in-flight graph executions, cache hit
+    counters, LLM tokens, embedding calls, ingestion throughput and index sizes.
+
+    Returns:
+    --------
+    Response
+        Metrics in the Prometheus text exposition format; 404 if metrics are disabled.
+    """
+    if not Config.METRICS:
+        raise HTTPException(status_code=404, detail="Metrics disabled; set METRICS=true.")
+    # Collectors query the vectorstore, so scraping runs off the event loop
+    return Response(await run_in_threadpool(generate_latest, REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/{full_path:path}")
 async def serve_frontend(full_path: str):
     """
@@ -75,11 +125,13 @@ async def websocket_endpoint(websocket: WebSocket):
     - Accepts connection
     - Listens continuously for incoming JSON messages with at least "uuid" and "message" keys
     - On first message (init flag), logs initialization
-    - For subsequent messages, forwards content and uuid to UIController to process and respond
+    - For subsequent messages, forwards content and uuid to UIController to process and respond,
+      under the message's trace request ID
     - Handles JSON decode errors and general exceptions with detailed logs
     - Ensures graceful connection closure and logs connection termination
     """
     await websocket.accept()  # Accept incoming WebSocket connection
+    ACTIVE_WEBSOCKETS.inc()
     user_uuid = None  # Tracks the unique conversation identifier for logging context
     try:
         while True:
@@ -106,9 +158,12 @@ async def websocket_endpoint(websocket: WebSocket):
                         "op": "Initializing ws with client."
                     }))
                 else:
-                    # For non-init messages with content, invoke async processing logic in UIController
+                    # For non-init messages with content, invoke async processing logic in UIController;
+                    # every trace span of the answer carries the message's request ID (client-supplied
+                    # "request_id", or a generated one)
                     if message:
-                        await uicontroller.invoke_our_graph(websocket, message, user_uuid)
+                        with request_context(payload.get("request_id")):
+                            await uicontroller.invoke_our_graph(websocket, message, user_uuid)
             except json.JSONDecodeError as e:
                 # Log JSON parsing errors with context for easier debugging
                 logger.error(json.dumps({
@@ -124,6 +179,7 @@ async def websocket_endpoint(websocket: WebSocket):
             "op": f"Error: {e}"
         }))
     finally:
+        ACTIVE_WEBSOCKETS.dec()
         # On exit/close, log the connection termination event if UUID is known
         if user_uuid:
             logger.info(json.dumps({
@@ -148,11 +204,10 @@ async def upload_pdf(file: UploadFile = File(...)):
     with open(file_location, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
     
-    print("Vectorstore not found or empty. Creating it first.")
-    vector_db = VectorDBManager()
-    document_tuples = vector_db.load_documents_from_directory()
-    print(f"Loaded {len(document_tuples)} files from data directory.")
-    vector_db.create_vectorstore_incrementally(document_tuples)
+    # Only new or modified files are parsed; the manifest skips everything already embedded.
+    # Run off the event loop so open websockets keep flowing during ingestion; concurrent
+    # uploads queue on VectorDBManager.ingestion_lock, so each file is embedded once.
+    await run_in_threadpool(uicontroller.db_manager.ingest_directory)
     return {"message": f"File '{file.filename}' uploaded successfully!"}
 
 # Entry point to run the FastAPI app when executing this file directly
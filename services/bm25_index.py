@@ -0,0 +1,311 @@
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+
+# Words, optionally joined by '-', '_', '.' or '/' into codes such as "e-42", "v2.1" or "err_timeout"
+WORD_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+# Very common English words; they carry no ranking signal and would bloat the postings
+STOPWORDS = frozenset("""
+a about am an and any are as at be been but by can could did do does for from had has have
+how i if in into is it its me my no not of on or our so than that the their them then there
+these they this to us was we were what when where which who why will with would you your
+""".split())
+
+
+def is_code_token(token: str) -> bool:
+    """
+    Whether a token looks like a product code, error code, version string or identifier:
+    digits mixed with letters or separators ("e42", "x200", "e-42", "v2.1", "1.2.3"), or
+    snake_case ("err_timeout"). Hyphenated words without digits ("wi-fi", "check-in") and
+    plain numbers are ordinary words.
+    """
+    if WORD_RE.fullmatch(token) is None:
+        return False
+    if "_" in token:
+        return True
+    return any(ch.isdigit() for ch in token) and not token.isdigit()
+
+
+def tokenize(text: str) -> list:
+    """
+    Lowercased index terms of a text, stopwords removed.
+
+    Codes are indexed as written, without separators and as their parts, so "E-42",
+    "e42" and "error 42" all match a chunk mentioning "E-42".
+    """
+    terms = []
+    for word in WORD_RE.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        terms.append(word)
+        parts = re.split(r"[-_./]", word)
+        if len(parts) > 1:
+            terms.append("".join(parts))
+            terms.extend(part for part in parts if part not in STOPWORDS)
+    return terms
+
+
+class BM25Index:
+    """
+    BM25Index is an in-process inverted index over the chunks of the vectorstore, ranking
+    them with Okapi BM25 for exact keyword matches (product codes, error strings) that dense
+    retrieval tends to miss, without any embedding call.
+
+    Searches run against postings held in memory. The chunks and their postings are also
+    persisted in a local SQLite database, written incrementally: adding or deleting chunks
+    only touches their own rows, inside a transaction that save() commits, so persisting an
+    ingestion costs time proportional to the chunks it changed rather than to the corpus.
+    Chunks are keyed by the same IDs as in the vectorstore, so ingestion upserts and deletes
+    them in both places.
+
+    Attributes:
+    -----------
+    path : str
+        Path of the SQLite database backing the index.
+    k1 : float
+        BM25 term frequency saturation.
+    b : float
+        BM25 document length normalization.
+
+    Methods:
+    --------
+    add(ids, texts, metadatas=None)
+        Adds or replaces chunks.
+    delete(ids)
+        Removes chunks.
+    search(query, k)
+        Returns the IDs and scores of the k best matching chunks.
+    get_documents(ids)
+        Returns the texts and metadata of the given chunks.
+    clear()
+        Removes every chunk.
+    save()
+        Commits the changes made since the last save to disk.
+    close()
+        Closes the underlying database connection.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """
+        Loads the index from disk, starting empty if it does not exist or is unreadable.
+
+        Parameters:
+        -----------
+        path : str
+            Path of the SQLite database backing the index.
+        k1 : float
+            BM25 term frequency saturation.
+        b : float
+            BM25 document length normalization.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._documents = {}  # chunk ID -> (text, metadata)
+        self._postings = {}  # term -> {chunk ID: term frequency}
+        self._lengths = {}  # chunk ID -> number of terms
+        self._total_length = 0
+        self._dirty = False
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            self._conn = self._connect()
+            self._load()
+        except sqlite3.DatabaseError as e:
+            # A corrupt index is only a cache of the vectorstore: start over, the caller rebuilds it
+            print(f"Discarding unreadable BM25 index {path}: {e}")
+            self._documents, self._postings, self._lengths = {}, {}, {}
+            self._total_length = 0
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            self._conn = self._connect()
+
+    def _connect(self):
+        """
+        Opens (and creates if needed) the index database.
+        """
+        # Shared by ingestion and request threads; all use goes through self._lock
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " chunk_id TEXT PRIMARY KEY,"
+            " text TEXT NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " length INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL,"
+            " chunk_id TEXT NOT NULL,"
+            " frequency INTEGER NOT NULL,"
+            " PRIMARY KEY (term, chunk_id)"
+            ") WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk_id ON postings (chunk_id)")
+        conn.commit()
+        return conn
+
+    def _load(self):
+        """
+        Reads the persisted chunks and postings into memory, without re-tokenizing.
+        """
+        for chunk_id, text, metadata, length in self._conn.execute(
+            "SELECT chunk_id, text, metadata, length FROM documents"
+        ):
+            self._documents[chunk_id] = (text, json.loads(metadata))
+            self._lengths[chunk_id] = length
+            self._total_length += length
+        for term, chunk_id, frequency in self._conn.execute("SELECT term, chunk_id, frequency FROM postings"):
+            self._postings.setdefault(term, {})[chunk_id] = frequency
+
+    def _index(self, chunk_id, text, metadata):
+        """
+        Adds one chunk to the postings and the database. Must be called with the lock held.
+        """
+        if chunk_id in self._documents:
+            self._unindex(chunk_id)
+        terms = tokenize(text)
+        frequencies = {}
+        for term in terms:
+            frequencies[term] = frequencies.get(term, 0) + 1
+        for term, frequency in frequencies.items():
+            self._postings.setdefault(term, {})[chunk_id] = frequency
+        self._documents[chunk_id] = (text, metadata or {})
+        self._lengths[chunk_id] = len(terms)
+        self._total_length += len(terms)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (chunk_id, text, metadata, length) VALUES (?, ?, ?, ?)",
+            (chunk_id, text, json.dumps(metadata or {}), len(terms))
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO postings (term, chunk_id, frequency) VALUES (?, ?, ?)",
+            [(term, chunk_id, frequency) for term, frequency in frequencies.items()]
+        )
+
+    def _unindex(self, chunk_id):
+        """
+        Removes one chunk from the postings and the database. Must be called with the lock held.
+        """
+        text, _ = self._documents.pop(chunk_id)
+        for term in set(tokenize(text)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id)
+        self._conn.execute("DELETE FROM documents WHERE chunk_id = ?", (chunk_id,))
+        self._conn.execute("DELETE FROM postings WHERE chunk_id = ?", (chunk_id,))
+
+    def add(self, ids, texts, metadatas=None):
+        """
+        Adds chunks to the index, replacing any chunk already stored under the same ID.
+
+        Parameters:
+        -----------
+        ids : list of str
+            Chunk IDs, as used in the vectorstore.
+        texts : list of str
+            Chunk texts.
+        metadatas : list of dict or None
+            Chunk metadata, returned with the documents.
+        """
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                self._index(chunk_id, text, metadata)
+            self._dirty = True
+
+    def delete(self, ids):
+        """
+        Removes chunks from the index; unknown IDs are ignored.
+        """
+        with self._lock:
+            for chunk_id in ids:
+                if chunk_id in self._documents:
+                    self._unindex(chunk_id)
+                    self._dirty = True
+
+    def search(self, query: str, k: int = 4) -> list:
+        """
+        Ranks the indexed chunks against a query with BM25.
+
+        Parameters:
+        -----------
+        query : str
+            Free-text query; it is tokenized like the chunks.
+        k : int
+            Maximum number of results.
+
+        Returns:
+        --------
+        list of (str, float)
+            (chunk ID, score) pairs of the chunks matching at least one query term,
+            best first.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._documents)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count or 1.0
+            scores = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1.0 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, frequency in postings.items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1.0) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def get_documents(self, ids) -> list:
+        """
+        Returns (chunk ID, text, metadata) for every given ID still in the index, in order.
+        """
+        with self._lock:
+            return [(chunk_id, *self._documents[chunk_id]) for chunk_id in ids if chunk_id in self._documents]
+
+    def clear(self):
+        """
+        Removes every chunk from the index.
+        """
+        with self._lock:
+            self._documents, self._postings, self._lengths = {}, {}, {}
+            self._total_length = 0
+            self._conn.execute("DELETE FROM documents")
+            self._conn.execute("DELETE FROM postings")
+            self._dirty = True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._documents)
+
+    def save(self):
+        """
+        Commits the chunks added or deleted since the index was loaded or last saved.
+
+        Changes are written as they are made but only become durable here, in one
+        transaction, so a crash mid-ingestion leaves the previously saved index intact.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._conn.commit()
+            self._dirty = False
+
+    def close(self):
+        """
+        Closes the underlying database connection; uncommitted changes are discarded.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,67 @@
+import uuid
+
+# Fixed namespace so the same chunk always maps to the same ID across processes and machines
+CHUNK_ID_NAMESPACE = uuid.UUID("5c0f7d1e-4a7b-4f0e-9a53-2b8f4e6c1d90")
+
+
+def make_chunk_id(file_hash: str, page, start_index, chunker_config: str) -> str:
+    """
+    Derives a stable chunk ID from the chunk's origin.
+
+    Parameters:
+    -----------
+    file_hash : str
+        Content hash of the source file.
+    page : int or None
+        Page number of the chunk within the source file (None for page-less formats).
+    start_index : int or None
+        Character offset of the chunk within its page.
+    chunker_config : str
+        Description of the splitter settings that produced the chunk.
+
+    Returns:
+    --------
+    str
+        UUID5 string that is identical for identical inputs.
+    """
+    key = f"{file_hash}|{page}|{start_index}|{chunker_config}"
+    return str(uuid.uuid5(CHUNK_ID_NAMESPACE, key))
+
+
+def assign_chunk_ids(chunks, file_hash: str, chunker_config: str) -> list:
+    """
+    Computes deterministic IDs for the chunks of one file and stores them on each Document.
+
+    Chunks must carry 'start_index' metadata (splitter created with add_start_index=True).
+    Exact duplicates (same page and offset) are dropped so a single upsert never
+    contains the same ID twice.
+
+    Parameters:
+    -----------
+    chunks : list of Document
+        Chunks produced by splitting one source file.
+    file_hash : str
+        Content hash of the source file.
+    chunker_config : str
+        Description of the splitter settings that produced the chunks.
+
+    Returns:
+    --------
+    tuple (list of Document, list of str)
+        The de-duplicated chunks and their IDs, in the same order.
+    """
+    unique_chunks, ids, seen = [], [], set()
+    for chunk in chunks:
+        chunk_id = make_chunk_id(
+            file_hash,
+            chunk.metadata.get("page"),
+            chunk.metadata.get("start_index"),
+            chunker_config
+        )
+        if chunk_id in seen:
+            continue
+        seen.add(chunk_id)
+        chunk.id = chunk_id
+        unique_chunks.append(chunk)
+        ids.append(chunk_id)
+    return unique_chunks, ids
@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+    RATE_LIMIT_ERRORS = (ResourceExhausted, TooManyRequests)
+except ImportError:  # google-api-core is optional outside the Gemini backend
+    RATE_LIMIT_ERRORS = ()
+
+from services.metrics import EMBEDDED_CHUNKS, EMBEDDING_REQUESTS, EMBEDDING_RETRIES, EMBEDDING_TEXTS
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Checks whether an exception (or any exception it wraps) is an HTTP 429 / quota error.
+
+    langchain_google_genai re-raises API errors as GoogleGenerativeAIError, so the
+    original exception is looked up through the __cause__/__context__ chain and the
+    message is checked as a fallback.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if RATE_LIMIT_ERRORS and isinstance(error, RATE_LIMIT_ERRORS):
+            return True
+        message = str(error).lower()
+        if "429" in message or "resource exhausted" in message or "rate limit" in message:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class BatchEmbedder:
+    """
+    BatchEmbedder embeds large lists of texts in fixed-size batches sent concurrently,
+    retrying rate-limited batches with exponential backoff.
+
+    Attributes:
+    -----------
+    embeddings : Embeddings
+        LangChain embeddings client used for each batch (embed_documents).
+    batch_size : int
+        Number of texts per embeddings request.
+    max_concurrency : int
+        Maximum number of batches in flight at once.
+    max_retries : int
+        Number of retries for a rate-limited batch before giving up.
+    backoff_base : float
+        Initial backoff delay in seconds; doubled on every retry, with full jitter.
+    backoff_max : float
+        Upper bound for a single backoff delay in seconds.
+    cache : EmbeddingCache or None
+        Persistent cache consulted before calling the API; new vectors are written back.
+
+    Methods:
+    --------
+    embed(texts)
+        Returns one vector per text, in input order.
+    stats()
+        Returns cumulative counters and the chunks/sec throughput.
+    """
+
+    def __init__(self, embeddings, batch_size=100, max_concurrency=4, max_retries=5,
+                 backoff_base=1.0, backoff_max=60.0, cache=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._counters = {"chunks": 0, "cached": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+
+    @property
+    def window_size(self) -> int:
+        """
+        Number of texts that keeps every concurrent slot busy with a full batch.
+        """
+        return self.batch_size * self.max_concurrency
+
+    def embed(self, texts) -> list:
+        """
+        Embeds texts in batches of batch_size, with up to max_concurrency batches in flight.
+
+        When a cache is configured, only texts missing from it are sent to the API.
+
+        Parameters:
+        -----------
+        texts : list of str
+            Texts to embed.
+
+        Returns:
+        --------
+        list of list of float
+            One vector per input text, in input order.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        started = time.perf_counter()
+        vectors = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = [index for index, vector in enumerate(vectors) if vector is None]
+        missing_texts = [texts[index] for index in missing]
+
+        batches = [missing_texts[i:i + self.batch_size] for i in range(0, len(missing_texts), self.batch_size)]
+        if len(batches) <= 1 or self.max_concurrency == 1:
+            results = [self._embed_with_retry(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                results = list(executor.map(self._embed_with_retry, batches))
+        computed = [vector for batch_vectors in results for vector in batch_vectors]
+        for index, vector in zip(missing, computed):
+            vectors[index] = vector
+        if self.cache is not None and computed:
+            self.cache.put_many(missing_texts, computed)
+
+        EMBEDDED_CHUNKS.labels("cache").inc(len(texts) - len(missing))
+        EMBEDDED_CHUNKS.labels("api").inc(len(missing))
+        with self._lock:
+            self._counters["chunks"] += len(texts)
+            self._counters["cached"] += len(texts) - len(missing)
+            self._counters["batches"] += len(batches)
+            self._counters["seconds"] += time.perf_counter() - started
+        return vectors
+
+    def _embed_with_retry(self, batch) -> list:
+        """
+        Embeds one batch, sleeping with exponential backoff and jitter on 429 responses.
+        """
+        attempt = 0
+        while True:
+            EMBEDDING_REQUESTS.labels("documents").inc()
+            EMBEDDING_TEXTS.labels("documents").inc(len(batch))
+            try:
+                return self.embeddings.embed_documents(batch)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limit_error(e):
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+                attempt += 1
+                with self._lock:
+                    self._counters["retries"] += 1
+                EMBEDDING_RETRIES.inc()
+                print(f"Embedding batch rate limited, retry {attempt}/{self.max_retries} in {delay:.1f}s.")
+                time.sleep(delay)
+
+    def stats(self) -> dict:
+        """
+        Returns cumulative counters: chunks, cached (served from the cache), batches,
+        retries, seconds and chunks_per_sec.
+
+        'seconds' is wall-clock time spent inside embed(), so chunks_per_sec reflects
+        end-to-end embedding throughput including concurrency and backoff.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats["chunks_per_sec"] = stats["chunks"] / stats["seconds"] if stats["seconds"] else 0.0
+        return stats
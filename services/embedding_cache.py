@@ -0,0 +1,227 @@
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.lru_cache import TTLCache
+from services.metrics import EMBEDDING_REQUESTS, EMBEDDING_TEXTS
+from services.tracing import span
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text for cache keys by collapsing all runs of whitespace to single spaces.
+    """
+    return " ".join(text.split())
+
+
+def text_hash(text: str) -> str:
+    """
+    Returns the sha256 hex digest of the normalized text.
+    """
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    EmbeddingCache persists document embeddings in a local SQLite database so that
+    unchanged text is never sent to the embeddings API twice, even across full rebuilds
+    of the vectorstore.
+
+    Entries are keyed by (embedding model name, sha256 of the normalized text) and the
+    vectors are stored as raw float32 or float16 blobs.
+
+    Attributes:
+    -----------
+    path : str
+        Path of the SQLite database file.
+    model_name : str
+        Embedding model the cached vectors belong to.
+    dtype : numpy.dtype
+        Storage precision of the vectors (float32 or float16).
+    hits : int
+        Number of texts served from the cache.
+    misses : int
+        Number of texts not found in the cache.
+
+    Methods:
+    --------
+    get_many(texts)
+        Returns the cached vector for each text, or None when it is missing.
+    put_many(texts, vectors)
+        Stores vectors for the given texts.
+    """
+
+    # SQLite's default limit on host parameters per statement is 999
+    QUERY_CHUNK = 500
+
+    def __init__(self, path: str, model_name: str, dtype: str = "float32"):
+        """
+        Opens (and creates if needed) the cache database.
+
+        Parameters:
+        -----------
+        path : str
+            Path of the SQLite database file.
+        model_name : str
+            Embedding model the cached vectors belong to.
+        dtype : str
+            'float32' or 'float16' storage precision.
+        """
+        self.path = path
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Accessed from ingestion worker threads; all use goes through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " text_hash TEXT NOT NULL,"
+            " dtype TEXT NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, text_hash)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def get_many(self, texts) -> list:
+        """
+        Looks up the cached vector of every text.
+
+        Parameters:
+        -----------
+        texts : list of str
+            Texts to look up.
+
+        Returns:
+        --------
+        list of (list of float or None)
+            The cached vector for each text, or None when it is not cached.
+        """
+        keys = [text_hash(text) for text in texts]
+        found = {}
+        with self._lock:
+            unique_keys = list(set(keys))
+            for i in range(0, len(unique_keys), self.QUERY_CHUNK):
+                chunk = unique_keys[i:i + self.QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, dtype, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self.model_name, *chunk]
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype(np.float32).tolist()
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for result in results if result is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts, vectors):
+        """
+        Stores vectors for the given texts, replacing any previous entry.
+
+        Parameters:
+        -----------
+        texts : list of str
+            Texts the vectors were computed from.
+        vectors : list of list of float
+            One vector per text.
+        """
+        rows = [
+            (self.model_name, text_hash(text), self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dtype, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the hit rate since this cache was opened.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    CachedQueryEmbeddings wraps an embeddings client and memoizes query embeddings in an
+    in-process LRU/TTL cache, so repeated questions skip the embedding round trip.
+
+    Queries are keyed on their normalized text (case-folded, whitespace collapsed).
+    Every query embedding is timed as an 'embedding.query' trace span, cache hits included.
+    Document embeddings are passed straight through to the wrapped client.
+
+    Attributes:
+    -----------
+    embeddings : Embeddings
+        The wrapped embeddings client.
+    cache : TTLCache
+        Query embedding cache with hit/miss counters.
+
+    Methods:
+    --------
+    embed_query(text) / aembed_query(text)
+        Returns the cached query vector, computing it on a miss.
+    embed_documents(texts) / aembed_documents(texts)
+        Delegates to the wrapped client.
+    """
+
+    def __init__(self, embeddings, maxsize: int = 1024, ttl: float = 3600):
+        self.embeddings = embeddings
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return normalize_text(text).casefold()
+
+    def embed_query(self, text: str) -> list:
+        with span("embedding.query") as current:
+            key = self._key(text)
+            vector = self.cache.get(key)
+            current.set_attribute("cache_hit", vector is not None)
+            if vector is None:
+                EMBEDDING_REQUESTS.labels("query").inc()
+                EMBEDDING_TEXTS.labels("query").inc()
+                vector = self.embeddings.embed_query(text)
+                self.cache.set(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list:
+        with span("embedding.query") as current:
+            key = self._key(text)
+            vector = self.cache.get(key)
+            current.set_attribute("cache_hit", vector is not None)
+            if vector is None:
+                EMBEDDING_REQUESTS.labels("query").inc()
+                EMBEDDING_TEXTS.labels("query").inc()
+                vector = await self.embeddings.aembed_query(text)
+                self.cache.set(key, vector)
+        return vector
+
+    def embed_documents(self, texts) -> list:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts) -> list:
+        return await self.embeddings.aembed_documents(texts)
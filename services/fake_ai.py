@@ -0,0 +1,218 @@
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+# Words that make the fake model escalate a query. Deliberately independent of (and cruder
+# than) SentimentAnalyzer's rules, so a test can tell the LLM's routing decision apart from
+# the local classifier's.
+ESCALATION_WORDS = frozenset({"human", "person", "agent", "representative", "manager", "supervisor"})
+
+
+class SimulatedLLMError(RuntimeError):
+    """
+    Raised by FakeChatModel for the share of calls selected by its failure_rate.
+    """
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    FakeChatModel is a deterministic, local stand-in for the Gemini chat model, used when
+    Config.AI_BACKEND is 'fake' to load-test the server, graph and retrieval path without
+    spending quota or measuring provider jitter.
+
+    Replies depend only on the prompt:
+    - sentiment prompts get the fixed `sentiment` reply if one is set, otherwise 'negative'
+      when the query mentions a human role (ESCALATION_WORDS) and 'positive' if not;
+    - other prompts get an answer made of the first answer_tokens words of the prompt's
+      context ("I don't know." without context);
+    - structured output (with_structured_output) is produced as a tool call whose boolean
+      fields carry the escalation decision and string fields the answer.
+
+    Timing follows a simple provider model: `latency` seconds before the first token, then
+    `tokens_per_sec` output tokens per second, both when streaming and when not. A fraction
+    `failure_rate` of the calls raises SimulatedLLMError after the first-token latency.
+    Token usage (prompt and reply words) is reported as usage_metadata.
+
+    Attributes:
+    -----------
+    model : str
+        Model name reported to callers (and used in response cache keys).
+    latency : float
+        Seconds before the first token.
+    tokens_per_sec : float
+        Output tokens per second (0 disables the per-token delay).
+    failure_rate : float
+        Probability in [0, 1] that a call fails.
+    answer_tokens : int
+        Maximum number of words in a generated answer.
+    seed : int or None
+        Seed of the failure draws, for reproducible runs.
+    sentiment : str or None
+        Fixed reply ('positive' or 'negative') to every routing decision, or None to
+        decide from the query.
+    """
+
+    model: str = "fake-chat"
+    latency: float = 0.5
+    tokens_per_sec: float = 50.0
+    failure_rate: float = 0.0
+    answer_tokens: int = 60
+    seed: Optional[int] = None
+    sentiment: Optional[str] = None
+
+    _rng: Any = PrivateAttr(default=None)
+    _rng_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        """
+        Binds tool schemas; the model always answers by calling the first one.
+        """
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _query(self, prompt: str) -> str:
+        """
+        The customer query of a prompt: the text after its last 'Query:' or 'Question:'.
+        """
+        matches = list(re.finditer(r"(?:Query|Question):", prompt))
+        return prompt[matches[-1].end():].strip() if matches else prompt
+
+    def _escalates(self, prompt: str) -> bool:
+        if self.sentiment is not None:
+            return self.sentiment == "negative"
+        query = self._query(prompt).split("\n")[0]
+        return not ESCALATION_WORDS.isdisjoint(re.findall(r"[a-z]+", query.lower()))
+
+    def _answer(self, prompt: str) -> str:
+        match = re.search(r"Context:(.*?)(?:Question:|$)", prompt, re.DOTALL)
+        words = match.group(1).split()[:self.answer_tokens] if match else []
+        return " ".join(words) if words else "I don't know."
+
+    def _reply(self, messages, tools) -> AIMessage:
+        """
+        Builds the deterministic reply to a prompt, with its usage metadata.
+        """
+        prompt = "\n".join(str(message.content) for message in messages)
+        input_tokens = len(prompt.split())
+        if tools:
+            function = tools[0]["function"]
+            args = {}
+            for name, spec in function.get("parameters", {}).get("properties", {}).items():
+                if spec.get("type") == "boolean":
+                    args[name] = self._escalates(prompt)
+                elif spec.get("type") == "string":
+                    args[name] = "" if self._escalates(prompt) else self._answer(prompt)
+            output_tokens = sum(len(str(value).split()) for value in args.values()) + 1
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+                usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                                "total_tokens": input_tokens + output_tokens},
+                response_metadata={"model_name": self.model},
+            )
+        if "sentiment" in prompt.lower():
+            content = "negative" if self._escalates(prompt) else "positive"
+        else:
+            content = self._answer(prompt)
+        output_tokens = len(content.split())
+        return AIMessage(
+            content=content,
+            usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens},
+            response_metadata={"model_name": self.model},
+        )
+
+    def _fails(self) -> bool:
+        if not self.failure_rate:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < self.failure_rate
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+
+    def _generation_time(self, message: AIMessage) -> float:
+        return self.latency + message.usage_metadata["output_tokens"] * self._token_delay()
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message = self._reply(messages, tools)
+        if self._fails():
+            time.sleep(self.latency)
+            raise SimulatedLLMError("Simulated LLM failure")
+        time.sleep(self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message = self._reply(messages, tools)
+        if self._fails():
+            await asyncio.sleep(self.latency)
+            raise SimulatedLLMError("Simulated LLM failure")
+        await asyncio.sleep(self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage) -> list:
+        """
+        Splits a reply into streamed chunks: one per word, usage and model name attached to
+        the last one.
+        Tool calls are not split.
+        """
+        if message.tool_calls or not message.content:
+            return [AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": 0}
+                    for call in message.tool_calls
+                ],
+                usage_metadata=message.usage_metadata,
+                response_metadata=message.response_metadata,
+            )]
+        words = message.content.split(" ")
+        return [
+            AIMessageChunk(
+                content=word + (" " if index < len(words) - 1 else ""),
+                usage_metadata=message.usage_metadata if index == len(words) - 1 else None,
+                response_metadata=message.response_metadata if index == len(words) - 1 else {},
+            )
+            for index, word in enumerate(words)
+        ]
+
+    def _stream(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        message = self._reply(messages, tools)
+        time.sleep(self.latency)
+        if self._fails():
+            raise SimulatedLLMError("Simulated LLM failure")
+        for chunk in self._chunks(message):
+            time.sleep(self._token_delay())
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    async def _astream(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        message = self._reply(messages, tools)
+        await asyncio.sleep(self.latency)
+        if self._fails():
+            raise SimulatedLLMError("Simulated LLM failure")
+        for chunk in self._chunks(message):
+            await asyncio.sleep(self._token_delay())
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
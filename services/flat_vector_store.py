@@ -0,0 +1,492 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import namedtuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+
+# Arrays a search scans, captured under the store's lock (see FlatVectorStore._snapshot)
+_ScanSnapshot = namedtuple("_ScanSnapshot", ["matrix", "codes", "scales", "valid", "row_ids", "used_rows"])
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple:
+    """
+    Symmetric per-row int8 quantization.
+
+    Returns:
+    --------
+    tuple (np.ndarray, np.ndarray)
+        int8 codes with the shape of vectors, and one float32 scale per row such that
+        codes * scale approximates the row.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=-1) / 127.0
+    safe = np.where(scales == 0, 1.0, scales)
+    codes = np.clip(np.rint(vectors / safe[..., None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+    """
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _open_memmap(path: str):
+    """
+    Opens a .npy file as a writable memory map, or returns None if it does not exist.
+    """
+    return np.load(path, mmap_mode="r+") if os.path.exists(path) else None
+
+
+def _grow_memmap(path: str, current, shape: tuple, dtype):
+    """
+    Creates a .npy memory map of the given shape, copying the rows of `current` (if any).
+
+    The file is written next to the target and renamed over it, so readers never see a
+    partial file.
+    """
+    tmp_path = path + ".tmp.npy"
+    grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+    if current is not None:
+        grown[:current.shape[0]] = current
+    grown.flush()
+    del grown
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r+")
+
+
+class FlatVectorStore(VectorStore):
+    """
+    FlatVectorStore is an exact (brute-force) vectorstore backed by a memory-mapped NumPy
+    matrix, used instead of Chroma when Config.VECTOR_BACKEND is 'flat'.
+
+    Every chunk embedding is stored L2-normalized as one float32 row of `vectors.npy`, so a
+    query is a single matrix-vector product (BLAS) followed by a partial sort, and scores
+    are cosine similarities. The matrix is opened with np.memmap: opening the store reads
+    no vectors, and several worker processes searching the same directory share the pages
+    through the OS page cache instead of each holding its own copy.
+
+    Chunk IDs, texts and metadata live in a SQLite sidecar (`chunks.sqlite3`) mapping each
+    chunk to its matrix row. Deleted rows are zeroed and reused by later inserts; the matrix
+    grows by doubling. Other processes writing to the same directory are picked up before
+    the next search (via SQLite's data_version).
+
+    With quantization='int8', every row is also stored as int8 codes with a per-row scale
+    (`codes_int8.npy`, `scales.npy`), about 4x smaller than float32. Searches scan the codes
+    only, then re-rank the best k * rerank_factor candidates exactly against their float32
+    rows, so only those few rows of vectors.npy are ever paged in. Use
+    benchmarks/quantization_recall.py to measure the recall this costs on a given index.
+
+    Attributes:
+    -----------
+    path : str
+        Directory holding vectors.npy and chunks.sqlite3.
+    embedding_function : Embeddings
+        Client used to embed queries (and texts passed to add_texts).
+    quantization : str
+        'none' (exact float32 scan) or 'int8' (int8 scan with exact re-rank).
+    rerank_factor : int
+        With int8 quantization, candidates re-ranked exactly per requested result.
+
+    Methods:
+    --------
+    upsert_embeddings(ids, embeddings, texts, metadatas)
+        Writes precomputed embeddings, replacing chunks stored under the same IDs.
+    add_texts(texts, metadatas=None, ids=None)
+        Embeds and stores texts.
+    delete(ids)
+        Removes chunks.
+    similarity_search(query, k) / asimilarity_search(query, k)
+        Returns the k chunks most similar to a query.
+    similarity_search_by_vector(embedding, k)
+        Returns the k chunks most similar to an embedding.
+    get_by_ids(ids)
+        Returns the stored chunks with the given IDs.
+    get_vectors(ids)
+        Returns the stored (normalized) float32 embeddings of the given chunks.
+    memory_stats()
+        Returns the bytes per chunk scanned by a search and the matrix sizes.
+    count()
+        Number of stored chunks.
+    get_chunks(offset, limit)
+        Pages through the stored chunks as (IDs, texts, metadatas).
+    """
+
+    INITIAL_CAPACITY = 1024
+    # Rows of int8 codes converted to float32 at a time while scanning
+    SCAN_BLOCK_ROWS = 4096
+
+    def __init__(self, path: str, embedding_function=None, quantization: str = "none", rerank_factor: int = 4):
+        """
+        Opens (and creates if needed) the store in a directory.
+
+        Parameters:
+        -----------
+        path : str
+            Directory holding vectors.npy and chunks.sqlite3.
+        embedding_function : Embeddings or None
+            Client used to embed queries; only precomputed embeddings can be stored without it.
+        quantization : str
+            'none' or 'int8'; int8 codes are built from the float32 rows if missing.
+        rerank_factor : int
+            With int8 quantization, candidates re-ranked exactly per requested result.
+        """
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unknown quantization {quantization!r}; expected 'none' or 'int8'.")
+        self.path = path
+        self.embedding_function = embedding_function
+        self.quantization = quantization
+        self.rerank_factor = max(1, rerank_factor)
+        self._matrix_path = os.path.join(path, "vectors.npy")
+        self._codes_path = os.path.join(path, "codes_int8.npy")
+        self._scales_path = os.path.join(path, "scales.npy")
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        # Shared by concurrent requests; all use goes through self._lock
+        self._conn = sqlite3.connect(os.path.join(path, "chunks.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " id TEXT PRIMARY KEY,"
+            " row INTEGER NOT NULL UNIQUE,"
+            " document TEXT NOT NULL,"
+            " metadata TEXT NOT NULL"
+            ")"
+        )
+        self._conn.commit()
+        self._data_version = None
+        self._refresh()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    def _refresh(self):
+        """
+        (Re)loads the row mapping and reopens the matrix if the sidecar changed since the
+        last load, e.g. because another process ingested. Must be called with the lock held.
+        """
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        self._matrix = _open_memmap(self._matrix_path)
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        # Codes are kept up to date whenever they exist, even if this handle does not scan them
+        self._codes = _open_memmap(self._codes_path)
+        self._scales = _open_memmap(self._scales_path)
+        if self._codes is not None and self._codes.shape[0] != capacity:
+            self._codes = self._scales = None
+        if self._codes is None and self.quantization == "int8" and self._matrix is not None:
+            self._build_codes()
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._row_ids = [None] * capacity
+        self._rows = {}
+        for chunk_id, row in self._conn.execute("SELECT id, row FROM chunks"):
+            self._rows[chunk_id] = row
+            self._row_ids[row] = chunk_id
+            self._valid[row] = True
+        self._free = sorted(np.flatnonzero(~self._valid).tolist(), reverse=True)
+        # Rows past the last used one are never scanned; free rows are reused lowest first
+        self._used_rows = max(self._rows.values(), default=-1) + 1
+
+    def _ensure_capacity(self, rows: int, dim: int):
+        """
+        Creates or grows (by doubling) the matrix so it holds at least `rows` rows.
+        Must be called with the lock held.
+        """
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {dim} does not match the store ({self._matrix.shape[1]}).")
+            if self._matrix.shape[0] >= rows:
+                return
+        old_capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        capacity = max(self.INITIAL_CAPACITY, old_capacity)
+        while capacity < rows:
+            capacity *= 2
+        self._matrix = _grow_memmap(self._matrix_path, self._matrix, (capacity, dim), np.float32)
+        if self._codes is not None or self.quantization == "int8":
+            self._codes = _grow_memmap(self._codes_path, self._codes, (capacity, dim), np.int8)
+            self._scales = _grow_memmap(self._scales_path, self._scales, (capacity,), np.float32)
+        self._valid = np.concatenate([self._valid, np.zeros(capacity - old_capacity, dtype=bool)])
+        self._row_ids.extend([None] * (capacity - old_capacity))
+        self._free = list(range(capacity - 1, old_capacity - 1, -1)) + self._free
+
+    def upsert_embeddings(self, ids, embeddings, texts, metadatas=None):
+        """
+        Stores chunks with precomputed embeddings, replacing chunks stored under the same IDs.
+
+        Parameters:
+        -----------
+        ids : list of str
+            Chunk IDs.
+        embeddings : list of list of float
+            One embedding per chunk; all must have the store's dimension.
+        texts : list of str
+            Chunk texts.
+        metadatas : list of dict or None
+            Chunk metadata.
+        """
+        if not ids:
+            return
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            self._refresh()
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._rows]
+            self._ensure_capacity(len(self._rows) + len(new_ids), vectors.shape[1])
+            for chunk_id in new_ids:
+                self._rows[chunk_id] = self._free.pop()
+            rows = [self._rows[chunk_id] for chunk_id in ids]
+            # Vectors are written before the sidecar commit, so no reader sees a row without its vector
+            self._matrix[rows] = vectors
+            self._matrix.flush()
+            if self._codes is not None:
+                self._codes[rows], self._scales[rows] = quantize_int8(vectors)
+                self._codes.flush()
+                self._scales.flush()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, row, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (chunk_id, row, text, json.dumps(metadata or {}))
+                    for chunk_id, row, text, metadata in zip(ids, rows, texts, metadatas)
+                ]
+            )
+            self._conn.commit()
+            for chunk_id, row in zip(ids, rows):
+                self._row_ids[row] = chunk_id
+                self._valid[row] = True
+            self._used_rows = max(self._used_rows, max(rows) + 1)
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        """
+        Embeds texts with the embedding function and stores them.
+
+        Returns:
+        --------
+        list of str
+            IDs of the stored chunks (random UUIDs when ids is None).
+        """
+        texts = list(texts)
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        self.upsert_embeddings(ids, self.embedding_function.embed_documents(texts), texts, metadatas)
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, *, ids=None, path=None, **kwargs):
+        store = cls(path, embedding_function=embedding)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+    def delete(self, ids=None, **kwargs):
+        """
+        Removes chunks; unknown IDs are ignored.
+        """
+        if not ids:
+            return True
+        with self._lock:
+            self._refresh()
+            rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+            if not rows:
+                return True
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+            self._conn.commit()
+            self._valid[rows] = False
+            self._matrix[rows] = 0.0
+            self._matrix.flush()
+            if self._codes is not None:
+                self._codes[rows] = 0
+                self._scales[rows] = 0.0
+            for row in rows:
+                self._row_ids[row] = None
+            self._free.extend(rows)
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        return True
+
+    def _documents(self, chunk_ids) -> list:
+        """
+        Loads the text and metadata of chunks from the sidecar, in the given order.
+        """
+        placeholders = ",".join("?" * len(chunk_ids))
+        with self._lock:
+            found = {
+                chunk_id: (document, metadata)
+                for chunk_id, document, metadata in self._conn.execute(
+                    f"SELECT id, document, metadata FROM chunks WHERE id IN ({placeholders})", chunk_ids
+                )
+            }
+        return [
+            Document(id=chunk_id, page_content=found[chunk_id][0], metadata=json.loads(found[chunk_id][1]))
+            for chunk_id in chunk_ids if chunk_id in found
+        ]
+
+    def _snapshot(self):
+        """
+        Captures what a search scans, so the scan itself can run without the lock.
+        Must be called with the lock held.
+
+        The memmaps are shared, not copied: a concurrent write may update a row mid-scan.
+        The chunk ID of every row is captured here, and a hit is only kept if its chunk
+        still owns that row afterwards, so a row deleted and reused by another chunk
+        during the scan never lends its old score to the new chunk.
+        """
+        codes = self._codes if self.quantization == "int8" else None
+        return _ScanSnapshot(
+            self._matrix, codes, self._scales if codes is not None else None,
+            self._valid[:self._used_rows].copy(), self._row_ids[:self._used_rows], self._used_rows
+        )
+
+    def _top_rows(self, snapshot, vector: np.ndarray, k: int):
+        """
+        Returns the rows and cosine similarities of the k valid rows most similar to a
+        normalized query vector, best first, scanning a snapshot (see _snapshot).
+        """
+        if vector.shape[0] != snapshot.matrix.shape[1]:
+            raise ValueError(f"Query dimension {vector.shape[0]} does not match the store ({snapshot.matrix.shape[1]}).")
+        valid = snapshot.valid
+        k = min(k, int(valid.sum()))
+        if snapshot.codes is not None:
+            scores = self._approximate_scores(snapshot, vector)
+            scores[~valid] = -np.inf
+            candidates = np.sort(_top_k(scores, min(k * self.rerank_factor, int(valid.sum()))))
+            # Exact re-rank: only the candidate rows of the float32 matrix are read
+            exact = snapshot.matrix[candidates] @ vector
+            top = _top_k(exact, k)
+            return candidates[top], exact[top]
+        scores = snapshot.matrix[:snapshot.used_rows] @ vector
+        scores[~valid] = -np.inf
+        top = _top_k(scores, k)
+        return top, scores[top]
+
+    def _approximate_scores(self, snapshot, vector: np.ndarray) -> np.ndarray:
+        """
+        Scores every used row of a snapshot from its int8 codes, one block at a time so
+        the float32 copy of the codes never exceeds SCAN_BLOCK_ROWS rows.
+        """
+        used_rows = snapshot.used_rows
+        scores = np.empty(used_rows, dtype=np.float32)
+        for start in range(0, used_rows, self.SCAN_BLOCK_ROWS):
+            stop = min(start + self.SCAN_BLOCK_ROWS, used_rows)
+            scores[start:stop] = snapshot.codes[start:stop].astype(np.float32) @ vector
+        scores *= snapshot.scales[:used_rows]
+        return scores
+
+    def _build_codes(self):
+        """
+        Quantizes every row of the float32 matrix into new code and scale files.
+        Must be called with the lock held.
+        """
+        capacity, dim = self._matrix.shape
+        self._codes = _grow_memmap(self._codes_path, None, (capacity, dim), np.int8)
+        self._scales = _grow_memmap(self._scales_path, None, (capacity,), np.float32)
+        for start in range(0, capacity, self.SCAN_BLOCK_ROWS):
+            stop = min(start + self.SCAN_BLOCK_ROWS, capacity)
+            self._codes[start:stop], self._scales[start:stop] = quantize_int8(self._matrix[start:stop])
+        self._codes.flush()
+        self._scales.flush()
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4) -> list:
+        """
+        Returns the k chunks most similar to an embedding with their cosine similarity.
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or not self._rows:
+                return []
+            snapshot = self._snapshot()
+        # The scan runs unlocked so concurrent searches and ingestion writes do not queue behind it
+        rows, scores = self._top_rows(snapshot, vector, k)
+        with self._lock:
+            self._refresh()
+            hits = [
+                (snapshot.row_ids[row], score) for row, score in zip(rows, scores)
+                if self._rows.get(snapshot.row_ids[row]) == row
+            ]
+        documents = {document.id: document for document in self._documents([chunk_id for chunk_id, _ in hits])}
+        return [
+            (documents[chunk_id], float(score))
+            for chunk_id, score in hits if chunk_id in documents
+        ]
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs) -> list:
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_with_score_by_vector(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        # Only the embedding call is awaited; the search itself is a single matmul
+        return self.similarity_search_by_vector(await self.embedding_function.aembed_query(query), k)
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped to a relevance in [0, 1]
+        return lambda similarity: (similarity + 1.0) / 2.0
+
+    def get_by_ids(self, ids) -> list:
+        return self._documents(list(ids)) if ids else []
+
+    def get_vectors(self, ids) -> np.ndarray:
+        """
+        Returns the stored (L2-normalized) float32 embeddings of the given chunks, in order;
+        unknown IDs are skipped.
+        """
+        with self._lock:
+            self._refresh()
+            rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+            if not rows:
+                return np.zeros((0, 0 if self._matrix is None else self._matrix.shape[1]), dtype=np.float32)
+            return np.array(self._matrix[rows])
+
+    def memory_stats(self) -> dict:
+        """
+        Returns the number of chunks, the bytes per chunk read by a search scan and the
+        sizes of the float32 matrix and int8 codes.
+        """
+        with self._lock:
+            self._refresh()
+            dim = 0 if self._matrix is None else self._matrix.shape[1]
+            quantized = self.quantization == "int8" and self._codes is not None
+            return {
+                "chunks": len(self._rows),
+                "dim": dim,
+                "quantization": self.quantization,
+                "scan_bytes_per_chunk": dim + 4 if quantized else 4 * dim,
+                "float32_bytes": 0 if self._matrix is None else self._matrix.nbytes,
+                "int8_bytes": 0 if self._codes is None else self._codes.nbytes + self._scales.nbytes,
+            }
+
+    def count(self) -> int:
+        """
+        Returns the number of stored chunks.
+        """
+        with self._lock:
+            self._refresh()
+            return len(self._rows)
+
+    def get_chunks(self, offset: int = 0, limit: int = 1000) -> tuple:
+        """
+        Returns one page of stored chunks as (IDs, texts, metadatas), in row order.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, document, metadata FROM chunks ORDER BY row LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows], [json.loads(row[2]) for row in rows]
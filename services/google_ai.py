@@ -1,5 +1,8 @@
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from config import Config
+from services.fake_ai import FakeChatModel
+from services.hash_embeddings import HashEmbeddings
+from services.metrics import LLMMetricsCallback
 
 class GoogleAI:
     """
@@ -9,6 +12,9 @@ class GoogleAI:
     -----------------
     - Provide a Language Model (LLM) client instance configured with model name, temperature, and API key.
     - Provide an embeddings client instance configured with embedding model and API key.
+    - With Config.AI_BACKEND = 'fake', provide local, deterministic stand-ins instead
+      (FakeChatModel and HashEmbeddings), so load tests never call the provider.
+    - Attach an LLMMetricsCallback to every LLM, counting its calls and tokens.
 
     Usage:
     ------
@@ -28,13 +34,23 @@ class GoogleAI:
 
         Returns:
         --------
-        ChatGoogleGenerativeAI
-            Configured language model client for chat/completions.
+        ChatGoogleGenerativeAI or FakeChatModel
+            Configured language model client for chat/completions; a FakeChatModel with the
+            Config.FAKE_LLM_* latency, throughput and failure rate when AI_BACKEND is 'fake'.
         """
+        if Config.AI_BACKEND == "fake":
+            return FakeChatModel(
+                latency=Config.FAKE_LLM_LATENCY,
+                tokens_per_sec=Config.FAKE_LLM_TOKENS_PER_SEC,
+                failure_rate=Config.FAKE_LLM_FAILURE_RATE,
+                answer_tokens=Config.FAKE_LLM_ANSWER_TOKENS,
+                callbacks=[LLMMetricsCallback("fake-chat")]
+            )
         return ChatGoogleGenerativeAI(
             model=Config.MODEL_NAME,
             temperature=0.5,
-            google_api_key=Config.GOOGLE_API_KEY
+            google_api_key=Config.GOOGLE_API_KEY,
+            callbacks=[LLMMetricsCallback(Config.MODEL_NAME)]
         )
 
     def get_embeddings(self):
@@ -48,10 +64,22 @@ class GoogleAI:
 
         Returns:
         --------
-        GoogleGenerativeAIEmbeddings
-            Configured embeddings client for vectorizing text.
+        GoogleGenerativeAIEmbeddings or HashEmbeddings
+            Configured embeddings client for vectorizing text; hash-based embeddings of
+            Config.FAKE_EMBEDDING_DIM dimensions when AI_BACKEND is 'fake'.
         """
+        if Config.AI_BACKEND == "fake":
+            return HashEmbeddings(Config.FAKE_EMBEDDING_DIM)
         return GoogleGenerativeAIEmbeddings(
             model=Config.EMBEDDING_MODEL,
             google_api_key=Config.GOOGLE_API_KEY
         )
+
+    def get_embedding_model_name(self):
+        """
+        Returns the name identifying the vectors produced by get_embeddings(), so cached
+        embeddings of the real and fake backends are never mixed up.
+        """
+        if Config.AI_BACKEND == "fake":
+            return f"hash-{Config.FAKE_EMBEDDING_DIM}"
+        return Config.EMBEDDING_MODEL
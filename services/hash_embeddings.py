@@ -0,0 +1,71 @@
+import re
+import zlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddings(Embeddings):
+    """
+    HashEmbeddings is a deterministic, local stand-in for an embeddings API: a text is
+    embedded as its L2-normalized bag of words, hashed into a fixed number of dimensions
+    (the "hashing trick"), with a hash-derived sign per word to keep collisions unbiased.
+
+    Texts sharing words get similar vectors, so retrieval over a synthetic corpus behaves
+    plausibly, while embedding costs microseconds and never touches the network. Vectors
+    are identical across processes and runs (crc32 is used, not Python's salted hash).
+
+    Attributes:
+    -----------
+    dim : int
+        Embedding dimension.
+    calls : int
+        Number of embed_documents / embed_query calls served.
+
+    Methods:
+    --------
+    embed_documents(texts)
+        Embeds a list of texts.
+    embed_query(text)
+        Embeds a single text.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.calls = 0
+        # word -> (dimension, sign); words repeat a lot, so hashing each one once pays off
+        self._slots = {}
+
+    def _slot(self, word: str) -> tuple:
+        slot = self._slots.get(word)
+        if slot is None:
+            digest = zlib.crc32(word.encode("utf-8"))
+            slot = (digest % self.dim, 1.0 if digest & 0x80000000 else -1.0)
+            if len(self._slots) < 1_000_000:
+                self._slots[word] = slot
+        return slot
+
+    def _embed(self, text: str) -> list:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _TOKEN_RE.findall(text.lower()):
+            index, sign = self._slot(word)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts) -> list:
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        self.calls += 1
+        return self._embed(text)
+
+    async def aembed_documents(self, texts) -> list:
+        # Pure CPU work of a few microseconds per text: no executor hop
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list:
+        return self.embed_query(text)
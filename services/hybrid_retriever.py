@@ -0,0 +1,121 @@
+from typing import Any
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from services.bm25_index import STOPWORDS, WORD_RE, is_code_token
+from services.embedding_cache import text_hash
+from services.tracing import span
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    HybridRetriever combines dense retrieval from the vectorstore with BM25 keyword search
+    over the same chunks (see BM25Index).
+
+    In 'hybrid' mode both rankings are merged with reciprocal rank fusion: every chunk
+    scores sum(1 / (rrf_k + rank)) over the rankings it appears in, so chunks found by both
+    searches come first and exact keyword matches missed by the embeddings still surface.
+
+    Keyword queries take a lexical-only fast path that never calls the embedding API: a
+    query of at most keyword_max_terms words that either contains a code ("E-42",
+    "model x200") or has no stopwords ("firmware update") is answered from the BM25 index
+    alone when it has matches. Longer questions go through fusion even when they mention a
+    code, whose exact matches the BM25 ranking still contributes. In 'lexical' mode every
+    query is answered from the BM25 index.
+
+    Attributes:
+    -----------
+    vector_retriever : BaseRetriever
+        Dense retriever over the vectorstore, returning (at least) fetch_k documents.
+    lexical_index : BM25Index
+        Keyword index over the same chunk IDs.
+    k : int
+        Number of documents returned.
+    fetch_k : int
+        Number of candidates taken from the lexical ranking before fusion.
+    rrf_k : int
+        Reciprocal rank fusion constant; higher values flatten the rank weights.
+    mode : str
+        'hybrid' or 'lexical'.
+    keyword_max_terms : int
+        Longest query (in words) treated as a keyword query.
+    """
+
+    vector_retriever: BaseRetriever
+    lexical_index: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    mode: str = "hybrid"
+    keyword_max_terms: int = 3
+
+    def is_keyword_query(self, query: str) -> bool:
+        """
+        Whether a query looks like a keyword search rather than a natural language question.
+        """
+        words = WORD_RE.findall(query.lower())
+        if not words or len(words) > self.keyword_max_terms:
+            return False
+        return any(is_code_token(word) for word in words) or not any(word in STOPWORDS for word in words)
+
+    def _lexical_search(self, query: str, k: int) -> list:
+        """
+        Top-k (chunk ID, score) pairs of the BM25 index, timed as a 'bm25.search' span.
+        """
+        with span("bm25.search", k=k) as current:
+            hits = self.lexical_index.search(query, k)
+            current.set_attribute("hits", len(hits))
+        return hits
+
+    def _lexical_documents(self, hits) -> list:
+        """
+        Turns (chunk ID, score) pairs from the BM25 index into Documents.
+        """
+        return [
+            Document(id=chunk_id, page_content=text, metadata=metadata)
+            for chunk_id, text, metadata in self.lexical_index.get_documents([chunk_id for chunk_id, _ in hits])
+        ]
+
+    def _fast_path(self, query: str):
+        """
+        Returns the lexical-only results of a keyword query, or None if the vector
+        ranking is needed.
+        """
+        if self.mode != "lexical" and not self.is_keyword_query(query):
+            return None
+        hits = self._lexical_search(query, self.k)
+        if hits or self.mode == "lexical":
+            return self._lexical_documents(hits)
+        return None
+
+    def _fuse(self, query: str, vector_documents) -> list:
+        """
+        Merges the vector ranking with the BM25 ranking by reciprocal rank fusion.
+        """
+        scores, documents = {}, {}
+        lexical_documents = self._lexical_documents(self._lexical_search(query, self.fetch_k))
+        for ranking in (vector_documents, lexical_documents):
+            for rank, document in enumerate(ranking):
+                key = document.id or text_hash(document.page_content)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+                documents.setdefault(key, document)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        return [documents[key] for key in ranked[:self.k]]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        documents = self._fast_path(query)
+        if documents is not None:
+            return documents
+        vector_documents = self.vector_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        return self._fuse(query, vector_documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list:
+        documents = self._fast_path(query)
+        if documents is not None:
+            return documents
+        vector_documents = await self.vector_retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+        return self._fuse(query, vector_documents)
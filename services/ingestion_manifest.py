@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+
+class IngestionManifest:
+    """
+    IngestionManifest keeps a persistent record of every source file that has been
+    ingested into the vector database, so that re-ingestion only touches new or
+    modified files.
+
+    Each entry is keyed by the file name (relative to the data directory) and stores:
+        - sha256 : content hash of the file at ingestion time
+        - size   : file size in bytes
+        - mtime  : modification time in nanoseconds
+        - chunk_ids : IDs of the chunks written to the vectorstore for this file
+
+    Attributes:
+    -----------
+    manifest_path : str
+        Path of the JSON file backing the manifest.
+
+    Methods:
+    --------
+    fingerprint(file_path)
+        Returns the size, mtime and content hash of a file.
+    is_current(filename, file_path)
+        Checks whether a file is already ingested and unchanged.
+    get_chunk_ids(filename)
+        Returns the chunk IDs recorded for a file.
+    record(filename, file_path, chunk_ids, fingerprint=None)
+        Records a successfully ingested file.
+    remove(filename)
+        Drops a file from the manifest and returns its chunk IDs.
+    filenames()
+        Lists every file currently tracked.
+    save()
+        Atomically persists the manifest to disk.
+    """
+
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, manifest_path: str):
+        """
+        Loads the manifest from disk, starting empty if it does not exist or is unreadable.
+
+        Parameters:
+        -----------
+        manifest_path : str
+            Path of the JSON file backing the manifest.
+        """
+        self.manifest_path = manifest_path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        # Fingerprints computed during this process, keyed by path and validated by (size, mtime)
+        self._fingerprints = {}
+
+    def _load(self):
+        """
+        Reads manifest entries from disk.
+
+        Returns:
+        --------
+        dict
+            Mapping of file name to manifest entry; empty if the file is missing or corrupt.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r") as file:
+                return json.load(file).get("files", {})
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable ingestion manifest {self.manifest_path}: {e}")
+            return {}
+
+    def fingerprint(self, file_path: str) -> dict:
+        """
+        Computes the size, modification time and sha256 content hash of a file.
+
+        The hash is only recomputed when the size or mtime changed since the last call
+        in this process.
+
+        Parameters:
+        -----------
+        file_path : str
+            Path of the file to fingerprint.
+
+        Returns:
+        --------
+        dict
+            Dictionary with 'size', 'mtime' and 'sha256' keys.
+        """
+        stat = os.stat(file_path)
+        cached = self._fingerprints.get(file_path)
+        if cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime_ns:
+            return cached
+
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as file:
+            for block in iter(lambda: file.read(self.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        fingerprint = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+        self._fingerprints[file_path] = fingerprint
+        return fingerprint
+
+    def is_current(self, filename: str, file_path: str) -> bool:
+        """
+        Checks whether a file has already been ingested with its current content.
+
+        Size and mtime are compared first so that unchanged files are never re-read;
+        the content hash is only consulted when they differ (e.g. after a copy or touch).
+
+        Parameters:
+        -----------
+        filename : str
+            Manifest key of the file.
+        file_path : str
+            Filesystem path of the file.
+
+        Returns:
+        --------
+        bool
+            True if the file is tracked and its content is unchanged.
+        """
+        entry = self._entries.get(filename)
+        if entry is None:
+            return False
+        stat = os.stat(file_path)
+        if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+            return True
+        fingerprint = self.fingerprint(file_path)
+        if fingerprint["sha256"] != entry["sha256"]:
+            return False
+        # Same content with a new mtime: refresh the entry so the next check stays cheap
+        with self._lock:
+            entry["mtime"] = fingerprint["mtime"]
+        return True
+
+    def get_chunk_ids(self, filename: str) -> list:
+        """
+        Returns the chunk IDs recorded for a file, or an empty list if it is not tracked.
+        """
+        entry = self._entries.get(filename)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def record(self, filename: str, file_path: str, chunk_ids: list, fingerprint: dict = None):
+        """
+        Records a file as ingested with the given chunk IDs.
+
+        Parameters:
+        -----------
+        filename : str
+            Manifest key of the file.
+        file_path : str
+            Filesystem path of the file.
+        chunk_ids : list
+            IDs of the chunks written to the vectorstore for this file.
+        fingerprint : dict, optional
+            The fingerprint() the chunks were derived from; computed now if omitted.
+        """
+        entry = dict(fingerprint or self.fingerprint(file_path))
+        entry["chunk_ids"] = list(chunk_ids)
+        with self._lock:
+            self._entries[filename] = entry
+
+    def remove(self, filename: str) -> list:
+        """
+        Removes a file from the manifest.
+
+        Returns:
+        --------
+        list
+            Chunk IDs previously recorded for the file.
+        """
+        with self._lock:
+            entry = self._entries.pop(filename, None)
+        return list(entry["chunk_ids"]) if entry else []
+
+    def filenames(self) -> list:
+        """
+        Returns the names of all files tracked by the manifest.
+        """
+        return list(self._entries)
+
+    def save(self):
+        """
+        Persists the manifest to disk.
+
+        Writes to a uniquely named temporary file first and renames it over the manifest,
+        so a crash mid-write never leaves a truncated manifest behind and concurrent
+        writers never write into each other's temporary file.
+        """
+        directory = os.path.dirname(self.manifest_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            payload = json.dumps({"version": 1, "files": self._entries})
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, prefix=os.path.basename(self.manifest_path) + ".", suffix=".tmp", delete=False
+        ) as file:
+            file.write(payload)
+        try:
+            os.replace(file.name, self.manifest_path)
+        except OSError:
+            os.remove(file.name)
+            raise
@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    TTLCache is a thread-safe in-process LRU cache whose entries also expire after a
+    fixed time-to-live.
+
+    Attributes:
+    -----------
+    maxsize : int
+        Maximum number of entries; the least recently used entry is evicted beyond it.
+    ttl : float or None
+        Seconds an entry stays valid after being stored (None disables expiry).
+    hits : int
+        Number of successful lookups.
+    misses : int
+        Number of lookups that found no valid entry.
+    evictions : int
+        Number of entries dropped because of capacity or expiry.
+
+    Methods:
+    --------
+    get(key, default=None)
+        Returns the cached value and marks it as recently used.
+    set(key, value)
+        Stores a value, evicting the least recently used entry if needed.
+    clear()
+        Drops every entry.
+    stats()
+        Returns size, hit/miss/eviction counters and the hit rate.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored under key, or default if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is not self._MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Stores value under key, evicting the least recently used entry when full.
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry; counters are kept.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Returns the current size and the hit, miss and eviction counters.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
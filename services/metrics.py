@@ -0,0 +1,128 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Latency buckets (seconds) spanning cache hits (sub-millisecond) to slow LLM answers
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Requests: one per websocket message answered by UIController.invoke_our_graph
+REQUESTS = Counter("ragchat_requests_total", "Chat messages handled, by outcome (ok or error).", ["outcome"])
+REQUEST_LATENCY = Histogram(
+    "ragchat_request_seconds", "Time from receiving a chat message to its last answer frame.",
+    buckets=LATENCY_BUCKETS
+)
+FIRST_FRAGMENT_LATENCY = Histogram(
+    "ragchat_first_fragment_seconds", "Time from receiving a chat message to its first answer fragment.",
+    buckets=LATENCY_BUCKETS
+)
+QUEUE_WAIT = Histogram(
+    "ragchat_queue_wait_seconds", "Time a chat message waited for a free query slot.", buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "ragchat_stage_seconds", "Latency of request stages (trace span names, e.g. graph.analyze_sentiment).",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("ragchat_stage_errors_total", "Request stages that raised or were cancelled.", ["stage"])
+
+# Load: what autoscaling looks at
+ACTIVE_WEBSOCKETS = Gauge("ragchat_active_websockets", "Open websocket connections.")
+QUEUED_REQUESTS = Gauge("ragchat_queued_requests", "Chat messages waiting for a free query slot.")
+GRAPH_IN_FLIGHT = Gauge("ragchat_graph_executions_in_flight", "Graph executions currently running.")
+QUERY_SLOTS = Gauge("ragchat_query_slots", "Maximum concurrent graph executions (Config.MAX_CONCURRENT_QUERIES).")
+
+# Model and embedding calls
+LLM_CALLS = Counter("ragchat_llm_calls_total", "LLM calls, by model and outcome (ok or error).", ["model", "outcome"])
+LLM_TOKENS = Counter("ragchat_llm_tokens_total", "LLM tokens, by model and direction (input or output).",
+                     ["model", "direction"])
+EMBEDDING_REQUESTS = Counter(
+    "ragchat_embedding_requests_total", "Embeddings API requests, by kind (documents or query).", ["kind"]
+)
+EMBEDDING_TEXTS = Counter("ragchat_embedding_texts_total", "Texts sent to the embeddings API, by kind.", ["kind"])
+EMBEDDING_RETRIES = Counter("ragchat_embedding_rate_limit_retries_total", "Rate-limited embeddings requests retried.")
+
+# Ingestion
+INGESTED_CHUNKS = Counter("ragchat_ingested_chunks_total", "Chunks written to the vectorstore by ingestion.")
+INGESTED_FILES = Counter("ragchat_ingested_files_total", "Files ingested, by outcome (ok or failed).", ["outcome"])
+EMBEDDED_CHUNKS = Counter(
+    "ragchat_embedded_chunks_total", "Chunks embedded during ingestion, by source (api or cache).", ["source"]
+)
+INGESTION_SECONDS = Histogram(
+    "ragchat_ingestion_seconds", "Duration of ingestion runs.", buckets=(0.1, 1.0, 10.0, 60.0, 300.0, 1800.0, 7200.0)
+)
+
+
+class StageMetricsExporter:
+    """
+    Trace exporter feeding finished spans into the per-stage latency histogram and error
+    counter, so every traced stage (see services.tracing) is also a metric.
+    """
+
+    def on_start(self, span):
+        pass
+
+    def export(self, span):
+        STAGE_LATENCY.labels(span.name).observe(span.duration)
+        if span.error:
+            STAGE_ERRORS.labels(span.name).inc()
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    LangChain callback counting LLM calls and the tokens they consume and produce, from the
+    usage metadata the model reports (also for streamed calls).
+
+    Parameters:
+    -----------
+    model : str
+        Model name used as the metric label.
+    """
+
+    # Counter updates are thread-safe and cheap: no need for an executor hop in async runs
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def on_llm_end(self, response, **kwargs):
+        LLM_CALLS.labels(self.model, "ok").inc()
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.labels(self.model, "input").inc(usage.get("input_tokens", 0))
+                    LLM_TOKENS.labels(self.model, "output").inc(usage.get("output_tokens", 0))
+
+    def on_llm_error(self, error, **kwargs):
+        LLM_CALLS.labels(self.model, "error").inc()
+
+
+class StatsCollector:
+    """
+    Prometheus collector reading cache and index statistics at scrape time, so the caches
+    themselves need no metrics code.
+
+    Parameters:
+    -----------
+    cache_stats : callable
+        Returns {cache name: stats dict with 'hits' and 'misses' and optionally 'size'}.
+    index_sizes : callable
+        Returns {index name: number of chunks}.
+    """
+
+    def __init__(self, cache_stats, index_sizes):
+        self.cache_stats = cache_stats
+        self.index_sizes = index_sizes
+
+    def collect(self):
+        hits = CounterMetricFamily("ragchat_cache_hits", "Cache lookups served from the cache.", labels=["cache"])
+        misses = CounterMetricFamily("ragchat_cache_misses", "Cache lookups that missed.", labels=["cache"])
+        entries = GaugeMetricFamily("ragchat_cache_entries", "Entries held by a cache.", labels=["cache"])
+        for name, stats in self.cache_stats().items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            if "size" in stats:
+                entries.add_metric([name], stats["size"])
+        chunks = GaugeMetricFamily("ragchat_index_chunks", "Chunks stored in an index.", labels=["index"])
+        for name, size in self.index_sizes().items():
+            chunks.add_metric([name], size)
+        yield from (hits, misses, entries, chunks)
@@ -0,0 +1,248 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+
+def _count_pages(file_path: str) -> int:
+    """
+    Returns the number of pages of a PDF without extracting any text.
+    """
+    return len(PdfReader(file_path).pages)
+
+
+def _parse_page_range(file_path: str, start: int, stop: int) -> list:
+    """
+    Extracts the text of pages [start, stop) of a PDF, one Document per page.
+
+    Defined at module level so it can be pickled and executed in worker processes.
+    Metadata mirrors the page-level fields produced by PyPDFLoader.
+
+    Parameters:
+    -----------
+    file_path : str
+        Path of the PDF file.
+    start : int
+        First page index to extract (inclusive).
+    stop : int
+        Last page index to extract (exclusive).
+
+    Returns:
+    --------
+    list of Document
+        One Document per page in the range, in page order.
+    """
+    reader = PdfReader(file_path)
+    total_pages = len(reader.pages)
+    docs = []
+    for page_number in range(start, min(stop, total_pages)):
+        text = reader.pages[page_number].extract_text(extraction_mode="plain").strip()
+        docs.append(Document(
+            page_content=text,
+            metadata={
+                "source": file_path,
+                "total_pages": total_pages,
+                "page": page_number,
+                "page_label": reader.page_labels[page_number],
+            }
+        ))
+    return docs
+
+
+class ParallelPDFLoader:
+    """
+    ParallelPDFLoader parses many PDF files across a pool of worker processes.
+
+    Small files are parsed as a single task; files with more than `pages_per_task` pages
+    are split into page ranges so one large manual does not pin a single core.
+    Results are streamed back per file, in the order the files were given, and a failure
+    in one file never affects the others.
+
+    Attributes:
+    -----------
+    max_workers : int
+        Number of worker processes. With 1 worker (or a single task) parsing runs inline.
+    pages_per_task : int
+        Maximum number of pages handled by one worker task.
+
+    Methods:
+    --------
+    lazy_load(file_paths)
+        Yields (file_path, documents, error) for each file in input order.
+    lazy_load_ranges(file_paths)
+        Yields (file_path, documents, error, last) for each page range in input order.
+    """
+
+    def __init__(self, max_workers: int = 1, pages_per_task: int = 50):
+        """
+        Parameters:
+        -----------
+        max_workers : int
+            Number of worker processes to parse with.
+        pages_per_task : int
+            Page range size above which a single PDF is split across workers.
+        """
+        self.max_workers = max(1, max_workers)
+        self.pages_per_task = max(1, pages_per_task)
+
+    def _plan(self, file_path: str) -> list:
+        """
+        Splits a file into (start, stop) page ranges of at most pages_per_task pages.
+        """
+        total_pages = _count_pages(file_path)
+        return [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+    def _plans(self, file_paths):
+        """
+        Lazily yields (file_path, page_ranges, error) so planning overlaps with parsing.
+        """
+        for file_path in file_paths:
+            try:
+                yield file_path, self._plan(file_path), None
+            except Exception as e:
+                yield file_path, [], e
+
+    def lazy_load(self, file_paths):
+        """
+        Parses the given PDF files and yields their pages file by file.
+
+        Parameters:
+        -----------
+        file_paths : iterable of str
+            Paths of the PDF files to parse.
+
+        Yields:
+        -------
+        tuple (str, list of Document or None, Exception or None)
+            The file path, its page Documents in page order, and the error that
+            prevented parsing it (in which case documents is None).
+        """
+        docs = []
+        for file_path, range_docs, error, last in self.lazy_load_ranges(file_paths):
+            if error is not None:
+                docs = []
+                yield file_path, None, error
+                continue
+            docs.extend(range_docs)
+            if last:
+                yield file_path, docs, None
+                docs = []
+
+    def lazy_load_ranges(self, file_paths):
+        """
+        Parses the given PDF files and yields their pages one page range at a time.
+
+        Ranges are yielded in input order (file by file, page by page), so consumers can
+        start processing the first pages of a large file while later ones are still parsing.
+        At most 2 * max_workers page ranges are submitted at any time, so memory stays
+        bounded even for very large files while every worker is kept busy.
+
+        Parameters:
+        -----------
+        file_paths : iterable of str
+            Paths of the PDF files to parse.
+
+        Yields:
+        -------
+        tuple (str, list of Document or None, Exception or None, bool)
+            The file path, the page Documents of one range, the error that stopped
+            parsing the file (in which case documents is None and no further ranges of
+            that file follow), and whether this is the file's last range.
+        """
+        file_paths = list(file_paths)
+        if not file_paths:
+            return
+        if self.max_workers == 1:
+            yield from self._load_inline(self._plans(file_paths))
+            return
+        plans = self._plans(file_paths)
+        if len(file_paths) == 1:
+            # A single small file is cheaper to parse than to ship to a fresh pool
+            plan = next(plans)
+            if len(plan[1]) <= 1:
+                yield from self._load_inline([plan])
+                return
+            plans = iter([plan])
+
+        # Spawned workers: forking the multithreaded server could copy a held lock into the child
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context("spawn")) as executor:
+            tasks = self._tasks(plans)
+            window = deque()  # (file index, file_path, future or None, error, last) in input order
+            failed = None  # index of the file whose parsing failed; its remaining ranges are dropped
+
+            while True:
+                # Keep the pool saturated without queueing the whole corpus at once
+                while len(window) < 2 * self.max_workers:
+                    task = next(tasks, None)
+                    if task is None:
+                        break
+                    index, file_path, page_range, error, last = task
+                    if index == failed:
+                        continue
+                    future = executor.submit(_parse_page_range, file_path, *page_range) if page_range else None
+                    window.append((index, file_path, future, error, last))
+
+                if not window:
+                    break
+                index, file_path, future, error, last = window.popleft()
+                if index == failed:
+                    if future is not None:
+                        future.cancel()
+                    continue
+                if error is not None:
+                    yield file_path, None, error, True
+                    continue
+                if future is None:
+                    yield file_path, [], None, True
+                    continue
+                try:
+                    docs = future.result()
+                except Exception as e:
+                    failed = index
+                    yield file_path, None, e, True
+                    continue
+                yield file_path, docs, None, last
+
+    @staticmethod
+    def _tasks(plans):
+        """
+        Flattens planned files into one task per page range, in input order.
+
+        Yields:
+        -------
+        tuple (int, str, tuple or None, Exception or None, bool)
+            The file's index, its path, the (start, stop) page range (None for files that
+            failed planning or have no pages), the planning error, and whether this is the
+            file's last task.
+        """
+        for index, (file_path, ranges, error) in enumerate(plans):
+            if error is not None or not ranges:
+                yield index, file_path, None, error, True
+                continue
+            for position, page_range in enumerate(ranges):
+                yield index, file_path, page_range, None, position == len(ranges) - 1
+
+    def _load_inline(self, plans):
+        """
+        Parses planned files in the current process; used for single-worker runs and
+        for single-task inputs where starting a pool would cost more than it saves.
+        """
+        for file_path, ranges, error in plans:
+            if error is not None:
+                yield file_path, None, error, True
+                continue
+            if not ranges:
+                yield file_path, [], None, True
+                continue
+            for index, (start, stop) in enumerate(ranges):
+                try:
+                    docs = _parse_page_range(file_path, start, stop)
+                except Exception as e:
+                    yield file_path, None, e, True
+                    break
+                yield file_path, docs, None, index == len(ranges) - 1
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from services.embedding_cache import normalize_text, text_hash
+
+
+class ResponseCache:
+    """
+    ResponseCache persists generated answers in a local SQLite database so that an
+    identical question over the same retrieved context is answered without calling the LLM.
+
+    Entries are keyed by a hash of (normalized question, retrieved chunk IDs, prompt
+    template hash, model name): a different context, prompt or model never reuses an answer.
+    Callers clear the whole cache whenever the knowledge base is re-ingested.
+
+    Attributes:
+    -----------
+    path : str
+        Path of the SQLite database file.
+    hits : int
+        Number of lookups answered from the cache.
+    misses : int
+        Number of lookups not found in the cache.
+
+    Methods:
+    --------
+    make_key(question, documents, prompt_hash, model_name)
+        Builds the cache key of a request.
+    get(key)
+        Returns the cached response, or None when it is missing.
+    put(key, response, valid=None)
+        Stores a response, unless valid() returns False.
+    clear()
+        Drops every entry.
+    """
+
+    def __init__(self, path: str):
+        """
+        Opens (and creates if needed) the cache database.
+
+        Parameters:
+        -----------
+        path : str
+            Path of the SQLite database file.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Shared by concurrent requests; all use goes through self._lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " created REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(question: str, documents, prompt_hash: str, model_name: str) -> str:
+        """
+        Builds the cache key of a request.
+
+        Parameters:
+        -----------
+        question : str
+            The user question; case and whitespace are normalized.
+        documents : list of Document
+            Retrieved context, identified by chunk ID (or by content hash when a
+            document carries no ID).
+        prompt_hash : str
+            Hash of the prompt template used to generate the answer.
+        model_name : str
+            Name of the model generating the answer.
+
+        Returns:
+        --------
+        str
+            sha256 hex digest identifying the request.
+        """
+        chunk_ids = [document.id or text_hash(document.page_content) for document in documents]
+        payload = json.dumps(
+            [normalize_text(question).casefold(), chunk_ids, prompt_hash, model_name],
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns the response stored under key, or None if it is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str, valid=None):
+        """
+        Stores response under key, replacing any previous entry.
+
+        Parameters:
+        -----------
+        key : str
+            Cache key from make_key().
+        response : str
+            The response to store.
+        valid : callable, optional
+            Checked while holding the cache lock, which clear() also takes; the response
+            is not stored if it returns False. Callers use it to drop answers computed
+            before an invalidation, which cannot then slip in after the clear().
+        """
+        with self._lock:
+            if valid is not None and not valid():
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """
+        Drops every cached response; counters are kept.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters and the hit rate since this cache was opened.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        """
+        Closes the underlying database connection.
+        """
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,198 @@
+import threading
+import time
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    SemanticCache answers near-duplicate questions from previously generated answers.
+
+    Every stored question is embedded and kept, L2-normalized, in a small in-memory matrix.
+    A lookup embeds the incoming question and returns the answer of the most similar
+    stored question if their cosine similarity reaches `threshold`. Entries expire after
+    `ttl` seconds, and the least recently used entry is evicted when `maxsize` is reached.
+
+    Embeddings come from the (cached) query embedding client, so a question that misses
+    the cache is not embedded a second time by retrieval.
+
+    Attributes:
+    -----------
+    embeddings : Embeddings
+        Client used to embed questions (embed_query / aembed_query).
+    threshold : float
+        Minimum cosine similarity for a cached answer to be reused.
+    maxsize : int
+        Maximum number of cached answers.
+    ttl : float or None
+        Seconds an answer stays valid after being stored (None disables expiry).
+    hits, misses, evictions : int
+        Lookup and eviction counters.
+
+    Methods:
+    --------
+    get(question) / aget(question)
+        Returns the cached answer of the most similar question, or None.
+    put(question, answer, valid=None) / aput(question, answer, valid=None)
+        Stores the answer to a question, unless valid() returns False.
+    clear()
+        Drops every entry, e.g. after the knowledge base was re-ingested.
+    stats()
+        Returns size, hit/miss/eviction counters and the hit rate.
+    """
+
+    def __init__(self, embeddings, threshold: float = 0.95, maxsize: int = 1000, ttl: float = 3600):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._vectors = None  # (maxsize, dim) float32, allocated on the first put
+        self._valid = np.zeros(self.maxsize, dtype=bool)
+        self._expires_at = np.full(self.maxsize, np.inf)
+        self._last_used = np.zeros(self.maxsize)
+        self._answers = [None] * self.maxsize
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float):
+        """
+        Invalidates expired entries. Must be called with the lock held.
+        """
+        expired = self._valid & (self._expires_at <= now)
+        count = int(expired.sum())
+        if count:
+            self._valid[expired] = False
+            for slot in np.flatnonzero(expired):
+                self._answers[slot] = None
+            self.evictions += count
+
+    def _best_match(self, vector: np.ndarray):
+        """
+        Returns (slot, similarity) of the most similar valid entry, or (None, -1).
+        Must be called with the lock held.
+        """
+        if self._vectors is None or not self._valid.any() or vector.shape[0] != self._vectors.shape[1]:
+            return None, -1.0
+        scores = self._vectors @ vector
+        scores[~self._valid] = -np.inf
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def _lookup(self, vector):
+        vector = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            slot, similarity = self._best_match(vector)
+            if slot is not None and similarity >= self.threshold:
+                self._last_used[slot] = now
+                self.hits += 1
+                return self._answers[slot]
+            self.misses += 1
+            return None
+
+    def _store(self, vector, answer, valid=None):
+        vector = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            if valid is not None and not valid():
+                return
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[0]:
+                # First entry, or the embedding model changed: start a fresh index
+                self._vectors = np.zeros((self.maxsize, vector.shape[0]), dtype=np.float32)
+                self._valid[:] = False
+                self._answers = [None] * self.maxsize
+            self._expire(now)
+            slot, similarity = self._best_match(vector)
+            if slot is None or similarity < self.threshold:
+                free = np.flatnonzero(~self._valid)
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+            self._vectors[slot] = vector
+            self._answers[slot] = answer
+            self._valid[slot] = True
+            self._expires_at[slot] = now + self.ttl if self.ttl else np.inf
+            self._last_used[slot] = now
+
+    def get(self, question: str):
+        """
+        Returns the cached answer of the most similar stored question, or None.
+
+        Parameters:
+        -----------
+        question : str
+            The incoming question.
+
+        Returns:
+        --------
+        str or None
+            The cached answer when a stored question is at least `threshold` similar.
+        """
+        return self._lookup(self.embeddings.embed_query(question))
+
+    async def aget(self, question: str):
+        """
+        Async counterpart of get; the question is embedded without blocking the event loop.
+        """
+        return self._lookup(await self.embeddings.aembed_query(question))
+
+    def put(self, question: str, answer: str, valid=None):
+        """
+        Stores the answer to a question, replacing the entry of a near-identical question.
+
+        Parameters:
+        -----------
+        question : str
+            The answered question.
+        answer : str
+            The answer to serve to similar questions.
+        valid : callable, optional
+            Checked while holding the cache lock, which clear() also takes; the answer is
+            not stored if it returns False. Callers use it to drop answers computed before
+            an invalidation, which cannot then slip in after the clear().
+        """
+        self._store(self.embeddings.embed_query(question), answer, valid)
+
+    async def aput(self, question: str, answer: str, valid=None):
+        """
+        Async counterpart of put.
+        """
+        self._store(await self.embeddings.aembed_query(question), answer, valid)
+
+    def clear(self):
+        """
+        Drops every entry; counters are kept.
+        """
+        with self._lock:
+            self._valid[:] = False
+            self._answers = [None] * self.maxsize
+
+    def __len__(self):
+        with self._lock:
+            return int(self._valid.sum())
+
+    def stats(self) -> dict:
+        """
+        Returns the current size and the hit, miss and eviction counters.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": int(self._valid.sum()),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -1,33 +1,207 @@
-# from transformers import pipeline
+import math
+import re
+
+# Explicit first-person requests to be transferred to, or to speak with, a human; a match
+# routes to escalation regardless of the model score. The role must end the request (up to
+# "please"/"now" and punctuation), so merely naming a role ("How do I contact customer
+# service?", "Can I get a manager account?", "How can I talk to the support team about a
+# bug?") is not a transfer request and is left to the classifier.
+_HUMAN = (r"(a |an |some |your |the )?(human|person|real person|live agent|agent|representative|rep|operator"
+          r"|manager|supervisor|someone|somebody|customer service|support team)")
+_END = r"(?=\s*(please|now|right now|immediately)?\s*([.!?,;]|$))"
+ESCALATION_PATTERNS = [
+    r"\b(let me|i (want|need|would like|'d like) to|can i|could i|may i) (talk|speak|chat) (to|with) " + _HUMAN + _END,
+    r"\b(connect|transfer|put) me (through )?(to|with) " + _HUMAN + _END,
+    r"\b(i (want|need|demand)|get me|give me) (a |an |your |the |to talk to a |to speak to a |to speak with a )?"
+    r"(human|real person|live agent|agent|representative|manager|supervisor)" + _END,
+    r"\b(not|stop) (talk|talking|chatting) (to|with) (a |the |this )?(bot|machine|robot|ai)\b",
+]
+
+# Seed examples the linear model is trained on: 'negative' means the query should go to a human
+SEED_EXAMPLES = [
+    ("How do I reset my password?", "positive"),
+    ("What are your opening hours?", "positive"),
+    ("Where can I find the user manual?", "positive"),
+    ("How long does shipping take?", "positive"),
+    ("Can I change the delivery address of my order?", "positive"),
+    ("What is the warranty period for this product?", "positive"),
+    ("How do I install the software update?", "positive"),
+    ("Which payment methods do you accept?", "positive"),
+    ("Is this device compatible with Windows?", "positive"),
+    ("How can I track my order?", "positive"),
+    ("What does the error code E42 mean?", "positive"),
+    ("Does the plan include international calls?", "positive"),
+    ("How do I configure the wifi settings?", "positive"),
+    ("Can you explain how returns work?", "positive"),
+    ("What is the difference between the basic and pro plans?", "positive"),
+    ("Tell me about the refund policy", "positive"),
+    ("My printer shows a paper jam, how do I fix it?", "positive"),
+    ("The app crashes when I open settings, what should I do?", "positive"),
+    ("Thanks, that was really helpful!", "positive"),
+    ("Great, it works now. Thank you!", "positive"),
+    ("Awesome, thanks for the quick answer", "positive"),
+    ("I love this product, how do I register it?", "positive"),
+    ("why is my battery draining so fast?", "positive"),
+    ("when will my order arrive?", "positive"),
+    ("how to cancel my subscription", "positive"),
+    ("what are the system requirements", "positive"),
+    # Requests phrased with "I want" / "I need" or mentioning refunds, managers and support
+    # are ordinary questions; without these the model escalates on the phrasing alone
+    ("I want to upgrade to the pro plan", "positive"),
+    ("I need to update my payment details", "positive"),
+    ("I want a refund for a cancelled order, how does it work?", "positive"),
+    ("I need help setting up the printer", "positive"),
+    ("I would like to return an item", "positive"),
+    ("I need an invoice for my last purchase", "positive"),
+    ("How do I request a refund?", "positive"),
+    ("My package arrived damaged, how do I get a replacement?", "positive"),
+    ("How do I add a manager to my team account?", "positive"),
+    ("How do I reach the support team by email?", "positive"),
+    ("Where is the agent download page?", "positive"),
+    ("Why was my card charged twice?", "positive"),
+    ("The screen is broken, is it covered by the warranty?", "positive"),
+    ("I can't log in, what should I try?", "positive"),
+    ("I want to speak to a human", "negative"),
+    ("Let me talk to a real person", "negative"),
+    ("Connect me with an agent please", "negative"),
+    ("I need a representative now", "negative"),
+    ("Get me your manager", "negative"),
+    ("This bot is useless, I want a person", "negative"),
+    ("You are not helping at all", "negative"),
+    ("This is ridiculous, nobody can answer my question", "negative"),
+    ("I already tried everything and it still does not work, escalate this", "negative"),
+    ("I am very angry, I have been waiting for weeks", "negative"),
+    ("Your answers are wrong and unhelpful", "negative"),
+    ("Stop giving me the same answer", "negative"),
+    ("I want to file a complaint", "negative"),
+    ("Can a human call me back?", "negative"),
+    ("I demand a refund immediately, this is unacceptable", "negative"),
+    ("Transfer me to customer service", "negative"),
+    ("This is the third time I ask, you are not listening", "negative"),
+    ("I am frustrated, nothing you say works", "negative"),
+    ("Nobody replies to my emails, this is a disgrace", "negative"),
+    ("You keep giving me the wrong answer", "negative"),
+    ("This is useless, I have asked five times", "negative"),
+    ("I am fed up with this service", "negative"),
+    ("Terrible support, I am cancelling everything", "negative"),
+    ("Escalate my case to someone who can actually help", "negative"),
+]
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+|[?!]")
+
+
+def _features(text: str) -> list:
+    """
+    Lowercased word and punctuation tokens plus adjacent-token bigrams.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
 
 class SentimentAnalyzer:
     """
-    SentimentAnalyzer provides a simple interface to perform sentiment analysis on text.
+    SentimentAnalyzer decides locally, without any network call, whether a customer query
+    can be answered by the bot ('positive') or should be escalated to a human ('negative').
 
-    Currently, the model loading and prediction are commented out,
-    but the structure supports using Hugging Face transformers pipelines.
+    Two signals are combined:
+    - regex rules that catch explicit requests for a human, which are treated as certain;
+    - a small logistic regression over word unigrams and bigrams, trained on SEED_EXAMPLES
+      when the analyzer is created (well under a second), whose probability is reported
+      as the confidence.
+
+    Classifying a query is a handful of dictionary lookups, so it takes microseconds and
+    callers can fall back to an LLM only when the confidence is low.
 
     Attributes:
     -----------
-    model : Optional[Callable]
-        Sentiment classification model pipeline; currently disabled.
+    weights : dict
+        Learned weight of every feature.
+    bias : float
+        Learned intercept.
 
     Methods:
     --------
+    requests_human(text: str) -> bool
+        Whether the text explicitly asks for a human (rules only).
+    classify(text: str) -> tuple
+        Returns the label ('positive' or 'negative') and its confidence in [0.5, 1].
     analyze(text: str) -> str
-        Analyzes the sentiment of the input text and returns a simplified sentiment label.
+        Returns the label only.
     """
 
-    def __init__(self):
+    def __init__(self, examples=None, epochs: int = 200, learning_rate: float = 0.5, l2: float = 1e-3):
+        """
+        Initializes the SentimentAnalyzer and trains its linear model.
+
+        Parameters:
+        -----------
+        examples : list of (str, str) or None
+            Labeled training examples; SEED_EXAMPLES by default.
+        epochs : int
+            Number of full-batch gradient descent passes.
+        learning_rate : float
+            Gradient descent step size.
+        l2 : float
+            L2 regularization strength.
+        """
+        self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in ESCALATION_PATTERNS]
+        self.weights = {}
+        self.bias = 0.0
+        self._train(examples or SEED_EXAMPLES, epochs, learning_rate, l2)
+
+    def _train(self, examples, epochs, learning_rate, l2):
+        """
+        Fits the logistic regression (negative = 1) with full-batch gradient descent.
+        """
+        data = [(set(_features(text)), 1.0 if label == "negative" else 0.0) for text, label in examples]
+        n = len(data)
+        for _ in range(epochs):
+            gradients = {}
+            bias_gradient = 0.0
+            for features, target in data:
+                error = self._probability(features) - target
+                bias_gradient += error
+                for feature in features:
+                    gradients[feature] = gradients.get(feature, 0.0) + error
+            self.bias -= learning_rate * bias_gradient / n
+            for feature, gradient in gradients.items():
+                weight = self.weights.get(feature, 0.0)
+                self.weights[feature] = weight - learning_rate * (gradient / n + l2 * weight)
+
+    def _probability(self, features) -> float:
+        """
+        Probability that a query with the given features should be escalated.
+        """
+        score = self.bias + sum(self.weights.get(feature, 0.0) for feature in features)
+        return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, score))))
+
+    def requests_human(self, text: str) -> bool:
+        """
+        Checks the escalation rules only: True if the text explicitly asks for a human.
+        """
+        return any(pattern.search(text) for pattern in self.patterns)
+
+    def classify(self, text: str) -> tuple:
         """
-        Initializes the SentimentAnalyzer.
+        Classifies the given text.
 
-        Note:
-        -----
-        The sentiment analysis model pipeline is currently commented out,
-        and a fixed positive response is used for demonstration or placeholder purposes.
+        Parameters:
+        -----------
+        text : str
+            The input text to classify.
+
+        Returns:
+        --------
+        tuple (str, float)
+            'positive' or 'negative', and the confidence of that label (0.5 to 1.0).
+            Explicit requests for a human are 'negative' with confidence 1.0.
         """
-        self.model = None  # pipeline("text-classification", model="distilbert-base-uncased-finetuned-sst-2-english")
+        if self.requests_human(text):
+            return "negative", 1.0
+        probability = self._probability(set(_features(text)))
+        if probability >= 0.5:
+            return "negative", probability
+        return "positive", 1.0 - probability
 
     def analyze(self, text: str) -> str:
         """
@@ -41,12 +215,6 @@ class SentimentAnalyzer:
         Returns:
         --------
         str
-            "positive" if the sentiment is positive, otherwise "negative".
-
-        Behavior:
-        ---------
-        Currently returns "positive" as a hardcoded placeholder.
-        When enabled, will use the transformer pipeline model to classify input.
+            "positive" if the bot can answer the query, otherwise "negative".
         """
-        result = {"label": "POSITIVE"}  # self.model(text)[0]
-        return "positive" if result["label"] == "POSITIVE" else "negative"
+        return self.classify(text)[0]
@@ -0,0 +1,382 @@
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from config import Config
+from cust_logger import logger
+
+# ID of the request being handled, set per websocket message (see request_context); copied
+# into asyncio tasks and ContextThreadPoolExecutor workers along with the rest of the context
+request_id_var = contextvars.ContextVar("request_id", default=None)
+# Innermost open span of the current context, the parent of the next span started in it
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    One timed stage of a request, e.g. a graph node, a retrieval or an LLM call.
+
+    Attributes:
+    -----------
+    name : str
+        Stage name, e.g. 'graph.analyze_sentiment' or 'qa.generate'.
+    span_id : int
+        Process-unique span ID.
+    parent : Span or None
+        Enclosing span, if any.
+    request_id : str or None
+        ID of the request the span belongs to.
+    attributes : dict
+        Stage details (cache hits, routing decisions, result sizes...).
+    start_time : float
+        Wall-clock start, in seconds since the epoch.
+    duration : float or None
+        Seconds spent in the stage, set when it ends.
+    error : str or None
+        Exception type and message if the stage failed or was cancelled.
+    handle : Any
+        Exporter-specific counterpart of the span (e.g. the OpenTelemetry span).
+    """
+
+    __slots__ = ("name", "span_id", "parent", "request_id", "attributes", "start_time", "duration", "error",
+                 "handle", "_started")
+
+    def __init__(self, name: str, parent, request_id, attributes: dict):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.parent = parent
+        self.request_id = request_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = None
+        self.error = None
+        self.handle = None
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value):
+        """
+        Records a detail of the stage, e.g. whether it was served from a cache.
+        """
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration = time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "request_id": self.request_id,
+            "start_time": self.start_time,
+            "duration_ms": 1000 * self.duration if self.duration is not None else None,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Stand-in yielded by Tracer.span when tracing is off, so callers can set attributes unconditionally.
+    """
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class RingBufferExporter:
+    """
+    Keeps the most recent finished spans in memory, for inspection from the running process.
+
+    Parameters:
+    -----------
+    maxsize : int
+        Number of spans kept; older ones are dropped.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self._spans = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span):
+        pass
+
+    def export(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, request_id=None) -> list:
+        """
+        Returns the buffered spans as dicts, oldest first, optionally of one request only.
+        """
+        with self._lock:
+            spans = list(self._spans)
+        return [span.to_dict() for span in spans if request_id is None or span.request_id == request_id]
+
+
+class JsonLogExporter:
+    """
+    Logs every finished span as one JSON line, next to the server's own JSON logs.
+    """
+
+    def on_start(self, span: Span):
+        pass
+
+    def export(self, span: Span):
+        logger.info(json.dumps({"span": span.to_dict()}, default=str))
+
+
+class OtlpExporter:
+    """
+    Sends spans to an OpenTelemetry collector over OTLP/gRPC.
+
+    The spans are mirrored into OpenTelemetry spans as they start, so a request shows up as
+    one trace with the stage hierarchy intact; the request ID is kept as the 'request.id'
+    attribute. Requires the opentelemetry-sdk and opentelemetry-exporter-otlp packages.
+
+    Parameters:
+    -----------
+    endpoint : str
+        Collector address, e.g. 'http://localhost:4317'.
+    service_name : str
+        Service name reported to the collector.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "rag-chat"):
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        self._trace = trace
+        self._status = trace.Status
+        self._error = trace.StatusCode.ERROR
+        self.provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        self.provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint, insecure=True)))
+        self.tracer = self.provider.get_tracer("rag-chat")
+
+    def on_start(self, span: Span):
+        parent = span.parent.handle if span.parent is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        span.handle = self.tracer.start_span(span.name, context=context, start_time=int(span.start_time * 1e9))
+        if span.request_id is not None:
+            span.handle.set_attribute("request.id", span.request_id)
+
+    def export(self, span: Span):
+        handle = span.handle
+        if handle is None:
+            return
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                handle.set_attribute(key, value)
+        if span.error:
+            handle.set_status(self._status(self._error, span.error))
+        handle.end(end_time=int((span.start_time + span.duration) * 1e9))
+
+    def shutdown(self):
+        self.provider.shutdown()
+
+
+class Tracer:
+    """
+    Tracer times request stages as nested spans and hands finished spans to its exporters.
+
+    Spans nest through a context variable, so a span opened in a graph node becomes the
+    parent of the spans opened by the retriever or LLM call inside it, also across asyncio
+    tasks and LangChain's executor threads. Without exporters, span() does nothing beyond
+    entering a context manager, so instrumentation can stay in place when tracing is off.
+
+    Attributes:
+    -----------
+    exporters : list
+        Objects with on_start(span) and export(span) methods, e.g. RingBufferExporter,
+        JsonLogExporter or OtlpExporter.
+    ring_buffer : RingBufferExporter or None
+        The in-process ring buffer exporter, if enabled.
+
+    Methods:
+    --------
+    span(name, **attributes)
+        Context manager timing one stage; yields the Span (a no-op stand-in when tracing is off).
+    add_exporter(exporter)
+        Registers another exporter, e.g. a metrics collector.
+    """
+
+    def __init__(self, exporters=None):
+        self.exporters = list(exporters or [])
+        self.ring_buffer = next((e for e in self.exporters if isinstance(e, RingBufferExporter)), None)
+
+    @classmethod
+    def from_config(cls):
+        """
+        Builds a tracer with the exporters listed in Config.TRACING ('ring', 'log', 'otlp').
+        """
+        exporters = []
+        for name in filter(None, (name.strip() for name in Config.TRACING.split(","))):
+            if name == "ring":
+                exporters.append(RingBufferExporter(Config.TRACE_BUFFER_SIZE))
+            elif name == "log":
+                exporters.append(JsonLogExporter())
+            elif name == "otlp":
+                exporters.append(OtlpExporter(Config.OTLP_ENDPOINT))
+            elif name != "off":
+                raise ValueError(f"Unknown trace exporter: {name}")
+        return cls(exporters)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+        if self.ring_buffer is None and isinstance(exporter, RingBufferExporter):
+            self.ring_buffer = exporter
+
+    def _notify(self, method: str, span: Span):
+        for exporter in self.exporters:
+            try:
+                getattr(exporter, method)(span)
+            except Exception as e:
+                # Tracing must never fail a request
+                logger.warning(json.dumps({"op": f"Trace exporter {type(exporter).__name__} failed: {e}",
+                                           "span": span.name}))
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        if not self.exporters:
+            yield NOOP_SPAN
+            return
+        span = Span(name, _current_span.get(), request_id_var.get(), attributes)
+        self._notify("on_start", span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Closed from another context (e.g. an abandoned async generator)
+                pass
+            span.end()
+            self._notify("export", span)
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer, configured from Config on first use.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_config()
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """
+    Times a stage of the current request with the process-wide tracer (see Tracer.span).
+    """
+    return get_tracer().span(name, **attributes)
+
+
+def traced(name: str):
+    """
+    Decorator timing every call of a function or coroutine function as a span.
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def request_context(request_id=None):
+    """
+    Marks the code inside as handling one request: every span started in it (and in the
+    tasks and threads it spawns) carries the request ID.
+
+    Parameters:
+    -----------
+    request_id : str, optional
+        ID supplied by the client; a random one is generated when missing.
+
+    Yields:
+    -------
+    str
+        The request ID.
+    """
+    request_id = request_id or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        yield request_id
+    finally:
+        request_id_var.reset(token)
+
+
+class TracedRetriever(BaseRetriever):
+    """
+    Retriever wrapper timing every search of the wrapped retriever as a span, e.g. the
+    vectorstore query including its query embedding.
+
+    Attributes:
+    -----------
+    retriever : BaseRetriever
+        The wrapped retriever.
+    span_name : str
+        Name of the search spans.
+    attributes : dict
+        Attributes attached to every search span.
+    """
+
+    retriever: BaseRetriever
+    span_name: str
+    attributes: dict = {}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        with span(self.span_name, **self.attributes) as current:
+            documents = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+            current.set_attribute("documents", len(documents))
+            return documents
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list:
+        with span(self.span_name, **self.attributes) as current:
+            documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            current.set_attribute("documents", len(documents))
+            return documents
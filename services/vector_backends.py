@@ -0,0 +1,74 @@
+import os
+
+from langchain_chroma import Chroma
+
+from services.flat_vector_store import FlatVectorStore
+
+# Supported values of Config.VECTOR_BACKEND
+VECTOR_BACKENDS = ("chroma", "flat")
+
+
+def open_vectorstore(backend: str, persist_dir: str, embeddings, quantization: str = "none", rerank_factor: int = 4):
+    """
+    Opens the vectorstore of the configured backend under the persist directory.
+
+    Parameters:
+    -----------
+    backend : str
+        'chroma' (HNSW index in persist_dir) or 'flat' (memory-mapped matrix in
+        persist_dir/flat_index, see FlatVectorStore).
+    persist_dir : str
+        Persistent vectorstore directory.
+    embeddings : Embeddings
+        Embedding function used for queries.
+    quantization : str
+        Flat backend only: 'none' or 'int8' (see FlatVectorStore).
+    rerank_factor : int
+        Flat backend only: candidates re-ranked exactly per result with int8 quantization.
+
+    Returns:
+    --------
+    VectorStore
+        A Chroma or FlatVectorStore instance.
+    """
+    if backend == "chroma":
+        return Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+    if backend == "flat":
+        return FlatVectorStore(
+            os.path.join(persist_dir, "flat_index"),
+            embedding_function=embeddings,
+            quantization=quantization,
+            rerank_factor=rerank_factor
+        )
+    raise ValueError(f"Unknown vector backend {backend!r}; expected one of {VECTOR_BACKENDS}.")
+
+
+def upsert_embeddings(vectorstore, ids, embeddings, texts, metadatas):
+    """
+    Writes chunks with precomputed embeddings, replacing chunks stored under the same IDs.
+    """
+    if isinstance(vectorstore, Chroma):
+        vectorstore._collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
+    else:
+        vectorstore.upsert_embeddings(ids, embeddings, texts, metadatas)
+
+
+def count_chunks(vectorstore) -> int:
+    """
+    Returns the number of chunks stored in the vectorstore.
+    """
+    if isinstance(vectorstore, Chroma):
+        return vectorstore._collection.count()
+    return vectorstore.count()
+
+
+def iter_chunks(vectorstore, page_size: int = 1000):
+    """
+    Pages through every stored chunk, yielding (IDs, texts, metadatas) tuples.
+    """
+    for offset in range(0, count_chunks(vectorstore), page_size):
+        if isinstance(vectorstore, Chroma):
+            page = vectorstore._collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            yield page["ids"], page["documents"], page["metadatas"]
+        else:
+            yield vectorstore.get_chunks(offset, page_size)
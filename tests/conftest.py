@@ -0,0 +1,64 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the application modules the same way the server and benchmarks do
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def offline_config(monkeypatch, tmp_path):
+    """
+    Selects the fake AI backend and keeps every file the code under test writes in tmp_path.
+    """
+    monkeypatch.setattr(Config, "AI_BACKEND", "fake")
+    monkeypatch.setattr(Config, "PROMPT_FILE", os.path.join(ROOT, "templates", "qa_prompt.txt"))
+    monkeypatch.setattr(Config, "FUSED_PROMPT_FILE", os.path.join(ROOT, "templates", "fused_qa_prompt.txt"))
+    monkeypatch.setattr(Config, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(Config, "PERSIST_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr(Config, "MANIFEST_FILE", str(tmp_path / "store" / "ingestion_manifest.json"))
+    monkeypatch.setattr(Config, "BM25_INDEX_FILE", str(tmp_path / "store" / "bm25_index.sqlite3"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_FILE", str(tmp_path / "cache" / "embeddings.sqlite3"))
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_FILE", str(tmp_path / "cache" / "responses.sqlite3"))
+
+
+def write_pdf(path, pages):
+    """
+    Writes a minimal PDF with one line of Helvetica text per page.
+    """
+    body = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for index, text in enumerate(pages):
+        page, content = 4 + 2 * index, 5 + 2 * index
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        kids.append(f"{page} 0 R")
+        body[page] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {content} 0 R"
+                      " /Resources << /Font << /F1 3 0 R >> >> >>")
+        body[content] = f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream"
+    body[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+    output, offsets = b"%PDF-1.4\n", {}
+    for number in sorted(body):
+        offsets[number] = len(output)
+        output += f"{number} 0 obj\n{body[number]}\nendobj\n".encode()
+    xref, size = len(output), max(body) + 1
+    output += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    output += "".join(f"{offsets[number]:010d} 00000 n \n" for number in range(1, size)).encode()
+    output += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as file:
+        file.write(output)
+    return str(path)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """
+    Returns a function writing a PDF with the given page texts into tmp_path.
+    """
+    return lambda name, pages: write_pdf(tmp_path / name, pages)
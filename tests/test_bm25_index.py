@@ -0,0 +1,96 @@
+import pytest
+
+from services.bm25_index import BM25Index, is_code_token, tokenize
+
+
+@pytest.mark.parametrize("token", ["e42", "x200", "e-42", "v2.1", "1.2.3", "err_timeout"])
+def test_codes(token):
+    assert is_code_token(token)
+
+
+@pytest.mark.parametrize("token", ["wi-fi", "check-in", "e-mail", "router", "2024"])
+def test_plain_words_are_not_codes(token):
+    assert not is_code_token(token)
+
+
+def test_codes_are_indexed_with_and_without_separators():
+    assert tokenize("The E-42 error") == ["e-42", "e42", "e", "42", "error"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.add(
+        ["printer", "router", "firmware"],
+        ["Printer shows error E-42 when the paper tray is empty.",
+         "Reset the router by holding the button for ten seconds.",
+         "Firmware v2.1 fixes the router reboot loop."],
+        [{"page": 1}, {"page": 2}, None]
+    )
+    yield index
+    index.close()
+
+
+def test_exact_code_match_ranks_first(index):
+    assert [chunk_id for chunk_id, _ in index.search("e42")] == ["printer"]
+    assert [chunk_id for chunk_id, _ in index.search("router reset")][0] == "router"
+
+
+def test_rare_terms_weigh_more(index):
+    ranked = index.search("router reboot")
+    assert ranked[0][0] == "firmware"
+    assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_replace_and_delete(index):
+    index.add(["printer"], ["Printer ink cartridge replacement."])
+    assert index.search("e42") == []
+    index.delete(["router", "unknown"])
+    assert len(index) == 2
+    assert [chunk_id for chunk_id, _ in index.search("router")] == ["firmware"]
+
+
+def test_get_documents_returns_text_and_metadata(index):
+    assert index.get_documents(["router", "missing", "firmware"]) == [
+        ("router", "Reset the router by holding the button for ten seconds.", {"page": 2}),
+        ("firmware", "Firmware v2.1 fixes the router reboot loop.", {}),
+    ]
+
+
+def test_saved_changes_survive_reopen(tmp_path, index):
+    index.delete(["router"])
+    index.add(["manual"], ["User manual for model X200."])
+    index.save()
+    reopened = BM25Index(index.path)
+    assert len(reopened) == 3
+    assert reopened.search("x200") == index.search("x200")
+    assert reopened.search("router reboot") == index.search("router reboot")
+    reopened.close()
+
+
+def test_unsaved_changes_are_discarded(index):
+    index.save()
+    index.add(["manual"], ["User manual for model X200."])
+    index.close()
+    reopened = BM25Index(index.path)
+    assert len(reopened) == 3
+    assert reopened.search("x200") == []
+    reopened.close()
+
+
+def test_clear_is_persisted(index):
+    index.save()
+    index.clear()
+    index.save()
+    index.close()
+    assert len(BM25Index(index.path)) == 0
+
+
+def test_corrupt_index_starts_empty(tmp_path):
+    path = tmp_path / "bm25.sqlite3"
+    path.write_bytes(b"not a database" * 100)
+    index = BM25Index(str(path))
+    assert len(index) == 0
+    index.add(["a"], ["still works"])
+    index.save()
+    assert len(BM25Index(str(path))) == 1
@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from services.chunk_ids import assign_chunk_ids, make_chunk_id
+
+
+def test_chunk_id_is_deterministic():
+    assert make_chunk_id("abc", 1, 0, "cfg") == make_chunk_id("abc", 1, 0, "cfg")
+
+
+def test_chunk_id_depends_on_every_component():
+    base = make_chunk_id("abc", 1, 0, "cfg")
+    assert len({
+        base,
+        make_chunk_id("abd", 1, 0, "cfg"),
+        make_chunk_id("abc", 2, 0, "cfg"),
+        make_chunk_id("abc", 1, 10, "cfg"),
+        make_chunk_id("abc", 1, 0, "cfg2"),
+    }) == 5
+
+
+def test_assign_chunk_ids_sets_ids_and_drops_duplicates():
+    chunks = [
+        Document(page_content="first", metadata={"page": 0, "start_index": 0}),
+        Document(page_content="second", metadata={"page": 0, "start_index": 100}),
+        Document(page_content="first", metadata={"page": 0, "start_index": 0}),
+    ]
+    unique, ids = assign_chunk_ids(chunks, "abc", "cfg")
+    assert [chunk.page_content for chunk in unique] == ["first", "second"]
+    assert ids == [chunk.id for chunk in unique]
+    assert ids[0] == make_chunk_id("abc", 0, 0, "cfg")
@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from services import embedding_batcher
+from services.embedding_batcher import BatchEmbedder, is_rate_limit_error
+
+
+class FakeEmbeddings:
+    """
+    Embeds a text as [len(text)], failing the first `failures` requests with `error`.
+    """
+
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error or RuntimeError("429 Resource exhausted")
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            if self.failures:
+                self.failures -= 1
+                raise self.error
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(embedding_batcher.time, "sleep", delays.append)
+    return delays
+
+
+def test_embeds_in_batches_and_keeps_order():
+    embeddings = FakeEmbeddings()
+    texts = ["x" * length for length in range(1, 11)]
+    vectors = BatchEmbedder(embeddings, batch_size=3, max_concurrency=2).embed(texts)
+    assert vectors == [[float(length)] for length in range(1, 11)]
+    assert sorted(len(batch) for batch in embeddings.batches) == [1, 3, 3, 3]
+
+
+def test_rate_limited_batch_is_retried_with_backoff(sleeps):
+    embeddings = FakeEmbeddings(failures=3)
+    embedder = BatchEmbedder(embeddings, batch_size=10, max_retries=5, backoff_base=1.0, backoff_max=3.0)
+    assert embedder.embed(["ab", "c"]) == [[2.0], [1.0]]
+    assert len(sleeps) == 3
+    # Full jitter: each delay is drawn from [0, min(backoff_max, backoff_base * 2 ** attempt)]
+    for attempt, delay in enumerate(sleeps):
+        assert 0 <= delay <= min(3.0, 2 ** attempt)
+    assert embedder.stats()["retries"] == 3
+
+
+def test_gives_up_after_max_retries(sleeps):
+    embedder = BatchEmbedder(FakeEmbeddings(failures=10), max_retries=2)
+    with pytest.raises(RuntimeError):
+        embedder.embed(["a"])
+    assert len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried(sleeps):
+    embedder = BatchEmbedder(FakeEmbeddings(failures=1, error=ValueError("bad input")))
+    with pytest.raises(ValueError):
+        embedder.embed(["a"])
+    assert sleeps == []
+
+
+def test_rate_limit_detected_through_wrapped_errors():
+    try:
+        try:
+            raise RuntimeError("429 Too Many Requests")
+        except RuntimeError as cause:
+            raise ValueError("embedding failed") from cause
+    except ValueError as wrapped:
+        assert is_rate_limit_error(wrapped)
+    assert not is_rate_limit_error(ValueError("invalid argument"))
+
+
+def test_stats_count_chunks_and_batches():
+    embedder = BatchEmbedder(FakeEmbeddings(), batch_size=2)
+    embedder.embed(["a", "b", "c"])
+    stats = embedder.stats()
+    assert (stats["chunks"], stats["batches"], stats["cached"]) == (3, 2, 0)
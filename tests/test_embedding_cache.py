@@ -0,0 +1,53 @@
+import numpy as np
+
+from services.embedding_batcher import BatchEmbedder
+from services.embedding_cache import EmbeddingCache, text_hash
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), 0.5] for text in texts]
+
+
+def test_text_hash_ignores_whitespace_differences():
+    assert text_hash("a  b\n c") == text_hash("a b c")
+    assert text_hash("a b") != text_hash("a c")
+
+
+def test_round_trip_and_persistence(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(path, "model-a")
+    assert cache.get_many(["one", "two"]) == [None, None]
+    cache.put_many(["one"], [[1.0, 2.0]])
+    cache.close()
+
+    reopened = EmbeddingCache(path, "model-a")
+    assert reopened.get_many(["one", "two", "one"]) == [[1.0, 2.0], None, [1.0, 2.0]]
+    assert reopened.stats()["hits"] == 2
+
+
+def test_entries_are_per_model(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(path, "model-a").put_many(["one"], [[1.0]])
+    assert EmbeddingCache(path, "model-b").get_many(["one"]) == [None]
+
+
+def test_float16_storage_is_close(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), "model-a", dtype="float16")
+    cache.put_many(["one"], [[0.1234, -0.5]])
+    assert np.allclose(cache.get_many(["one"])[0], [0.1234, -0.5], atol=1e-3)
+
+
+def test_batch_embedder_only_sends_uncached_texts(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), "model-a")
+    embeddings = CountingEmbeddings()
+    embedder = BatchEmbedder(embeddings, batch_size=2, cache=cache)
+    first = embedder.embed(["aa", "b"])
+    second = embedder.embed(["aa", "ccc", "b"])
+    assert embeddings.texts == ["aa", "b", "ccc"]
+    assert second == [first[0], [3.0, 0.5], first[1]]
+    assert embedder.stats()["cached"] == 2
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from controllers.qa_handler import FusedAnswer
+from services.fake_ai import FakeChatModel, SimulatedLLMError
+
+
+PROMPT = "Answer from the context.\nContext: Hold the reset button for ten seconds.\nQuestion: How do I reset?"
+
+
+@pytest.fixture
+def llm():
+    return FakeChatModel(latency=0, tokens_per_sec=0)
+
+
+def sentiment_prompt(query):
+    return f"Classify the sentiment of the customer query as positive or negative.\nQuery: {query}"
+
+
+def test_answers_from_the_context(llm):
+    assert llm.invoke(PROMPT).content == "Hold the reset button for ten seconds."
+    assert llm.invoke("Question: anything?").content == "I don't know."
+    assert FakeChatModel(latency=0, tokens_per_sec=0, answer_tokens=2).invoke(PROMPT).content == "Hold the"
+
+
+def test_sentiment_prompts_escalate_on_human_roles(llm):
+    assert llm.invoke(sentiment_prompt("I want to speak to a human")).content == "negative"
+    assert llm.invoke(sentiment_prompt("My router keeps dropping the connection")).content == "positive"
+
+
+def test_fixed_sentiment_reply():
+    llm = FakeChatModel(latency=0, tokens_per_sec=0, sentiment="negative")
+    assert llm.invoke(sentiment_prompt("How do I reset my password?")).content == "negative"
+    assert llm.with_structured_output(FusedAnswer).invoke(PROMPT).needs_human is True
+
+
+def test_reports_usage_and_model_name(llm):
+    message = llm.invoke(PROMPT)
+    assert message.usage_metadata == {"input_tokens": len(PROMPT.split()), "output_tokens": 7,
+                                      "total_tokens": len(PROMPT.split()) + 7}
+    assert message.response_metadata["model_name"] == "fake-chat"
+
+
+def test_streams_word_chunks_with_usage_on_the_last(llm):
+    chunks = list(llm.stream(PROMPT))
+    assert "".join(chunk.content for chunk in chunks) == "Hold the reset button for ten seconds."
+    assert len(chunks) == 7
+    assert all(chunk.usage_metadata is None for chunk in chunks[:-1])
+    assert chunks[-1].usage_metadata["output_tokens"] == 7
+    assert chunks[-1].response_metadata["model_name"] == "fake-chat"
+
+
+def test_async_stream_matches_sync(llm):
+    async def collect():
+        return [chunk.content async for chunk in llm.astream(PROMPT)]
+
+    assert "".join(asyncio.run(collect())) == llm.invoke(PROMPT).content
+
+
+def test_structured_output(llm):
+    structured = llm.with_structured_output(FusedAnswer)
+    answer = structured.invoke(PROMPT)
+    assert answer == FusedAnswer(needs_human=False, answer="Hold the reset button for ten seconds.")
+    escalated = structured.invoke("Context: anything\nQuestion: connect me with a live agent")
+    assert escalated.needs_human is True and escalated.answer == ""
+
+
+def test_failure_rate_is_reproducible_with_a_seed():
+    def outcomes():
+        llm = FakeChatModel(latency=0, tokens_per_sec=0, failure_rate=0.5, seed=7)
+        results = []
+        for _ in range(20):
+            try:
+                llm.invoke([HumanMessage(content=PROMPT)])
+                results.append(True)
+            except SimulatedLLMError:
+                results.append(False)
+        return results
+
+    first = outcomes()
+    assert first == outcomes()
+    assert True in first and False in first
@@ -0,0 +1,141 @@
+import threading
+
+import numpy as np
+import pytest
+
+from services.flat_vector_store import FlatVectorStore
+from services.hash_embeddings import HashEmbeddings
+from services.vector_backends import count_chunks, open_vectorstore
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+
+@pytest.fixture
+def store(tmp_path, vectors):
+    store = FlatVectorStore(str(tmp_path / "flat"))
+    store.upsert_embeddings([f"c{i}" for i in range(50)], vectors, [f"text {i}" for i in range(50)],
+                            [{"i": i} for i in range(50)])
+    return store
+
+
+def exact_top(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"c{i}" for i in np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:k]]
+
+
+def test_search_is_exact_cosine_ranking(store, vectors):
+    query = vectors[7] + 0.1 * vectors[3]
+    results = store.similarity_search_with_score_by_vector(query, k=5)
+    assert [document.id for document, _ in results] == exact_top(vectors, query, 5)
+    assert results[0][0].page_content == "text 7"
+    assert results[0][0].metadata == {"i": 7}
+    assert results[0][1] == pytest.approx(float(np.dot(query, vectors[7]) / np.linalg.norm(query)
+                                                / np.linalg.norm(vectors[7])), rel=1e-5)
+
+
+def test_delete_and_row_reuse(store, vectors):
+    store.delete(["c7"])
+    assert "c7" not in [document.id for document in store.similarity_search_by_vector(vectors[7], k=3)]
+    store.upsert_embeddings(["new"], [vectors[7]], ["replacement"])
+    assert store.count() == 50
+    assert store.similarity_search_by_vector(vectors[7], k=1)[0].id == "new"
+
+
+def test_upsert_replaces_in_place(store, vectors):
+    store.upsert_embeddings(["c1"], [vectors[2]], ["moved"])
+    assert store.count() == 50
+    assert {document.id for document in store.similarity_search_by_vector(vectors[2], k=2)} == {"c1", "c2"}
+
+
+def test_reopen_and_cross_handle_refresh(tmp_path, store, vectors):
+    other = FlatVectorStore(store.path)
+    assert other.count() == 50
+    store.upsert_embeddings(["late"], [-vectors[0]], ["written by another handle"])
+    assert other.similarity_search_by_vector(-vectors[0], k=1)[0].id == "late"
+
+
+def test_dimension_mismatch_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.upsert_embeddings(["bad"], [[1.0, 2.0]], ["bad"])
+    with pytest.raises(ValueError):
+        store.similarity_search_by_vector([1.0, 2.0], k=1)
+
+
+def test_empty_store_returns_nothing(tmp_path):
+    assert FlatVectorStore(str(tmp_path / "empty")).similarity_search_by_vector([1.0, 0.0], k=3) == []
+
+
+def test_scan_runs_without_the_lock(store, vectors):
+    acquired = []
+    top_rows = store._top_rows
+
+    def scan_checking_lock(*args):
+        # Another thread must be able to take the lock while a search is scanning
+        def try_lock():
+            if store._lock.acquire(timeout=1):
+                store._lock.release()
+                acquired.append(True)
+            else:
+                acquired.append(False)
+
+        thread = threading.Thread(target=try_lock)
+        thread.start()
+        thread.join()
+        return top_rows(*args)
+
+    store._top_rows = scan_checking_lock
+    store.similarity_search_by_vector(vectors[0], k=3)
+    assert acquired == [True]
+
+
+def test_row_reused_during_a_scan_does_not_inherit_its_score(store, vectors):
+    top_rows = store._top_rows
+
+    def scan_then_reuse_row(*args):
+        result = top_rows(*args)
+        # c7's row is freed and taken by another chunk after the scan scored it
+        store.delete(["c7"])
+        store.upsert_embeddings(["new"], [-vectors[7]], ["unrelated"])
+        return result
+
+    store._top_rows = scan_then_reuse_row
+    results = store.similarity_search_with_score_by_vector(vectors[7], k=3)
+    store._top_rows = top_rows
+    assert [document.id for document, _ in results if document.id in ("c7", "new")] == []
+    assert store.similarity_search_by_vector(-vectors[7], k=1)[0].id == "new"
+
+
+def test_concurrent_writes_during_searches(store, vectors):
+    errors = []
+
+    def search():
+        try:
+            for _ in range(50):
+                store.similarity_search_by_vector(vectors[5], k=4)
+        except Exception as e:
+            errors.append(e)
+
+    def write():
+        for i in range(50):
+            store.upsert_embeddings([f"n{i}"], [vectors[i] * -1], ["x"])
+            store.delete([f"c{i}"])
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.count() == 50
+
+
+def test_open_flat_backend_embeds_queries(tmp_path):
+    store = open_vectorstore("flat", str(tmp_path), HashEmbeddings(32))
+    store.add_texts(["reset the router", "warranty terms"], ids=["a", "b"])
+    assert count_chunks(store) == 2
+    assert store.similarity_search("reset the router", k=1)[0].id == "a"
+    with pytest.raises(ValueError):
+        open_vectorstore("unknown", str(tmp_path), None)
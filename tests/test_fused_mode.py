@@ -0,0 +1,91 @@
+import asyncio
+import importlib.util
+import os
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from controllers.qa_graph_handler import CustomerSupportBot
+from services.fake_ai import FakeChatModel
+from services.response_cache import ResponseCache
+
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fused_mode.py")
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("fused_mode", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StaticRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [Document(id="chunk-1", page_content="Open the settings menu and choose Network to join wifi.")]
+
+
+@pytest.fixture
+def bot():
+    bot = CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0))
+    bot.sentiment_backend = "llm"
+    bot.speculation = "off"
+    bot.qa_handler.response_cache = None
+    bot.semantic_cache = None
+    return bot
+
+
+def test_model_call_counter_sums_reported_tokens():
+    # No model name in the response metadata: get_usage_metadata_callback would count nothing
+    counter = load_benchmark().ModelCallCounter()
+    FakeChatModel(latency=0, tokens_per_sec=0, model="").invoke("Context: a b c Question: what?", config={
+        "callbacks": [counter]
+    })
+    assert counter.calls == 1
+    assert counter.tokens["input_tokens"] > 0
+    assert counter.tokens["total_tokens"] == counter.tokens["input_tokens"] + counter.tokens["output_tokens"]
+
+
+@pytest.mark.parametrize("fused, calls_per_query", [(False, 2), (True, 1)])
+def test_run_mode_reports_nonzero_tokens(bot, fused, calls_per_query):
+    benchmark = load_benchmark()
+    result = asyncio.run(benchmark.run_mode(bot, StaticRetriever(), ["How do I connect to wifi?"], fused, 2))
+    assert result["model_calls_per_query"] == calls_per_query
+    assert result["input_tokens"] > 0 and result["output_tokens"] > 0
+    assert result["tokens_per_query"] == result["total_tokens"] / 2
+
+
+class UnstructuredChatModel(FakeChatModel):
+    """
+    Answers in plain text even when asked for a tool call, so structured output parses to None.
+    """
+
+    def _reply(self, messages, tools):
+        return super()._reply(messages, None)
+
+
+@pytest.fixture
+def unparsable_bot(tmp_path):
+    bot = CustomerSupportBot(llm=UnstructuredChatModel(latency=0, tokens_per_sec=0))
+    bot.sentiment_backend = "llm"
+    bot.speculation = "off"
+    bot.semantic_cache = None
+    bot.fused_mode = True
+    bot.qa_handler.response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    return bot
+
+
+def test_unparsable_fused_reply_falls_back_to_separate_calls(unparsable_bot):
+    handler = unparsable_bot.qa_handler
+    documents = StaticRetriever().invoke("How do I connect to wifi?")
+    assert handler.route_and_answer("How do I connect to wifi?", documents) is None
+    assert asyncio.run(handler.aroute_and_answer("How do I connect to wifi?", documents)) is None
+    # Nothing is cached for the failed fused call
+    assert len(handler.response_cache) == 0
+
+    answer = "Open the settings menu and choose Network to join wifi."
+    assert unparsable_bot.handle_query("How do I connect to wifi?", StaticRetriever()) == answer
+    assert asyncio.run(unparsable_bot.ahandle_query("How do I connect to wifi?", StaticRetriever())) == answer
+    assert asyncio.run(unparsable_bot.ahandle_query("I want to speak to a human", StaticRetriever())) == \
+        "Let me connect you to a human representative..."
@@ -0,0 +1,24 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.hash_embeddings import HashEmbeddings
+
+
+def test_hash_embeddings_are_deterministic_and_normalized():
+    embeddings = HashEmbeddings(dim=64)
+    vector = embeddings.embed_query("Reset the router")
+    assert len(vector) == 64
+    assert np.linalg.norm(vector) == pytest.approx(1.0, rel=1e-6)
+    assert HashEmbeddings(dim=64).embed_query("reset THE router") == vector
+    assert embeddings.embed_query("") == [0.0] * 64
+    assert embeddings.calls == 2
+
+
+def test_hash_embeddings_rank_shared_words_higher():
+    embeddings = HashEmbeddings()
+    query, related, unrelated = map(np.array, embeddings.embed_documents(
+        ["reset the router", "how to reset a router", "warranty for the blender"]))
+    assert query @ related > query @ unrelated
+    assert asyncio.run(embeddings.aembed_documents(["reset the router"]))[0] == query.tolist()
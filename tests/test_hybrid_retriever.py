@@ -0,0 +1,96 @@
+import os
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config import Config
+from services.bm25_index import BM25Index
+from services.hybrid_retriever import HybridRetriever
+
+CHUNKS = {
+    "wifi": "To set up wi-fi, open the router admin page and choose a network name.",
+    "warranty": "The warranty covers manufacturing defects for two years.",
+    "x200": "The X200 model ships with a two year warranty and a spare battery.",
+    "email": "Check your e-mail account settings to receive order updates.",
+}
+
+
+class RecordingRetriever(BaseRetriever):
+    """
+    Stands in for the vector retriever: returns fixed documents and records its queries.
+    """
+
+    ranking: list
+    queries: list = []
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.queries.append(query)
+        return [Document(id=chunk_id, page_content=CHUNKS[chunk_id]) for chunk_id in self.ranking]
+
+
+@pytest.fixture
+def lexical_index(tmp_path):
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index.add(list(CHUNKS), list(CHUNKS.values()))
+    yield index
+    index.close()
+
+
+def retriever(lexical_index, ranking, **kwargs):
+    return HybridRetriever(
+        vector_retriever=RecordingRetriever(ranking=ranking, queries=[]),
+        lexical_index=lexical_index,
+        k=2,
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize("query", [
+    "How do I set up wi-fi on my router?",
+    "Can I check-in online for my e-mail account?",
+    "What is the warranty on model x200 if it breaks after two years?",
+])
+def test_questions_mentioning_codes_are_fused(lexical_index, query):
+    hybrid = retriever(lexical_index, ["warranty", "wifi"])
+    assert not hybrid.is_keyword_query(query)
+    hybrid.invoke(query)
+    assert hybrid.vector_retriever.queries == [query]
+
+
+@pytest.mark.parametrize("query", ["X200", "model x200", "E-42 error", "firmware update"])
+def test_short_keyword_queries_are_keyword_queries(lexical_index, query):
+    assert retriever(lexical_index, []).is_keyword_query(query)
+
+
+def test_keyword_fast_path_skips_the_vector_retriever(lexical_index):
+    hybrid = retriever(lexical_index, ["warranty"])
+    assert [document.id for document in hybrid.invoke("model x200")] == ["x200"]
+    assert hybrid.vector_retriever.queries == []
+
+
+def test_keyword_query_without_matches_falls_back_to_fusion(lexical_index):
+    hybrid = retriever(lexical_index, ["warranty"])
+    assert [document.id for document in hybrid.invoke("z900")] == ["warranty"]
+    assert hybrid.vector_retriever.queries == ["z900"]
+
+
+def test_reciprocal_rank_fusion_favours_chunks_found_by_both(lexical_index):
+    hybrid = retriever(lexical_index, ["wifi", "x200", "email"])
+    # Only x200 is in both rankings (second by vector, first by BM25), so it beats the
+    # vector ranking's first chunk (wifi), which in turn edges out BM25's second (warranty)
+    documents = hybrid.invoke("Does the x200 model come with a spare battery and warranty?")
+    assert [document.id for document in documents] == ["x200", "wifi"]
+
+
+def test_lexical_mode_never_calls_the_vector_retriever(lexical_index):
+    hybrid = retriever(lexical_index, ["warranty"], mode="lexical")
+    assert hybrid.invoke("How long is the warranty on the router?")
+    assert hybrid.invoke("nothing matches zzz") == []
+    assert hybrid.vector_retriever.queries == []
+
+
+@pytest.mark.skipif("RETRIEVAL_MODE" in os.environ, reason="retrieval mode set by the environment")
+def test_vector_retrieval_by_default():
+    # Hybrid retrieval changes which chunks every deployment returns, so it is opted into
+    assert Config.RETRIEVAL_MODE == "vector"
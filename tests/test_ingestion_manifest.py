@@ -0,0 +1,101 @@
+import os
+import threading
+
+from services.ingestion_manifest import IngestionManifest
+
+
+def write(path, content):
+    with open(path, "w") as file:
+        file.write(content)
+
+
+def test_new_file_is_not_current(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    assert not manifest.is_current("a.txt", str(source))
+    assert manifest.get_chunk_ids("a.txt") == []
+
+
+def test_recorded_file_is_current_and_survives_reload(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    path = str(tmp_path / "store" / "manifest.json")
+    manifest = IngestionManifest(path)
+    manifest.record("a.txt", str(source), ["id-1", "id-2"])
+    manifest.save()
+
+    reloaded = IngestionManifest(path)
+    assert reloaded.is_current("a.txt", str(source))
+    assert reloaded.get_chunk_ids("a.txt") == ["id-1", "id-2"]
+    assert reloaded.filenames() == ["a.txt"]
+
+
+def test_modified_content_is_not_current(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    manifest.record("a.txt", str(source), ["id-1"])
+    write(source, "hello, world")
+    assert not manifest.is_current("a.txt", str(source))
+
+
+def test_touched_file_with_same_content_is_current(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    manifest.record("a.txt", str(source), ["id-1"])
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert manifest.is_current("a.txt", str(source))
+
+
+def test_remove_returns_chunk_ids(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    manifest.record("a.txt", str(source), ["id-1"])
+    assert manifest.remove("a.txt") == ["id-1"]
+    assert manifest.remove("a.txt") == []
+    assert manifest.filenames() == []
+
+
+def test_corrupt_manifest_starts_empty(tmp_path):
+    path = tmp_path / "manifest.json"
+    write(path, "{not json")
+    assert IngestionManifest(str(path)).filenames() == []
+
+
+def test_fingerprint_hashes_content(tmp_path):
+    first, second = tmp_path / "a.txt", tmp_path / "b.txt"
+    write(first, "same")
+    write(second, "same")
+    manifest = IngestionManifest(str(tmp_path / "manifest.json"))
+    assert manifest.fingerprint(str(first))["sha256"] == manifest.fingerprint(str(second))["sha256"]
+    assert manifest.fingerprint(str(first))["size"] == 4
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    source = tmp_path / "a.txt"
+    write(source, "hello")
+    path = str(tmp_path / "manifest.json")
+    manifests = [IngestionManifest(path) for _ in range(4)]
+    for index, manifest in enumerate(manifests):
+        manifest.record("a.txt", str(source), [f"id-{index}"])
+    errors = []
+
+    def save_repeatedly(manifest):
+        try:
+            for _ in range(50):
+                manifest.save()
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save_repeatedly, args=(manifest,)) for manifest in manifests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert IngestionManifest(path).get_chunk_ids("a.txt")[0] in {f"id-{index}" for index in range(4)}
+    assert sorted(os.listdir(tmp_path)) == ["a.txt", "manifest.json"]
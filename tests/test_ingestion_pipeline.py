@@ -0,0 +1,114 @@
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from controllers.document_processor import build_splitter
+from controllers.ingestion_pipeline import DocumentBatch, IngestionPipeline
+from services.chunk_ids import make_chunk_id
+from services.embedding_batcher import BatchEmbedder
+from services.flat_vector_store import FlatVectorStore
+from services.hash_embeddings import HashEmbeddings
+from services.ingestion_manifest import IngestionManifest
+
+
+def make_pipeline(tmp_path, **kwargs):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(exist_ok=True)
+    splitter, chunker_config = build_splitter()
+    return IngestionPipeline(
+        FlatVectorStore(str(tmp_path / "flat_index"), embedding_function=HashEmbeddings()),
+        BatchEmbedder(HashEmbeddings()),
+        IngestionManifest(str(tmp_path / "manifest.json")),
+        splitter,
+        chunker_config,
+        str(data_dir),
+        **kwargs
+    )
+
+
+def page(text, number):
+    return [Document(page_content=text, metadata={"page": number})]
+
+
+def test_file_is_fingerprinted_once_and_recorded_as_split(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    source = tmp_path / "data" / "manual.txt"
+    source.write_text("original content")
+    calls, original = [], {}
+    fingerprinted = threading.Event()
+    fingerprint = pipeline.manifest.fingerprint
+
+    def counting_fingerprint(path):
+        calls.append(path)
+        result = fingerprint(path)
+        fingerprinted.set()
+        return result
+
+    pipeline.manifest.fingerprint = counting_fingerprint
+
+    def batches():
+        yield DocumentBatch("manual.txt", page("First page.", 0), False)
+        # The file changes while it is being ingested; its chunks and manifest entry
+        # must still describe the version the chunk IDs were derived from
+        assert fingerprinted.wait(5)
+        original.update(fingerprint(str(source)))
+        source.write_text("modified content, longer than before")
+        yield DocumentBatch("manual.txt", page("Second page.", 1), True)
+
+    pipeline.run(batches())
+
+    assert len(calls) == 1
+    assert pipeline.manifest._entries["manual.txt"]["sha256"] == original["sha256"]
+    assert pipeline.manifest.get_chunk_ids("manual.txt") == [
+        make_chunk_id(original["sha256"], number, 0, pipeline.chunker_config) for number in (0, 1)
+    ]
+
+
+def test_bounded_queues_hold_back_the_parser(tmp_path):
+    pipeline = make_pipeline(tmp_path, queue_size=1)
+    # One batch per embedding request, so the embed stage never holds more than one
+    pipeline.embedder = BatchEmbedder(HashEmbeddings(), batch_size=1, max_concurrency=1)
+    counts = {"parsed": 0, "written": 0, "ahead": 0}
+    write = pipeline._write
+
+    def slow_write(batch):
+        time.sleep(0.01)
+        counts["written"] += 1
+        counts["ahead"] = max(counts["ahead"], counts["parsed"] - counts["written"])
+        return write(batch)
+
+    pipeline._write = slow_write
+    for index in range(30):
+        (tmp_path / "data" / f"doc{index}.txt").write_text(f"Document {index}")
+
+    def batches():
+        for index in range(30):
+            counts["parsed"] += 1
+            yield DocumentBatch(f"doc{index}.txt", page(f"Document {index}", 0))
+
+    stats = pipeline.run(batches())
+
+    assert stats["files"] == 30
+    # Three one-slot queues plus one batch in the hands of each of the four stages
+    assert counts["ahead"] <= 7
+
+
+def test_failed_file_keeps_its_previous_version(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    source = tmp_path / "data" / "manual.txt"
+    source.write_text("version 1")
+    pipeline.run([DocumentBatch("manual.txt", page("Reset the router.", 0))])
+    previous_ids = pipeline.manifest.get_chunk_ids("manual.txt")
+
+    # Version 2 fails to load after its first page range was already written
+    source.write_text("version 2, longer")
+    stats = pipeline.run([
+        DocumentBatch("manual.txt", page("Reset the router with the new button.", 0), False),
+        DocumentBatch("manual.txt", None, True, OSError("truncated file")),
+    ])
+
+    assert stats["failed"] == 1
+    assert pipeline.manifest.get_chunk_ids("manual.txt") == previous_ids
+    assert [document.page_content for document in pipeline.vectorstore.get_by_ids(previous_ids)] == ["Reset the router."]
+    assert pipeline.vectorstore.count() == 1
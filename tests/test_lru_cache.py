@@ -0,0 +1,75 @@
+import asyncio
+
+from services import lru_cache
+from services.embedding_cache import CachedQueryEmbeddings
+from services.lru_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(lru_cache, "time", clock)
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 2
+    assert cache.get("a", "expired") == "expired"
+    assert len(cache) == 0
+
+
+def test_stats_track_hits_and_misses():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"], stats["hit_rate"]) == (1, 1, 1, 0.5)
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text))]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+    def embed_documents(self, texts):
+        return [[0.0] for _ in texts]
+
+
+def test_query_embeddings_are_cached_by_normalized_text():
+    embeddings = CountingEmbeddings()
+    cached = CachedQueryEmbeddings(embeddings)
+    assert cached.embed_query("Reset  the router") == cached.embed_query("reset the router")
+    assert asyncio.run(cached.aembed_query("RESET the router ")) == [17.0]
+    assert embeddings.queries == ["Reset  the router"]
+    assert cached.cache.stats()["hits"] == 2
+
+
+def test_document_embeddings_bypass_the_cache():
+    cached = CachedQueryEmbeddings(CountingEmbeddings())
+    assert cached.embed_documents(["a", "b"]) == [[0.0], [0.0]]
+    assert len(cached.cache) == 0
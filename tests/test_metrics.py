@@ -0,0 +1,60 @@
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry
+
+from services.fake_ai import FakeChatModel, SimulatedLLMError
+from services.metrics import LLMMetricsCallback, StageMetricsExporter, StatsCollector
+from services.tracing import Tracer
+
+
+PROMPT = "Context: Hold the reset button for ten seconds.\nQuestion: How do I reset?"
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_llm_callback_counts_calls_and_tokens():
+    llm = FakeChatModel(latency=0, tokens_per_sec=0, callbacks=[LLMMetricsCallback("test-invoke")])
+    message = llm.invoke(PROMPT)
+    assert sample("ragchat_llm_calls_total", model="test-invoke", outcome="ok") == 1
+    assert sample("ragchat_llm_tokens_total", model="test-invoke", direction="input") == \
+        message.usage_metadata["input_tokens"]
+    assert sample("ragchat_llm_tokens_total", model="test-invoke", direction="output") == 7
+
+
+def test_llm_callback_counts_streamed_tokens():
+    llm = FakeChatModel(latency=0, tokens_per_sec=0, callbacks=[LLMMetricsCallback("test-stream")])
+    list(llm.stream(PROMPT))
+    assert sample("ragchat_llm_tokens_total", model="test-stream", direction="output") == 7
+
+
+def test_llm_callback_counts_errors():
+    llm = FakeChatModel(latency=0, tokens_per_sec=0, failure_rate=1.0, callbacks=[LLMMetricsCallback("test-error")])
+    with pytest.raises(SimulatedLLMError):
+        llm.invoke(PROMPT)
+    assert sample("ragchat_llm_calls_total", model="test-error", outcome="error") == 1
+    assert sample("ragchat_llm_calls_total", model="test-error", outcome="ok") == 0
+
+
+def test_stage_exporter_observes_spans():
+    tracer = Tracer([StageMetricsExporter()])
+    with tracer.span("test.stage"):
+        pass
+    with pytest.raises(RuntimeError):
+        with tracer.span("test.stage"):
+            raise RuntimeError("boom")
+    assert sample("ragchat_stage_seconds_count", stage="test.stage") == 2
+    assert sample("ragchat_stage_errors_total", stage="test.stage") == 1
+
+
+def test_stats_collector_reads_stats_at_scrape_time():
+    stats = {"responses": {"hits": 3, "misses": 1, "size": 4}, "embeddings": {"hits": 0, "misses": 2}}
+    sizes = {"bm25": 10}
+    registry = CollectorRegistry()
+    registry.register(StatsCollector(lambda: stats, lambda: sizes))
+    assert registry.get_sample_value("ragchat_cache_hits_total", {"cache": "responses"}) == 3
+    assert registry.get_sample_value("ragchat_cache_misses_total", {"cache": "embeddings"}) == 2
+    assert registry.get_sample_value("ragchat_cache_entries", {"cache": "responses"}) == 4
+    assert registry.get_sample_value("ragchat_cache_entries", {"cache": "embeddings"}) is None
+    sizes["bm25"] = 12
+    assert registry.get_sample_value("ragchat_index_chunks", {"index": "bm25"}) == 12
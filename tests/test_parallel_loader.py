@@ -0,0 +1,99 @@
+from concurrent.futures import Future
+
+import pytest
+
+from services import parallel_loader
+from services.parallel_loader import ParallelPDFLoader
+
+
+class RecordingExecutor:
+    """
+    Synchronous stand-in for ProcessPoolExecutor that records how many submitted tasks
+    were outstanding (submitted but not yet collected) at most.
+    """
+
+    instances = []
+
+    def __init__(self, max_workers=None, mp_context=None):
+        self.mp_context = mp_context
+        self.outstanding = 0
+        self.max_outstanding = 0
+        RecordingExecutor.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, function, *args):
+        executor = self
+        executor.outstanding += 1
+        executor.max_outstanding = max(executor.max_outstanding, executor.outstanding)
+
+        class TrackedFuture(Future):
+            def result(self, timeout=None):
+                executor.outstanding -= 1
+                return super().result(timeout)
+
+        future = TrackedFuture()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def recording_executor(monkeypatch):
+    RecordingExecutor.instances = []
+    monkeypatch.setattr(parallel_loader, "ProcessPoolExecutor", RecordingExecutor)
+    return RecordingExecutor
+
+
+def page_texts(results):
+    return [(path.rsplit("/", 1)[-1], [doc.page_content for doc in docs] if docs else docs, error is not None)
+            for path, docs, error in results]
+
+
+def test_inline_load_keeps_file_and_page_order(make_pdf):
+    first = make_pdf("first.pdf", ["one", "two", "three"])
+    second = make_pdf("second.pdf", ["four"])
+    results = list(ParallelPDFLoader(max_workers=1, pages_per_task=2).lazy_load([first, second]))
+    assert page_texts(results) == [("first.pdf", ["one", "two", "three"], False), ("second.pdf", ["four"], False)]
+    assert [doc.metadata["page"] for doc in results[0][1]] == [0, 1, 2]
+
+
+def test_broken_file_does_not_affect_others(make_pdf, tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"garbage")
+    good = make_pdf("good.pdf", ["fine"])
+    results = list(ParallelPDFLoader(max_workers=1).lazy_load([str(broken), good]))
+    assert page_texts(results) == [("broken.pdf", None, True), ("good.pdf", ["fine"], False)]
+
+
+def test_pool_uses_spawned_workers(make_pdf, recording_executor):
+    path = make_pdf("a.pdf", ["one", "two", "three"])
+    list(ParallelPDFLoader(max_workers=2, pages_per_task=1).lazy_load([path]))
+    assert recording_executor.instances[0].mp_context.get_start_method() == "spawn"
+
+
+def test_pool_bounds_ranges_in_flight(make_pdf, recording_executor):
+    path = make_pdf("big.pdf", [f"page {number}" for number in range(20)])
+    small = make_pdf("small.pdf", ["last"])
+    loader = ParallelPDFLoader(max_workers=2, pages_per_task=1)
+    results = list(loader.lazy_load([path, small]))
+    assert page_texts(results) == [
+        ("big.pdf", [f"page {number}" for number in range(20)], False),
+        ("small.pdf", ["last"], False),
+    ]
+    assert recording_executor.instances[0].max_outstanding <= 2 * loader.max_workers
+
+
+def test_pool_matches_inline_results(make_pdf, tmp_path):
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"garbage")
+    paths = [make_pdf("a.pdf", ["a1", "a2", "a3"]), str(broken), make_pdf("b.pdf", ["b1"])]
+    pooled = list(ParallelPDFLoader(max_workers=2, pages_per_task=2).lazy_load(paths))
+    inline = list(ParallelPDFLoader(max_workers=1, pages_per_task=2).lazy_load(paths))
+    assert page_texts(pooled) == page_texts(inline)
@@ -0,0 +1,231 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableSequence
+
+from config import Config
+from controllers.qa_graph_handler import CustomerSupportBot
+from controllers.vector_db_manager import VectorDBManager
+from services.fake_ai import FakeChatModel
+from services.response_cache import ResponseCache
+
+
+class GatedRetriever(BaseRetriever):
+    """
+    Returns fixed documents once `gate` is set, so a test controls when retrieval finishes.
+    """
+
+    documents: list
+    gate: threading.Event
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        assert self.gate.wait(5)
+        return self.documents
+
+
+DOCUMENTS = [Document(id="chunk-1", page_content="Hold the reset button for ten seconds.")]
+
+
+@pytest.fixture
+def bot(tmp_path):
+    bot = CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0))
+    bot.sentiment_backend = "llm"
+    bot.semantic_cache = None
+    bot.qa_handler.response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    yield bot
+    bot._speculation_pool.shutdown(wait=True)
+
+
+def record_answers(bot):
+    answered = []
+    answer = bot.qa_handler.answer_from_documents
+
+    def recording(query, documents, **kwargs):
+        answered.append(query)
+        return answer(query, documents, **kwargs)
+
+    bot.qa_handler.answer_from_documents = recording
+    return answered
+
+
+def test_escalation_stops_sync_speculation_before_generation(bot):
+    bot.speculation = "answer"
+    answered = record_answers(bot)
+    gate = threading.Event()
+    retriever = GatedRetriever(documents=DOCUMENTS, gate=gate)
+
+    response = bot.handle_query("I want to speak to a human", retriever)
+    gate.set()
+    bot._speculation_pool.shutdown(wait=True)
+
+    assert response == "Let me connect you to a human representative..."
+    assert answered == []
+    assert len(bot.qa_handler.response_cache) == 0
+
+
+def test_sync_speculation_answer_is_used_when_not_escalated(bot):
+    bot.speculation = "answer"
+    answered = record_answers(bot)
+    gate = threading.Event()
+    gate.set()
+
+    response = bot.handle_query("How do I reset the device?", GatedRetriever(documents=DOCUMENTS, gate=gate))
+
+    assert response.startswith("Hold the reset button")
+    assert answered == ["How do I reset the device?"]
+    assert len(bot.qa_handler.response_cache) == 1
+
+
+def test_discarded_answer_is_not_cached(bot):
+    discarded = threading.Event()
+    discarded.set()
+    result = bot.qa_handler.answer_from_documents("How do I reset the device?", DOCUMENTS, discarded=discarded)
+    assert result["result"].startswith("Hold the reset button")
+    assert len(bot.qa_handler.response_cache) == 0
+
+
+def test_answer_is_not_cached_when_the_index_changes_mid_request(bot, monkeypatch):
+    monkeypatch.setattr(VectorDBManager, "generation", 0)
+    analyze = bot.sentiment_analyzer
+
+    def ingest_while_routing(text):
+        # An ingestion finishing after the request started, before its answer is generated
+        VectorDBManager.invalidate()
+        return analyze(text)
+
+    monkeypatch.setattr(bot, "sentiment_analyzer", ingest_while_routing)
+    gate = threading.Event()
+    gate.set()
+    response = bot.handle_query("How do I reset the device?", GatedRetriever(documents=DOCUMENTS, gate=gate))
+
+    assert response.startswith("Hold the reset button")
+    assert len(bot.qa_handler.response_cache) == 0
+
+
+@pytest.mark.skipif("SPECULATION" in os.environ, reason="speculation enabled by the environment")
+def test_speculation_is_off_by_default(bot):
+    # Speculative retrieval costs an embedding call per escalated query, so it is opted into
+    assert Config.SPECULATION == "off"
+    assert bot.speculation == "off"
+
+
+def stream(bot, query, retriever):
+    async def collect():
+        return [fragment async for fragment in bot.astream_response(query, retriever)]
+
+    return asyncio.run(collect())
+
+
+def test_answer_is_streamed_in_fragments(bot):
+    gate = threading.Event()
+    gate.set()
+    retriever = GatedRetriever(documents=DOCUMENTS, gate=gate)
+
+    fragments = stream(bot, "How do I reset the device?", retriever)
+
+    assert len(fragments) > 1
+    assert "".join(fragments) == bot.handle_query("How do I reset the device?", retriever)
+
+
+def test_escalation_is_streamed_as_one_fragment(bot):
+    gate = threading.Event()
+    gate.set()
+    fragments = stream(bot, "I want to speak to a human", GatedRetriever(documents=DOCUMENTS, gate=gate))
+    assert fragments == ["Let me connect you to a human representative..."]
+
+
+def slow_routing(bot, monkeypatch, sentiment):
+    async def decide_late(text):
+        # The speculative answer streams while the route is still undecided
+        await asyncio.sleep(0.2)
+        return sentiment
+
+    monkeypatch.setattr(bot, "asentiment_analyzer", decide_late)
+
+
+def test_speculative_tokens_are_dropped_on_escalation(bot, monkeypatch):
+    bot.speculation = "answer"
+    slow_routing(bot, monkeypatch, "negative")
+    gate = threading.Event()
+    gate.set()
+
+    fragments = stream(bot, "How do I reset the device?", GatedRetriever(documents=DOCUMENTS, gate=gate))
+
+    assert fragments == ["Let me connect you to a human representative..."]
+
+
+def test_speculative_tokens_are_released_once_routed_to_an_answer(bot, monkeypatch):
+    bot.speculation = "answer"
+    slow_routing(bot, monkeypatch, "positive")
+    gate = threading.Event()
+    gate.set()
+    retriever = GatedRetriever(documents=DOCUMENTS, gate=gate)
+
+    fragments = stream(bot, "How do I reset the device?", retriever)
+
+    assert "".join(fragments).startswith("Hold the reset button")
+    assert "".join(fragments) == bot.qa_handler.answer_from_documents("How do I reset the device?", DOCUMENTS)["result"]
+
+
+def test_chains_are_built_once_per_handler(bot, monkeypatch):
+    answer_chain, sentiment_chain = bot.qa_handler.answer_chain, bot.sentiment_chain
+    built = []
+    init = RunnableSequence.__init__
+
+    def recording_init(self, *args, **kwargs):
+        built.append(self)
+        init(self, *args, **kwargs)
+
+    monkeypatch.setattr(RunnableSequence, "__init__", recording_init)
+    gate = threading.Event()
+    gate.set()
+    retriever = GatedRetriever(documents=DOCUMENTS, gate=gate)
+    bot.handle_query("How do I reset the device?", retriever)
+    asyncio.run(bot.ahandle_query("How do I pair the headphones?", retriever))
+
+    assert built == []
+    assert bot.qa_handler.answer_chain is answer_chain and bot.sentiment_chain is sentiment_chain
+
+
+class BarrierRetriever(BaseRetriever):
+    """
+    Returns the documents of one tenant once every concurrent request has reached retrieval.
+    """
+
+    documents: list
+    barrier: threading.Barrier
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        self.barrier.wait(5)
+        return self.documents
+
+    async def _aget_relevant_documents(self, query, *, run_manager):
+        await asyncio.to_thread(self.barrier.wait, 5)
+        return self.documents
+
+
+def tenant_retrievers(count):
+    barrier = threading.Barrier(count)
+    return [
+        BarrierRetriever(documents=[Document(id=f"chunk-{index}", page_content=f"Tenant{index} manual text.")],
+                         barrier=barrier)
+        for index in range(count)
+    ]
+
+
+def test_shared_bot_answers_concurrent_requests_from_their_own_retriever(bot):
+    retrievers = tenant_retrievers(4)
+    with ThreadPoolExecutor(len(retrievers)) as pool:
+        responses = list(pool.map(lambda retriever: bot.handle_query("What does the manual say?", retriever), retrievers))
+    assert responses == [f"Tenant{index} manual text." for index in range(4)]
+
+    async def ask_all():
+        return await asyncio.gather(*(bot.ahandle_query("What does the manual say?", retriever)
+                                      for retriever in tenant_retrievers(4)))
+
+    assert asyncio.run(ask_all()) == responses
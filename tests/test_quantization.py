@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from services.flat_vector_store import FlatVectorStore, quantize_int8
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(1).normal(size=(300, 64)).astype(np.float32)
+
+
+def populate(store, vectors):
+    store.upsert_embeddings([f"c{i}" for i in range(len(vectors))], vectors, [f"text {i}" for i in range(len(vectors))])
+    return store
+
+
+def test_quantize_int8_reconstructs_rows(vectors):
+    codes, scales = quantize_int8(vectors)
+    assert codes.dtype == np.int8 and scales.dtype == np.float32
+    assert scales.shape == (len(vectors),)
+    error = np.abs(codes * scales[:, None] - vectors).max(axis=1)
+    # Rounding error is at most half a quantization step per component
+    assert np.all(error <= scales / 2 + 1e-6)
+
+
+def test_quantize_int8_handles_zero_rows():
+    codes, scales = quantize_int8(np.zeros((2, 4)))
+    assert not codes.any()
+    assert not scales.any()
+
+
+def test_int8_search_matches_exact_search(tmp_path, vectors):
+    exact = populate(FlatVectorStore(str(tmp_path / "exact")), vectors)
+    quantized = populate(FlatVectorStore(str(tmp_path / "int8"), quantization="int8"), vectors)
+    queries = np.random.default_rng(2).normal(size=(20, 64)).astype(np.float32)
+    for query in queries:
+        expected = exact.similarity_search_with_score_by_vector(query, k=5)
+        results = quantized.similarity_search_with_score_by_vector(query, k=5)
+        assert [document.id for document, _ in results] == [document.id for document, _ in expected]
+        # Candidates are re-ranked against the float32 rows, so scores are exact
+        assert [score for _, score in results] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_codes_are_built_for_an_existing_float32_index(tmp_path, vectors):
+    path = str(tmp_path / "flat")
+    populate(FlatVectorStore(path), vectors)
+    store = FlatVectorStore(path, quantization="int8")
+    assert os.path.exists(store._codes_path)
+    assert store.similarity_search_by_vector(vectors[42], k=1)[0].id == "c42"
+
+
+def test_codes_follow_writes_from_unquantized_handles(tmp_path, vectors):
+    path = str(tmp_path / "flat")
+    quantized = populate(FlatVectorStore(path, quantization="int8"), vectors[:100])
+    populate(FlatVectorStore(path), vectors)
+    assert quantized.similarity_search_by_vector(vectors[250], k=1)[0].id == "c250"
+
+
+def test_memory_stats_report_scan_bytes(tmp_path, vectors):
+    exact = populate(FlatVectorStore(str(tmp_path / "exact")), vectors)
+    quantized = populate(FlatVectorStore(str(tmp_path / "int8"), quantization="int8"), vectors)
+    assert exact.memory_stats()["scan_bytes_per_chunk"] == 4 * 64
+    stats = quantized.memory_stats()
+    assert stats["chunks"] == 300 and stats["dim"] == 64 and stats["quantization"] == "int8"
+    assert stats["scan_bytes_per_chunk"] == 64 + 4
+
+
+def test_unknown_quantization_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        FlatVectorStore(str(tmp_path / "flat"), quantization="pq")
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import threading
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config import Config
+from controllers.qa_handler import QAHandler
+from controllers.vector_db_manager import VectorDBManager
+from services.fake_ai import FakeChatModel
+from services.response_cache import ResponseCache
+
+DOCUMENTS = [Document(id="chunk-1", page_content="Hold the reset button for ten seconds.")]
+
+
+def test_key_depends_on_question_context_prompt_and_model():
+    key = ResponseCache.make_key("How do I reset?", DOCUMENTS, "prompt", "model")
+    assert key == ResponseCache.make_key("  how do I   RESET? ", DOCUMENTS, "prompt", "model")
+    other_documents = [Document(id="chunk-2", page_content="x")]
+    assert len({
+        key,
+        ResponseCache.make_key("How do I pair?", DOCUMENTS, "prompt", "model"),
+        ResponseCache.make_key("How do I reset?", other_documents, "prompt", "model"),
+        ResponseCache.make_key("How do I reset?", DOCUMENTS, "other prompt", "model"),
+        ResponseCache.make_key("How do I reset?", DOCUMENTS, "prompt", "other model"),
+    }) == 5
+
+
+def test_round_trip_persistence_and_clear(tmp_path):
+    path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(path)
+    assert cache.get("k") is None
+    cache.put("k", "answer")
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get("k") == "answer"
+    assert reopened.stats()["hits"] == 1
+    reopened.clear()
+    assert len(reopened) == 0
+
+
+def test_put_is_skipped_when_no_longer_valid(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    cache.put("k", "answer", valid=lambda: False)
+    assert cache.get("k") is None
+    cache.put("k", "answer", valid=lambda: True)
+    assert cache.get("k") == "answer"
+
+
+class RecordingCache(ResponseCache):
+    """
+    ResponseCache recording the threads its lookups and writes run on.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return super().get(key)
+
+    def put(self, key, response, valid=None):
+        self.threads.append(threading.get_ident())
+        super().put(key, response, valid)
+
+
+def test_async_answers_use_the_cache_off_the_event_loop(tmp_path):
+    llm = FakeChatModel(latency=0, tokens_per_sec=0)
+    handler = QAHandler(llm=llm)
+    handler.response_cache = RecordingCache(str(tmp_path / "responses.sqlite3"))
+
+    async def answer_twice():
+        loop_thread = threading.get_ident()
+        first = await handler.aanswer_from_documents("How do I reset?", DOCUMENTS)
+        second = await handler.aanswer_from_documents("How do I reset?", DOCUMENTS)
+        routed = await handler.aroute_and_answer("How do I reset?", DOCUMENTS)
+        return loop_thread, first, second, routed
+
+    loop_thread, first, second, routed = asyncio.run(answer_twice())
+    assert first["result"] == second["result"]
+    assert routed == (False, {"query": "How do I reset?", "result": first["result"], "source_documents": DOCUMENTS})
+    assert handler.response_cache.stats()["hits"] == 1
+    assert handler.response_cache.threads and loop_thread not in handler.response_cache.threads
+
+
+class IngestingRetriever(BaseRetriever):
+    """
+    Simulates an ingestion finishing while the request retrieves its context.
+    """
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        VectorDBManager.invalidate()
+        return DOCUMENTS
+
+
+def test_answer_computed_across_an_invalidation_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(VectorDBManager, "generation", 0)
+    handler = QAHandler(llm=FakeChatModel(latency=0, tokens_per_sec=0))
+    handler.response_cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+
+    assert handler.get_answer("How do I reset?", IngestingRetriever())["result"]
+    assert asyncio.run(handler.aget_answer("How do I reset?", IngestingRetriever()))["result"]
+    handler.answer_from_documents("How do I reset?", DOCUMENTS, generation=0)
+    asyncio.run(handler.aroute_and_answer("How do I reset?", DOCUMENTS, generation=0))
+    assert len(handler.response_cache) == 0
+
+    handler.answer_from_documents("How do I reset?", DOCUMENTS)
+    assert len(handler.response_cache) == 1
+
+
+@pytest.mark.skipif("RESPONSE_CACHE" in os.environ, reason="response cache enabled by the environment")
+def test_disabled_by_default():
+    assert not Config.RESPONSE_CACHE
+    assert QAHandler(llm=FakeChatModel(latency=0, tokens_per_sec=0)).response_cache is None
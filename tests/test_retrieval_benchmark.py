@@ -0,0 +1,60 @@
+import argparse
+import importlib.util
+import os
+
+import pytest
+
+from config import Config
+from controllers.vector_db_manager import VectorDBManager
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "retrieval.py")
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("retrieval", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def benchmark(monkeypatch):
+    """
+    The benchmark module, with the Config and VectorDBManager state it overwrites restored afterwards.
+    """
+    for name in ["VECTOR_BACKEND", "FLAT_QUANTIZATION", "RETRIEVAL_K", "RETRIEVAL_MODE"]:
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    for name, value in [("query_embeddings", None), ("generation", 0), ("_vectorstore", None), ("_retriever", None),
+                        ("_retriever_generation", -1), ("lexical_index", None), ("_invalidation_listeners", [])]:
+        monkeypatch.setattr(VectorDBManager, name, value)
+    yield load_benchmark()
+    if VectorDBManager.lexical_index is not None:
+        VectorDBManager.lexical_index.close()
+
+
+def test_corpus_is_deterministic_and_labeled(benchmark):
+    documents, queries = benchmark.make_corpus(200, 40, 50, 0.3, seed=1)
+    again, _ = benchmark.make_corpus(200, 40, 50, 0.3, seed=1)
+    assert [document.page_content for document in documents] == [document.page_content for document in again]
+    assert len(queries) == 50
+    for query in queries:
+        target = documents[query["target"]]
+        assert target.metadata["synthetic_id"] == query["target"]
+        if query["type"] == "keyword":
+            assert target.page_content.startswith(query["text"] + " ")
+
+
+def test_run_build_reports_every_mode(benchmark):
+    args = argparse.Namespace(k=[1, 10], queries=40, keyword_fraction=0.5, seed=0, dim=256, concurrency=2,
+                              modes=["vector", "hybrid", "lexical"])
+    result = benchmark.run_build(args, 300, 40, "flat")
+
+    assert result["chunks"] == 300 and result["build_seconds"] > 0
+    assert set(result["modes"]) == {"vector", "hybrid", "lexical"}
+    for stats in result["modes"].values():
+        assert 0 < stats["latency_ms_p50"] <= stats["latency_ms_p99"]
+        assert 0 <= stats["recall@1"] <= stats["recall@10"] <= 1
+    # Product codes are exact keyword matches; lexical mode never embeds the query
+    assert result["modes"]["lexical"]["recall@1_keyword"] == 1.0
+    assert result["modes"]["lexical"]["embedding_calls_per_query"] == 0
+    assert result["modes"]["vector"]["embedding_calls_per_query"] == 1
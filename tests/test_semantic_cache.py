@@ -0,0 +1,147 @@
+import asyncio
+import os
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config import Config
+from controllers.qa_graph_handler import CustomerSupportBot
+from controllers.vector_db_manager import VectorDBManager
+from services import semantic_cache
+from services.fake_ai import FakeChatModel
+from services.semantic_cache import SemanticCache
+
+
+class TableEmbeddings:
+    """
+    Embeds questions from a fixed table of vectors.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def embed_query(self, text):
+        return self.table[text]
+
+    async def aembed_query(self, text):
+        return self.table[text]
+
+
+EMBEDDINGS = TableEmbeddings({
+    "how do i reset the router": [1.0, 0.0, 0.0],
+    "how can i reset my router": [0.99, 0.05, 0.0],
+    "what is the warranty": [0.0, 1.0, 0.0],
+    "how do i pair headphones": [0.0, 0.0, 1.0],
+})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_paraphrase_above_threshold_hits():
+    cache = SemanticCache(EMBEDDINGS, threshold=0.95)
+    cache.put("how do i reset the router", "Hold the reset button.")
+    assert cache.get("how can i reset my router") == "Hold the reset button."
+    assert cache.get("what is the warranty") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_near_identical_question_replaces_entry():
+    cache = SemanticCache(EMBEDDINGS, threshold=0.95)
+    cache.put("how do i reset the router", "old")
+    cache.put("how can i reset my router", "new")
+    assert len(cache) == 1
+    assert cache.get("how do i reset the router") == "new"
+
+
+def test_least_recently_used_entry_is_evicted(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    cache = SemanticCache(EMBEDDINGS, maxsize=2, ttl=None)
+    cache.put("how do i reset the router", "reset")
+    clock.now += 1
+    cache.put("what is the warranty", "two years")
+    clock.now += 1
+    assert cache.get("how do i reset the router") == "reset"
+    clock.now += 1
+    cache.put("how do i pair headphones", "hold the pairing button")
+    assert cache.get("what is the warranty") is None
+    assert cache.get("how do i reset the router") == "reset"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(semantic_cache, "time", clock)
+    cache = SemanticCache(EMBEDDINGS, ttl=60)
+    cache.put("how do i reset the router", "reset")
+    clock.now += 61
+    assert cache.get("how do i reset the router") is None
+    assert len(cache) == 0
+
+
+def test_clear_and_async_access():
+    cache = SemanticCache(EMBEDDINGS)
+    asyncio.run(cache.aput("how do i reset the router", "reset"))
+    assert asyncio.run(cache.aget("how do i reset the router")) == "reset"
+    cache.clear()
+    assert cache.get("how do i reset the router") is None
+
+
+@pytest.mark.skipif("SEMANTIC_CACHE" in os.environ, reason="semantic cache enabled by the environment")
+def test_disabled_by_default():
+    # A hit skips sentiment routing, so the cache must be opted into
+    assert not Config.SEMANTIC_CACHE
+    assert CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0)).semantic_cache is None
+
+
+class StaticRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [Document(id="chunk-1", page_content="Hold the reset button for ten seconds.")]
+
+
+def test_hit_and_miss_return_the_same_shape():
+    bot = CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0))
+    bot.sentiment_backend = "llm"
+    bot.semantic_cache = SemanticCache(EMBEDDINGS)
+    miss = bot.handle_query("how do i reset the router", StaticRetriever())
+    hit = bot.handle_query("how can i reset my router", StaticRetriever())
+    async_hit = asyncio.run(bot.ahandle_query("how do i reset the router", StaticRetriever()))
+    assert isinstance(miss, str)
+    assert miss == hit == async_hit
+    assert bot.semantic_cache.hits == 2
+
+
+class IngestingRetriever(BaseRetriever):
+    """
+    Simulates an ingestion finishing while the request retrieves its context.
+    """
+
+    def _get_relevant_documents(self, query, *, run_manager):
+        VectorDBManager.invalidate()
+        return [Document(id="chunk-1", page_content="Hold the reset button for ten seconds.")]
+
+
+def test_answer_computed_across_an_invalidation_is_not_cached(monkeypatch):
+    monkeypatch.setattr(VectorDBManager, "generation", 0)
+    bot = CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0))
+    bot.sentiment_backend = "llm"
+    bot.semantic_cache = SemanticCache(EMBEDDINGS)
+
+    bot.handle_query("how do i reset the router", IngestingRetriever())
+    asyncio.run(bot.ahandle_query("how do i reset the router", IngestingRetriever()))
+
+    async def stream():
+        return [fragment async for fragment in bot.astream_response("how do i reset the router", IngestingRetriever())]
+
+    assert "".join(asyncio.run(stream())).startswith("Hold the reset button")
+    assert len(bot.semantic_cache) == 0
+
+    bot.handle_query("how do i reset the router", StaticRetriever())
+    assert len(bot.semantic_cache) == 1
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+import pytest
+
+from config import Config
+from controllers.qa_graph_handler import CustomerSupportBot
+from services.fake_ai import FakeChatModel
+from services.sentiment import SentimentAnalyzer
+
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return SentimentAnalyzer()
+
+
+@pytest.mark.parametrize("text", [
+    "I want to speak to a human",
+    "Transfer me to customer service",
+    "Can I talk with a real person?",
+    "Connect me with an agent please",
+    "Get me your manager",
+    "Stop talking to a bot",
+])
+def test_explicit_transfer_requests_escalate(analyzer, text):
+    assert analyzer.requests_human(text)
+    assert analyzer.classify(text) == ("negative", 1.0)
+
+
+@pytest.mark.parametrize("text", [
+    "How do I contact customer service",
+    "What are the customer service opening hours?",
+    "I want a refund for my broken phone",
+    "Your product is garbage and broke after a day",
+    "How do I file a complaint about a late delivery?",
+    "Can I get a manager account?",
+    "How do I connect to the agent software?",
+    "How can I talk to the support team about a bug in the API?",
+    "I need an agent license for my team",
+    "How do I speak to the assistant using voice commands?",
+])
+def test_no_transfer_intent_is_not_a_certain_escalation(analyzer, text):
+    assert not analyzer.requests_human(text)
+    assert analyzer.classify(text)[1] < 1.0
+
+
+def test_plain_questions_are_answered(analyzer):
+    for text in ["How do I reset my password?", "What does the error code E42 mean?"]:
+        assert analyzer.analyze(text) == "positive"
+
+
+def test_confidence_is_a_probability_of_the_label(analyzer):
+    label, confidence = analyzer.classify("Where can I find the user manual?")
+    assert label == "positive"
+    assert 0.5 <= confidence <= 1.0
+
+
+def test_trains_on_custom_examples():
+    analyzer = SentimentAnalyzer([("hello there", "positive"), ("terrible awful service", "negative")] * 5)
+    assert analyzer.analyze("awful") == "negative"
+    assert analyzer.analyze("hello") == "positive"
+
+
+# Queries that are not in SEED_EXAMPLES; a confident label must be the right one
+HELD_OUT = [
+    ("I want a refund for my order", "positive"),
+    ("Can I get a manager account?", "positive"),
+    ("How can I talk to the support team about a bug in the API?", "positive"),
+    ("How do I return a damaged item?", "positive"),
+    ("How do I contact customer service", "positive"),
+    ("I want to change my plan", "positive"),
+    ("I need help with my router", "positive"),
+    ("Why was I charged twice?", "positive"),
+    ("My refund has not arrived yet, when will it come?", "positive"),
+    ("What's the manager approval limit in the admin console?", "positive"),
+    ("The agent app keeps logging me out", "positive"),
+    ("Your product is garbage and broke after a day", "negative"),
+    ("Nobody has answered my emails for two weeks, I am furious", "negative"),
+    ("you keep giving me useless answers", "negative"),
+    ("I have asked three times already, escalate this now", "negative"),
+    ("Your support is a joke", "negative"),
+    ("I want to cancel, your service is awful", "negative"),
+]
+
+
+@pytest.mark.parametrize("text, expected", HELD_OUT)
+def test_held_out_queries(analyzer, text, expected):
+    label, confidence = analyzer.classify(text)
+    assert label == expected or confidence < Config.SENTIMENT_CONFIDENCE_THRESHOLD
+
+
+def routing_bot(backend, llm_sentiment):
+    # The fake LLM answers every routing prompt with a fixed label, so the result shows which path decided
+    bot = CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0, sentiment=llm_sentiment))
+    bot.sentiment_backend = backend
+    return bot
+
+
+def test_llm_backend_always_asks_the_llm():
+    bot = routing_bot("llm", "negative")
+    assert bot.sentiment_analyzer("How do I reset my password?") == "negative"
+    assert asyncio.run(bot.asentiment_analyzer("How do I reset my password?")) == "negative"
+
+
+def test_hybrid_backend_asks_the_llm_only_when_unsure():
+    bot = routing_bot("hybrid", "negative")
+    # Explicit transfer request and a confident classification: no LLM call
+    assert bot.sentiment_analyzer("Connect me with an agent please") == "negative"
+    assert bot.sentiment_analyzer("How do I reset my password?") == "positive"
+    assert bot.local_sentiment.classify("I want to change my plan")[1] < Config.SENTIMENT_CONFIDENCE_THRESHOLD
+    assert bot.sentiment_analyzer("I want to change my plan") == "negative"
+    assert routing_bot("hybrid", "positive").sentiment_analyzer("I want to change my plan") == "positive"
+
+
+def test_local_backend_never_asks_the_llm():
+    bot = routing_bot("local", "negative")
+    assert bot.sentiment_analyzer("I want to change my plan") == "positive"
+
+
+@pytest.mark.skipif("SENTIMENT_BACKEND" in os.environ, reason="routing backend overridden by the environment")
+def test_hybrid_routing_by_default():
+    assert Config.SENTIMENT_BACKEND == "hybrid"
+    assert CustomerSupportBot(llm=FakeChatModel(latency=0, tokens_per_sec=0)).sentiment_backend == "hybrid"
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from config import Config
+from services import tracing
+from services.tracing import (
+    NOOP_SPAN, JsonLogExporter, RingBufferExporter, TracedRetriever, Tracer, request_context, traced
+)
+
+
+class StaticRetriever(BaseRetriever):
+    def _get_relevant_documents(self, query, *, run_manager):
+        return [Document(page_content="one"), Document(page_content="two")]
+
+
+@pytest.fixture
+def ring(monkeypatch):
+    """
+    Installs a process-wide tracer exporting to a ring buffer.
+    """
+    buffer = RingBufferExporter(100)
+    monkeypatch.setattr(tracing, "_tracer", Tracer([buffer]))
+    return buffer
+
+
+def test_spans_nest_and_carry_the_request_id():
+    buffer = RingBufferExporter()
+    tracer = Tracer([buffer])
+    with request_context("req-1") as request_id:
+        with tracer.span("graph.node", node="retrieve") as outer:
+            with tracer.span("qa.retrieve") as inner:
+                inner.set_attribute("documents", 3)
+    assert request_id == "req-1"
+    inner_span, outer_span = buffer.spans()
+    assert inner_span["name"] == "qa.retrieve" and inner_span["parent_id"] == outer.span_id
+    assert outer_span["parent_id"] is None
+    assert outer_span["attributes"] == {"node": "retrieve"}
+    assert inner_span["attributes"] == {"documents": 3}
+    assert {span["request_id"] for span in buffer.spans()} == {"req-1"}
+    assert all(span["duration_ms"] >= 0 for span in buffer.spans())
+
+
+def test_request_context_generates_ids_and_filters_spans():
+    buffer = RingBufferExporter()
+    tracer = Tracer([buffer])
+    with request_context() as first:
+        with tracer.span("a"):
+            pass
+    with request_context() as second:
+        with tracer.span("b"):
+            pass
+    assert first != second
+    assert [span["name"] for span in buffer.spans(request_id=second)] == ["b"]
+
+
+def test_failed_stage_records_the_error():
+    buffer = RingBufferExporter()
+    with pytest.raises(KeyError):
+        with Tracer([buffer]).span("qa.generate"):
+            raise KeyError("missing")
+    assert buffer.spans()[0]["error"] == "KeyError: 'missing'"
+
+
+def test_disabled_tracer_yields_the_noop_span():
+    tracer = Tracer()
+    assert not tracer.enabled
+    with tracer.span("anything", a=1) as current:
+        current.set_attribute("ignored", True)
+    assert current is NOOP_SPAN
+
+
+def test_ring_buffer_keeps_the_latest_spans():
+    buffer = RingBufferExporter(maxsize=2)
+    tracer = Tracer([buffer])
+    for name in ("a", "b", "c"):
+        with tracer.span(name):
+            pass
+    assert [span["name"] for span in buffer.spans()] == ["b", "c"]
+
+
+def test_failing_exporter_never_fails_the_request(caplog):
+    class BrokenExporter:
+        def on_start(self, span):
+            raise RuntimeError("collector down")
+
+        def export(self, span):
+            raise RuntimeError("collector down")
+
+    buffer = RingBufferExporter()
+    with Tracer([BrokenExporter(), buffer]).span("graph.node"):
+        pass
+    assert len(buffer.spans()) == 1
+    warnings = [record.getMessage() for record in caplog.records if record.levelname == "WARNING"]
+    assert len(warnings) == 2 and "BrokenExporter failed: collector down" in warnings[0]
+
+
+def test_from_config(monkeypatch):
+    monkeypatch.setattr(Config, "TRACING", "ring, log")
+    tracer = Tracer.from_config()
+    assert isinstance(tracer.ring_buffer, RingBufferExporter)
+    assert isinstance(tracer.exporters[1], JsonLogExporter)
+    monkeypatch.setattr(Config, "TRACING", "off")
+    assert not Tracer.from_config().enabled
+    monkeypatch.setattr(Config, "TRACING", "zipkin")
+    with pytest.raises(ValueError):
+        Tracer.from_config()
+
+
+def test_traced_decorator_sync_and_async(ring):
+    @traced("sync.stage")
+    def add(a, b):
+        return a + b
+
+    @traced("async.stage")
+    async def double(value):
+        await asyncio.sleep(0)
+        return 2 * value
+
+    assert add(1, 2) == 3
+    assert asyncio.run(double(4)) == 8
+    assert add.__name__ == "add"
+    assert [span["name"] for span in ring.spans()] == ["sync.stage", "async.stage"]
+
+
+def test_spans_nest_across_asyncio_tasks(ring):
+    async def handle():
+        with request_context("req-2"), tracing.span("graph.invoke"):
+            await asyncio.gather(*(asyncio.create_task(child(name)) for name in ("x", "y")))
+
+    async def child(name):
+        with tracing.span(name):
+            await asyncio.sleep(0)
+
+    asyncio.run(handle())
+    spans = {span["name"]: span for span in ring.spans()}
+    assert spans["x"]["parent_id"] == spans["y"]["parent_id"] == spans["graph.invoke"]["span_id"]
+    assert spans["x"]["request_id"] == "req-2"
+
+
+def test_traced_retriever_counts_documents(ring):
+    retriever = TracedRetriever(retriever=StaticRetriever(), span_name="vectorstore.search",
+                                attributes={"backend": "flat"})
+    assert len(retriever.invoke("query")) == 2
+    assert asyncio.run(retriever.ainvoke("query"))[0].page_content == "one"
+    assert [span["attributes"] for span in ring.spans()] == [{"backend": "flat", "documents": 2}] * 2
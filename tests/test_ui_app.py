@@ -0,0 +1,84 @@
+import asyncio
+import json
+import threading
+
+from UIApp import UIController
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+
+class SlowDBManager:
+    """
+    Stands in for VectorDBManager after an invalidation: building the retriever blocks.
+    """
+
+    def __init__(self):
+        self.threads = []
+
+    def get_retriever(self):
+        self.threads.append(threading.get_ident())
+        threading.Event().wait(0.2)
+        return "retriever"
+
+
+class EchoBot:
+    async def astream_response(self, data, retriever):
+        yield f"{data} via {retriever}"
+
+
+def make_controller():
+    controller = UIController.__new__(UIController)
+    controller.db_manager = SlowDBManager()
+    controller.qa_handler = EchoBot()
+    controller.query_slots = asyncio.Semaphore(4)
+    return controller
+
+
+def test_retriever_is_built_off_the_event_loop():
+    controller = make_controller()
+    websocket = RecordingWebSocket()
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beating = asyncio.create_task(heartbeat())
+        await controller.invoke_our_graph(websocket, "hello", "user-1")
+        beating.cancel()
+        return threading.get_ident(), ticks
+
+    loop_thread, ticks = asyncio.run(run())
+    assert controller.db_manager.threads and loop_thread not in controller.db_manager.threads
+    # The loop kept running while the retriever was being rebuilt
+    assert ticks >= 5
+    assert websocket.frames == [{"on_chat_model_stream": "hello via retriever"}, {"on_chat_model_end": True}]
+
+
+class FragmentBot:
+    async def astream_response(self, data, retriever):
+        for fragment in ["Hold ", "the reset ", "button."]:
+            yield fragment
+
+
+def test_each_fragment_is_forwarded_as_it_arrives():
+    controller = make_controller()
+    controller.qa_handler = FragmentBot()
+    websocket = RecordingWebSocket()
+    asyncio.run(controller.invoke_our_graph(websocket, "How do I reset?", "user-1"))
+    assert websocket.frames == [
+        {"on_chat_model_stream": "Hold "},
+        {"on_chat_model_stream": "the reset "},
+        {"on_chat_model_stream": "button."},
+        {"on_chat_model_end": True},
+    ]
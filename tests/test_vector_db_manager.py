@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from config import Config
+from controllers.document_processor import DocumentProcessor
+from controllers.vector_db_manager import VectorDBManager
+from services.hash_embeddings import HashEmbeddings
+from services.vector_backends import count_chunks
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    A data directory of text files, ingested into a flat vectorstore with process-wide
+    VectorDBManager state reset before and after the test.
+    """
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "flat")
+    for name, value in [("query_embeddings", None), ("generation", 0), ("_vectorstore", None), ("_retriever", None),
+                        ("_retriever_generation", -1), ("lexical_index", None), ("_invalidation_listeners", [])]:
+        monkeypatch.setattr(VectorDBManager, name, value)
+    directory = tmp_path / "data"
+    directory.mkdir()
+    yield directory
+    if VectorDBManager.lexical_index is not None:
+        VectorDBManager.lexical_index.close()
+
+
+def write_files(directory, count):
+    for index in range(count):
+        (directory / f"doc{index}.txt").write_text(f"Document {index} explains how to reset router model R{index}.")
+
+
+def ingested_files():
+    return REGISTRY.get_sample_value("ragchat_ingested_files_total", {"outcome": "ok"}) or 0.0
+
+
+def test_concurrent_ingestions_embed_each_file_once(data_dir, monkeypatch):
+    manager = VectorDBManager()
+    write_files(data_dir, 6)
+    embed_documents = HashEmbeddings.embed_documents
+
+    def slow_embed_documents(self, texts):
+        # Keeps each run busy long enough for the other one to start
+        time.sleep(0.05)
+        return embed_documents(self, texts)
+
+    monkeypatch.setattr(HashEmbeddings, "embed_documents", slow_embed_documents)
+    before = ingested_files()
+    errors = []
+
+    def ingest():
+        try:
+            manager.ingest_directory()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=ingest) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert ingested_files() - before == 6
+    assert count_chunks(manager.get_vectorstore()) == 6
+    assert sorted(manager.manifest.filenames()) == [f"doc{index}.txt" for index in range(6)]
+    assert not [name for name in os.listdir(Config.PERSIST_DIR) if name.endswith(".tmp")]
+
+
+def test_create_db_and_ingest_directory_share_chunk_ids(data_dir, make_pdf):
+    make_pdf("data/manual.pdf", ["Hold the reset button for ten seconds.", "Pair the headphones."])
+    manager = VectorDBManager()
+    count = count_chunks(manager.get_vectorstore())
+
+    # A UI rebuild from the same files upserts in place and records the manifest
+    manager.create_db(DocumentProcessor().process_directory(str(data_dir)))
+    assert count_chunks(manager.get_vectorstore()) == count
+    assert manager.manifest.filenames() == ["manual.pdf"]
+
+    before = ingested_files()
+    manager.ingest_directory()
+    assert ingested_files() == before
+    manager.ingest_directory(skip_unchanged=False)
+    assert count_chunks(manager.get_vectorstore()) == count
+
+    # Rebuilding after the file changed replaces its previous chunks
+    make_pdf("data/manual.pdf", ["Hold the power button for five seconds.", "Pair the headphones."])
+    manager.create_db(DocumentProcessor().process_directory(str(data_dir)))
+    assert count_chunks(manager.get_vectorstore()) == count
+
+
+def test_retriever_is_reused_until_ingestion_changes_the_index(data_dir):
+    write_files(data_dir, 2)
+    manager = VectorDBManager()
+    invalidations = []
+    VectorDBManager.add_invalidation_listener(lambda: invalidations.append(VectorDBManager.generation))
+
+    retriever = manager.get_retriever()
+    assert manager.get_retriever() is retriever
+    generation = VectorDBManager.generation
+
+    # Nothing changed on disk: the index, its generation and the retriever are kept
+    manager.ingest_directory()
+    assert VectorDBManager.generation == generation
+    assert manager.get_retriever() is retriever
+    assert invalidations == []
+
+    write_files(data_dir, 3)
+    manager.ingest_directory()
+    assert invalidations == [generation + 1]
+    refreshed = manager.get_retriever()
+    assert refreshed is not retriever
+    assert "R2" in refreshed.invoke("reset router model R2")[0].page_content
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+
+import websockets
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "websocket_load.py")
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("websocket_load", BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def chat_server(socket):
+    """
+    Speaks the server.py protocol: two stream frames per answer, and an end frame only
+    (the way the server reports errors) for questions containing 'broken'.
+    """
+    async for text in socket:
+        message = json.loads(text)
+        if message.get("init"):
+            continue
+        if "broken" not in message["message"]:
+            for fragment in ["Hold the reset ", "button."]:
+                await asyncio.sleep(0.01)
+                await socket.send(json.dumps({"on_chat_model_stream": fragment}))
+        await socket.send(json.dumps({"on_chat_model_end": True}))
+
+
+def settings(url, **overrides):
+    values = dict(url=url, clients=3, rate=0.0, duration=5.0, requests=12, think_time=0.0, ramp=0.0, timeout=5.0,
+                  questions=None, server_pid=os.getpid(), sample_interval=0.01, seed=0, json=None)
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_load_test_reports_latency_errors_and_server_samples():
+    benchmark = load_benchmark()
+    mix = [("faq", "How do I reset the router?", 3), ("broken", "broken question", 1)]
+
+    async def run():
+        async with websockets.serve(chat_server, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            return await benchmark.LoadTest(settings(f"ws://127.0.0.1:{port}"), mix).run()
+
+    report = asyncio.run(run())
+
+    assert report["sent"] == 12
+    categories = report["categories"]
+    assert categories["faq"]["completed"] == categories["faq"]["sent"] > 0
+    assert report["errors"] == {"empty_answer": categories["broken"]["sent"]}
+    assert report["completed"] + categories["broken"]["sent"] == 12
+    assert report["frames_per_answer"] == 2
+    assert 0 < report["ttff"]["p50_ms"] <= report["ttlf"]["p99_ms"]
+    assert sum(second["sent"] for second in report["timeline"]) == 12
+    assert report["server"]["samples"] and report["server"]["summary"]["open_fds"]["max"] > 0
+
+
+def test_unreachable_server_counts_connect_errors():
+    benchmark = load_benchmark()
+    args = settings("ws://127.0.0.1:9", clients=2, server_pid=None, timeout=1.0)
+    report = asyncio.run(benchmark.LoadTest(args, benchmark.DEFAULT_MIX).run())
+    assert report["errors"] == {"connect": 2}
+    assert report["error_rate"] == 1.0
+
+
+def test_question_mix_file(tmp_path):
+    path = tmp_path / "mix.tsv"
+    path.write_text("How do I reset?\nfaq\tWhat is the warranty?\t2.5\n\n")
+    assert load_benchmark().load_mix(str(path)) == [("default", "How do I reset?", 1), ("faq", "What is the warranty?", 2.5)]